@@ -0,0 +1,106 @@
+# Copyright (c) 2021 by ERIGrid 2.0. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be found in the LICENSE file.
+'''
+Speed and accuracy report for the constant-property fluid of the DH network model.
+
+The DH network model is run with the library fluid (temperature-dependent properties of water) and with a
+constant-property fluid (parameter constant_fluid, properties at the reference temperature T_fluid_ref):
+ * pipeflow: a full pipeflow (hydraulics and heat transfer) of the benchmark network is repeated with fixed valve
+   positions, the report lists the time per pipeflow of both fluids and the speed-up.
+ * steps: the model is stepped with random inputs, the report lists the time per step of both fluids, the speed-up
+   and the RMSE and maximum deviation of every output.
+'''
+
+import random
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+import pandapipes as pp
+
+from simulators.dh_network.simulator import DHNetwork
+
+N_STEPS = 200
+N_PIPEFLOWS = 200
+
+OUTPUTS = [
+    'T_return_grid', 'T_return_tank', 'T_supply_cons1', 'T_supply_cons2', 'T_return_cons1', 'T_return_cons2',
+    'mdot_cons1', 'mdot_cons2', 'mdot_bypass', 'mdot_grid', 'mdot_tank_out',
+]
+
+
+def random_inputs(n_steps, seed = 0):
+    '''
+    Random inputs of the DH network model (within its operating range).
+    '''
+    rng = random.Random(seed)
+    return [dict(
+        Qdot_cons1 = rng.uniform(100, 600), Qdot_cons2 = rng.uniform(100, 600), Qdot_evap = rng.uniform(0, 200),
+        mdot_cons1_set = rng.uniform(1, 4), mdot_cons2_set = rng.uniform(1, 4),
+        mdot_tank_in_set = rng.choice([0, -rng.uniform(0, 2)]), T_tank_forward = rng.uniform(65, 75),
+    ) for _ in range(n_steps)]
+
+
+def time_steps(model, inputs, step_size = 60):
+    '''
+    :return: tuple (elapsed time per step in milliseconds, array of outputs)
+    '''
+    results = np.empty((len(inputs), len(OUTPUTS)))
+
+    start_time = perf_counter()
+    for i, step_inputs in enumerate(inputs):
+        for attr, value in step_inputs.items():
+            setattr(model, attr, value)
+        model.step_single(i * step_size)
+        results[i] = [getattr(model, attr) for attr in OUTPUTS]
+
+    return 1e3 * (perf_counter() - start_time) / len(inputs), results
+
+
+def time_pipeflow(model, n_pipeflows):
+    '''
+    :return: elapsed time per pipeflow in milliseconds (valve positions as set by the last step of the model)
+    '''
+    start_time = perf_counter()
+    for _ in range(n_pipeflows):
+        pp.pipeflow(model.net, transient = False, mode = 'all', max_iter = 100, heat_transfer = True)
+
+    return 1e3 * (perf_counter() - start_time) / n_pipeflows
+
+
+if __name__ == '__main__':
+    import argparse
+
+    # Parse command line options.
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--steps', type = int, default = N_STEPS, help = 'number of model steps')
+    parser.add_argument('--pipeflows', type = int, default = N_PIPEFLOWS, help = 'number of repeated pipeflows')
+    parser.add_argument('--T-fluid-ref', type = float, default = DHNetwork.T_fluid_ref,
+        help = 'reference temperature of the constant-property fluid in degC')
+    parser.add_argument('--report-file', default = 'constant_fluid_report.csv', help = 'report file name')
+    args = parser.parse_args()
+
+    inputs = random_inputs(args.steps)
+
+    models = {
+        'library': DHNetwork(enable_logging = False),
+        'constant': DHNetwork(enable_logging = False, constant_fluid = True, T_fluid_ref = args.T_fluid_ref),
+    }
+
+    elapsed_steps, results, elapsed_pipeflow = {}, {}, {}
+    for name, model in models.items():
+        elapsed_steps[name], results[name] = time_steps(model, inputs)
+        elapsed_pipeflow[name] = time_pipeflow(model, args.pipeflows)
+
+    deviation = results['constant'] - results['library']
+    report = pd.DataFrame({
+        'RMSE': np.sqrt(np.mean(deviation**2, axis = 0)),
+        'max abs deviation': np.max(np.abs(deviation), axis = 0),
+    }, index = pd.Index(OUTPUTS, name = 'output'))
+    report.to_csv(args.report_file)
+
+    for label, elapsed in [('pipeflow', elapsed_pipeflow), ('step', elapsed_steps)]:
+        print('{0}: library fluid {1:.3g} ms, constant fluid {2:.3g} ms, speed-up {3:.3g}'.format(
+            label, elapsed['library'], elapsed['constant'], elapsed['library'] / elapsed['constant']))
+    print(report.to_string(float_format = '{:.4g}'.format))
+    print('Saved report to file: {}'.format(args.report_file))
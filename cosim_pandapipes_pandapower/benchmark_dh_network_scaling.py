@@ -0,0 +1,116 @@
+# Copyright (c) 2021 by ERIGrid 2.0. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be found in the LICENSE file.
+'''
+Scaling report for district heating networks of increasing size.
+
+Synthetic networks with N substations (radial feeders, see simulators.dh_network.topology.feeder_tables) are
+created with the bulk creation functions of pandapipes and, for reference, element by element. The report lists
+the number of elements, the time for both ways of creating the network and the time of a pipeflow calculation
+(hydraulics and heat transfer). Pipe segments are sized for the mass flow of their downstream substations.
+'''
+
+from time import perf_counter
+
+import pandas as pd
+import pandapipes as pp
+
+from simulators.dh_network.topology import feeder_tables, build_network
+
+SUBSTATIONS = [10, 100, 1000]
+
+
+def build_network_per_element(tables, diameter_m = 0.1, fluid = 'water'):
+    '''
+    Create a pandapipes network from tables with one creation call per element (reference for build_network).
+    '''
+    net = pp.create_empty_network('net', add_stdtypes = False)
+    pp.create_fluid_from_lib(net, fluid, overwrite = True)
+
+    j = {}
+    for junction in tables['junction'].itertuples():
+        j[junction.name] = pp.create_junction(net, pn_bar = junction.pn_bar, tfluid_k = junction.tfluid_k,
+            name = junction.name, geodata = (junction.x, junction.y))
+
+    for pipe in tables['pipe'].itertuples():
+        pp.create_pipe_from_parameters(net, from_junction = j[pipe.from_junction], to_junction = j[pipe.to_junction],
+            length_km = pipe.length_km, diameter_m = pipe.diameter_m, k_mm = pipe.k_mm, sections = pipe.sections,
+            alpha_w_per_m2k = pipe.alpha_w_per_m2k, text_k = pipe.text_k, name = pipe.name)
+
+    for valve in tables['valve'].itertuples():
+        pp.create_valve(net, j[valve.from_junction], j[valve.to_junction], diameter_m = diameter_m, opened = True,
+            loss_coefficient = valve.loss_coefficient, name = valve.name)
+
+    for hx in tables['heat_exchanger'].itertuples():
+        pp.create_heat_exchanger(net, from_junction = j[hx.from_junction], to_junction = j[hx.to_junction],
+            diameter_m = diameter_m, qext_w = hx.qext_w, name = hx.name)
+
+    for ext_grid in tables['ext_grid'].itertuples():
+        pp.create_ext_grid(net, junction = j[ext_grid.junction], p_bar = ext_grid.p_bar, t_k = ext_grid.t_k,
+            name = ext_grid.name, type = 'pt')
+
+    for sink in tables['sink'].itertuples():
+        pp.create_sink(net, junction = j[sink.junction], mdot_kg_per_s = sink.mdot_kg_per_s, name = sink.name)
+
+    for source in tables['source'].itertuples():
+        pp.create_source(net, junction = j[source.junction], mdot_kg_per_s = source.mdot_kg_per_s, name = source.name)
+
+    return net
+
+
+def time_call(func, *args, **kwargs):
+    '''
+    :return: tuple (elapsed time in seconds, result)
+    '''
+    start_time = perf_counter()
+    result = func(*args, **kwargs)
+    return perf_counter() - start_time, result
+
+
+def scaling_report(substations, n_feeders = 1, per_element = True):
+    '''
+    Create and solve networks with the given numbers of substations (distributed evenly over the feeders).
+    '''
+    rows = []
+    for n in substations:
+        tables = feeder_tables(max(1, n // n_feeders), n_feeders = n_feeders)
+
+        elapsed_bulk, net = time_call(build_network, tables)
+        elapsed_per_element = time_call(build_network_per_element, tables)[0] if per_element else float('nan')
+        elapsed_pipeflow = time_call(
+            pp.pipeflow, net, transient = False, mode = 'all', max_iter = 100, heat_transfer = True
+        )[0]
+
+        rows.append({
+            'substations': len(net.heat_exchanger),
+            'junctions': len(net.junction),
+            'pipes': len(net.pipe),
+            'valves': len(net.valve),
+            'build bulk [s]': elapsed_bulk,
+            'build per element [s]': elapsed_per_element,
+            'build speed-up': elapsed_per_element / elapsed_bulk,
+            'pipeflow [s]': elapsed_pipeflow,
+            'min junction temp [degC]': net.res_junction['t_k'].min() - 273.15,
+        })
+
+    return pd.DataFrame(rows).set_index('substations')
+
+
+if __name__ == '__main__':
+    import argparse
+
+    # Parse command line options.
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--substations', type = int, nargs = '+', default = SUBSTATIONS, help = 'numbers of substations')
+    parser.add_argument('--feeders', type = int, default = 1, help = 'number of feeders')
+    parser.add_argument('--no-per-element', action = 'store_true', help = 'do not time the creation element by element')
+    parser.add_argument('--report-file', default = 'dh_network_scaling_report.csv', help = 'report file name')
+    args = parser.parse_args()
+
+    if args.feeders < 1 or min(args.substations) < 1:
+        parser.error('numbers of feeders and substations must be positive')
+
+    report = scaling_report(args.substations, args.feeders, not args.no_per_element)
+    report.to_csv(args.report_file)
+
+    print(report.to_string(float_format = '{:.4g}'.format))
+    print('Saved report to file: {}'.format(args.report_file))
@@ -0,0 +1,240 @@
+# Copyright (c) 2021 by ERIGrid 2.0. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be found in the LICENSE file.
+'''
+Cross-validation of the Python DH network models against reference results of the DisHeatLib
+implementation of the thermal system (see directory disheatlib_standalone).
+
+The reference results have to be simulated and exported offline (Modelica is not required for this script),
+either as CSV file (first column: time in seconds, other columns: signals) or as result file in MATLAB format
+(as written by Dymola or OpenModelica). CSV columns are named after the attributes of the DH network model
+(temperatures in degC), variables in MATLAB result files are mapped to these attributes (see REFERENCE_SIGNALS and
+option --signal).
+
+The DH network model is driven with the same one-week consumer heat demand profiles as the Modelica model and
+simulated with each engine (static, dynamic, ...). For each engine, the script reports the RMSE and maximum error
+per signal together with the elapsed time.
+'''
+
+import pathlib
+from time import time
+
+import numpy as np
+import pandas as pd
+
+# Resources of the DisHeatLib implementation (consumer heat demand profiles, one week).
+DISHEATLIB_RESOURCES = pathlib.Path(__file__).resolve().parent.parent / 'disheatlib_standalone' / 'ERIGridMultiEnergyBenchmark' / 'Resources'
+HEAT_DEMAND_PROFILE_CONSUMER1 = DISHEATLIB_RESOURCES / 'heat_demand_load_profile_consumer1_1week.txt'
+HEAT_DEMAND_PROFILE_CONSUMER2 = DISHEATLIB_RESOURCES / 'heat_demand_load_profile_consumer2_1week.txt'
+
+STEP_SIZE = 60
+END = 7 * 24 * 60 * 60
+
+# Default mapping of DH network attributes to variables of the Modelica model (only used for MATLAB result files).
+# A leading '-' reverses the sign of a variable (flows leaving a component are negative in Modelica).
+REFERENCE_SIGNALS = {
+    'T_supply_cons1': 'consumer1.port_a.T',
+    'T_supply_cons2': 'consumer2.port_a.T',
+    'T_return_cons1': 'consumer1.port_b.T',
+    'T_return_cons2': 'consumer2.port_b.T',
+    'T_return_grid': 'supply_pT.port_a.T',
+    'mdot_cons1': 'consumer1.port_a.m_flow',
+    'mdot_cons2': 'consumer2.port_a.m_flow',
+    'mdot_grid': '-supply_pT.ports_b[1].m_flow',
+}
+
+# Boundary conditions of the DH network, which are taken from the reference results (if available).
+# Mass flows are given as in the co-simulation, i.e., their sign is reversed as by the mosaik wrapper of the
+# DH network model (see DHNetworkSimulator.step).
+REFERENCE_INPUTS = ['mdot_tank_in_set', 'Qdot_evap', 'T_tank_forward']
+
+# Engines of the DH network model (parameters of DHNetwork).
+ENGINES = {
+    'static': dict(dynamic_temp_flow_enabled = False),
+    'static_cached': dict(dynamic_temp_flow_enabled = False, cache_enabled = True),
+    'dynamic': dict(dynamic_temp_flow_enabled = True, dynamic_thermal_engine = 'analytical'),
+    'dynamic_plug_flow': dict(dynamic_temp_flow_enabled = True, dynamic_thermal_engine = 'plug_flow'),
+    'dynamic_sparse': dict(dynamic_temp_flow_enabled = True, dynamic_thermal_engine = 'sparse'),
+}
+
+
+def read_modelica_table(file_name):
+    '''
+    Read a table in the text format of Modelica.Blocks.Sources.CombiTimeTable (first column: time).
+    '''
+    data = np.loadtxt(file_name, comments = ['#', 'double', 'float'])
+    return pd.Series(data[:, 1], index = data[:, 0])
+
+
+def read_modelica_results(file_name, signals):
+    '''
+    Read signals from a result file in MATLAB format (as written by Dymola or OpenModelica).
+    Temperatures (signals starting with 'T_') are converted from Kelvin to degC.
+    :param file_name: name of the result file
+    :param signals: dict of signal names (keys) and names of Modelica variables (values)
+    :return: data frame with time in seconds as index
+    '''
+    from scipy.io import loadmat
+
+    mat = loadmat(file_name, chars_as_strings = False)
+    transposed = ''.join(mat['Aclass'][3]).startswith('binTrans')
+
+    names = mat['name'].T if transposed else mat['name']
+    names = [''.join(row).rstrip('\x00 ') for row in names]
+    data_info = mat['dataInfo'].T if transposed else mat['dataInfo']
+    data = {k: (mat[k].T if transposed else mat[k]) for k in ('data_1', 'data_2') if k in mat}
+
+    def variable(name):
+        if name.startswith('-'):
+            return -variable(name[1:])
+
+        i = names.index(name)
+        matrix, column = data_info[i][0], data_info[i][1]
+        values = data['data_{}'.format(matrix if matrix > 0 else 2)][:, abs(column) - 1]
+        return -values if column < 0 else values
+
+    time_values = data['data_2'][:, 0]
+    results = {}
+    for signal, name in signals.items():
+        if name.lstrip('-') in names:
+            results[signal] = variable(name)
+            if signal.startswith('T_'):
+                results[signal] = results[signal] - 273.15
+
+    # Drop duplicate time instants (events).
+    df = pd.DataFrame(results, index = time_values)
+    return df[~df.index.duplicated(keep = 'last')]
+
+
+def read_reference(file_name, signals = REFERENCE_SIGNALS):
+    '''
+    Read reference results from a CSV file (columns named after DH network attributes) or a MATLAB result file.
+    '''
+    if pathlib.Path(file_name).suffix == '.mat':
+        return read_modelica_results(file_name, dict(signals, **{v: v for v in REFERENCE_INPUTS}))
+
+    df = pd.read_csv(file_name, index_col = 0)
+    df.index = df.index.astype(float)
+    return df.rename(columns = {name: signal for signal, name in signals.items()})
+
+
+def simulate_dh_network(engine_params, reference, step_size = STEP_SIZE, end = END, surrogate_file = None):
+    '''
+    Simulate the DH network model driven by the consumer heat demand profiles of the DisHeatLib implementation.
+    In case a surrogate file is given, the surrogate model is simulated.
+    :return: tuple (results, elapsed time)
+    '''
+    from simulators.dh_network.simulator import DHNetwork
+    from simulators.dh_network.surrogate import DHNetworkSurrogate
+    from simulators.heat_consumer.simulator import HEXConsumer
+
+    heat_demand1 = read_modelica_table(HEAT_DEMAND_PROFILE_CONSUMER1)
+    heat_demand2 = read_modelica_table(HEAT_DEMAND_PROFILE_CONSUMER2)
+
+    network_params = dict(T_supply_grid = 75, P_grid_bar = 6, T_amb = 8, enable_logging = False, **engine_params)
+    if surrogate_file is None:
+        network = DHNetwork(**network_params)
+    else:
+        network = DHNetworkSurrogate(surrogate_file = surrogate_file, **network_params)
+    consumers = [
+        HEXConsumer(T_return_target = 40, P_heat = 500, mdot_hex_in = 3.5, mdot_hex_out = -3.5),
+        HEXConsumer(T_return_target = 40, P_heat = 500, mdot_hex_in = 3.5, mdot_hex_out = -3.5),
+    ]
+    inputs = [name for name in REFERENCE_INPUTS if name in reference]
+
+    times = np.arange(0, end, step_size)
+    results = {name: [] for name in network_outputs()}
+
+    start_time = time()
+    for t in times:
+        # Consumers (supply temperature of the previous step, as in the co-simulation).
+        for consumer, demand, T_supply in zip(
+                consumers, (heat_demand1, heat_demand2), (network.T_supply_cons1, network.T_supply_cons2)):
+            consumer.P_heat = np.interp(t, demand.index, demand.values)
+            consumer.T_supply = T_supply
+            consumer.step_single()
+
+        network.Qdot_cons1 = consumers[0].P_heat
+        network.Qdot_cons2 = consumers[1].P_heat
+        network.mdot_cons1_set = consumers[0].mdot_hex_in
+        network.mdot_cons2_set = consumers[1].mdot_hex_in
+
+        for name in inputs:
+            value = np.interp(t, reference.index, reference[name])
+            setattr(network, name, -value if 'mdot' in name else value)
+
+        network.step_single(t)
+
+        for name in results:
+            results[name].append(getattr(network, name))
+
+    return pd.DataFrame(results, index = times), time() - start_time
+
+
+def network_outputs():
+    return sorted(REFERENCE_SIGNALS)
+
+
+def compare_to_reference(results, reference):
+    '''
+    Compare simulation results to the reference (interpolated to the time instants of the simulation).
+    '''
+    report = {}
+
+    for name in results:
+        if name not in reference:
+            continue
+
+        ref = np.interp(results.index, reference.index, reference[name])
+        error = results[name].values - ref
+
+        report[name] = {
+            'rmse': np.sqrt(np.nanmean(error**2)),
+            'max abs error': np.nanmax(np.abs(error)),
+        }
+
+    return report
+
+
+if __name__ == '__main__':
+    import argparse
+
+    # Parse command line options.
+    parser = argparse.ArgumentParser()
+    parser.add_argument('reference', help = 'reference results of the DisHeatLib model (CSV or MATLAB result file)')
+    parser.add_argument('--engines', nargs = '+', default = list(ENGINES), choices = list(ENGINES), help = 'engines of the DH network model')
+    parser.add_argument('--dh-surrogate', default = None, help = 'also validate the surrogate model from this file')
+    parser.add_argument('--signal', action = 'append', default = [], metavar = 'ATTR=VARIABLE',
+        help = 'map a DH network attribute to a Modelica variable (MATLAB result files only)')
+    parser.add_argument('--step-size', type = int, default = STEP_SIZE, help = 'step size in seconds')
+    parser.add_argument('--end', type = int, default = END, help = 'simulation period in seconds')
+    parser.add_argument('--report-file', default = 'disheatlib_validation_report.csv', help = 'report file name')
+    args = parser.parse_args()
+
+    signals = dict(REFERENCE_SIGNALS)
+    for s in args.signal:
+        attr, _, variable = s.partition('=')
+        signals[attr] = variable
+
+    reference = read_reference(args.reference, signals)
+    print('REFERENCE SIGNALS:', ', '.join(c for c in reference.columns))
+
+    engines = {name: ENGINES[name] for name in args.engines}
+    if args.dh_surrogate is not None:
+        engines['surrogate'] = dict(dynamic_temp_flow_enabled = False)
+
+    rows = []
+    for name, params in engines.items():
+        print('SIMULATING ENGINE:', name)
+
+        surrogate_file = args.dh_surrogate if name == 'surrogate' else None
+        results, elapsed = simulate_dh_network(params, reference, args.step_size, args.end, surrogate_file)
+
+        for signal, errors in compare_to_reference(results, reference).items():
+            rows.append(dict(engine = name, signal = signal, elapsed_time = elapsed, **errors))
+
+    report = pd.DataFrame(rows).set_index(['engine', 'signal'])
+    report.to_csv(args.report_file)
+
+    with pd.option_context('display.max_rows', None, 'display.width', 200):
+        print(report)
+    print('Saved report to file: {}'.format(args.report_file))
@@ -0,0 +1,174 @@
+# Copyright (c) 2021 by ERIGrid 2.0. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be found in the LICENSE file.
+'''
+Ensemble (Monte-Carlo) simulation of the thermal subsystem of the ERIGrid 2.0 multi-energy benchmark.
+
+Instead of running one co-simulation per scenario, every model carries a leading replica axis (see
+simulators.util.ensemble) and a single MOSAIK world advances all replicas in lock-step. Hence, the overhead of
+the orchestration (scheduling, data exchange) is paid once per step instead of once per replica and step.
+
+The replicas differ in their heat demand profiles and in perturbed model parameters:
+ * Distorted heat demand profiles can be generated offline with the multifractal distorter (see
+   pandapipes_standalone/simulators/util/multifractaldistorter/batch_distorter.py), with columns
+   'consumer1_<i>' and 'consumer2_<i>' for replica i. Without profiles, all replicas use the default profiles.
+ * The return temperature targets of the consumers, the initial temperature of the storage tank and the
+   system efficiency of the heat pump are perturbed with relative normally distributed noise.
+
+The electrical network is not part of the ensemble (the power flow is not vectorized over replicas), i.e., the
+flex heat controller runs without voltage control.
+
+Results are stored with one column per replica, i.e., '<sid>.<eid>.<attr>[<replica>]'.
+'''
+
+import numpy as np
+import pandas as pd
+
+from benchmark_multi_energy_sim import (
+    START_TIME, STEP_SIZE, END, SIM_CONFIG,
+    loadProfiles, instantiateThermalEntities, connectThermalEntities
+)
+
+REPLICAS = 10
+
+# Relative standard deviation of the perturbed parameters (nominal values as in benchmark_multi_energy_sim).
+PARAM_SPREAD = 0.05
+PERTURBED_PARAMS = {
+    'hex_consumer1': {'T_return_target': 40},
+    'hex_consumer2': {'T_return_target': 40},
+    'storage_tank': {'T_volume_initial': 60},
+    'heat_pump': {'eta_sys': 0.5},
+}
+
+# Results stored for every replica.
+ENSEMBLE_OUTPUTS = {
+    'storage_tank': ['T_cold', 'T_hot', 'T_avg'],
+    'hex_consumer1': ['P_heat', 'T_supply', 'T_return'],
+    'hex_consumer2': ['P_heat', 'T_supply', 'T_return'],
+    'heat_pump': ['P_effective', 'Qdot_cond', 'T_cond_out'],
+    'dh_network': ['T_return_grid', 'mdot_grid', 'mdot_tank_in'],
+    'flex_heat_ctrl': ['state', 'Q_HP_set'],
+}
+
+
+def initialize_simulators(world, step_size, outfile_name):
+    '''
+    Initialize and start the simulators of the thermal subsystem and the data collector.
+    '''
+    simulators = {}
+
+    simulators['dh_network'] = world.start('DHNetworkSim', step_size = step_size)
+    simulators['hex_consumer'] = world.start('HeatExchangerSim', step_size = step_size)
+    simulators['heat_profiles'] = world.start('TimeSeriesSim', eid_prefix = 'heat_demand', step_size = step_size)
+    simulators['storage_tank'] = world.start('StorageTankSim', step_size = step_size)
+    simulators['heat_pump'] = world.start('HeatPumpSim', eid_prefix = 'heatpump', step_size = step_size)
+    simulators['flex_heat_ctrl'] = world.start('FlexHeatCtrlSim', step_size = step_size)
+
+    simulators['collector'] = world.start(
+        'CollectorSim',
+        step_size = step_size,
+        print_results = False,
+        save_h5 = True,
+        h5_store_name = outfile_name,
+        h5_frame_name = 'results',
+        h5_format = 'table'
+    )
+
+    return simulators
+
+
+def replica_parameters(replicas, heat_profiles = None, param_spread = PARAM_SPREAD, seed = 0):
+    '''
+    Per-replica parameters of the thermal entities (see instantiateThermalEntities).
+    :param heat_profiles: data frame with distorted heat demand profiles (columns 'consumer1_<i>', 'consumer2_<i>')
+    :param param_spread: relative standard deviation of the perturbed parameters
+    :param seed: seed of the random number generator
+    '''
+    rng = np.random.default_rng(seed)
+    replica_params = {}
+
+    for entity, params in PERTURBED_PARAMS.items():
+        replica_params[entity] = {
+            name: list(nominal * (1 + param_spread * rng.standard_normal(replicas)))
+            for name, nominal in params.items()
+        }
+
+    if heat_profiles is not None:
+        for i, consumer in enumerate(['consumer1', 'consumer2'], start = 1):
+            # One single-column data frame per replica (instead of copying all profiles for every replica).
+            columns = ['{0}_{1}'.format(consumer, r) for r in range(replicas)]
+            missing = [c for c in columns if c not in heat_profiles]
+            if missing:
+                raise ValueError('heat demand profiles not found: {}'.format(', '.join(missing)))
+
+            replica_params['heat_profiles{}'.format(i)] = dict(
+                series = [heat_profiles[[c]] for c in columns],
+                fieldname = columns,
+            )
+
+    return replica_params
+
+
+def load_heat_profiles(file_names):
+    '''
+    Load distorted heat demand profiles (one or more CSV files, first column: time stamps).
+    '''
+    return pd.concat([pd.read_csv(f, index_col = 0, parse_dates = True) for f in file_names], axis = 1)
+
+
+def connect_data_collector(world, entities, monitor = 'sc_monitor'):
+    for ent, outputnames in ENSEMBLE_OUTPUTS.items():
+        for outputname in outputnames:
+            world.connect(entities[ent], entities[monitor], outputname)
+
+
+if __name__ == '__main__':
+    import argparse
+    import mosaik
+    from time import time, ctime
+    from datetime import timedelta
+
+    # Parse command line options.
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--replicas', type = int, default = REPLICAS, help = 'number of replicas')
+    parser.add_argument('--heat-profiles', nargs = '+', default = None, metavar = 'FILE',
+        help = 'distorted heat demand profiles (columns consumer1_<i> and consumer2_<i> for replica i)')
+    parser.add_argument('--param-spread', type = float, default = PARAM_SPREAD, help = 'relative standard deviation of perturbed parameters')
+    parser.add_argument('--seed', type = int, default = 0, help = 'seed of the parameter perturbations')
+    parser.add_argument('--outfile', default = 'benchmark_ensemble_results.h5', help = 'results file name')
+    parser.add_argument('--step-size', type = int, default = STEP_SIZE, help = 'simulation step size in seconds')
+    parser.add_argument('--end', type = int, default = END, help = 'simulation period in seconds')
+    args = parser.parse_args()
+
+    if args.replicas < 1:
+        parser.error('number of replicas must be positive')
+
+    if args.param_spread < 0:
+        parser.error('parameter spread must not be negative')
+
+    sim_start_time = time()
+    print("ENSEMBLE CO-SIMULATION STARTED AT:", ctime(sim_start_time))
+
+    profiles = loadProfiles()
+    heat_profiles = None if args.heat_profiles is None else load_heat_profiles(args.heat_profiles)
+    replica_params = replica_parameters(args.replicas, heat_profiles, args.param_spread, args.seed)
+
+    world = mosaik.World(SIM_CONFIG)
+
+    simulators = initialize_simulators(world, args.step_size, args.outfile)
+
+    entities = instantiateThermalEntities(
+        simulators, profiles, pd.Timestamp(START_TIME), voltage_control_enabled = False, step_size = args.step_size,
+        replicas = args.replicas, replica_params = replica_params
+    )
+    entities['sc_monitor'] = simulators['collector'].Collector()
+
+    def initial_data(entity, attr, default):
+        return {attr: default}
+
+    connectThermalEntities(world, entities, initial_data)
+    connect_data_collector(world, entities)
+
+    world.run(until = args.end)
+
+    sim_elapsed_time = str(timedelta(seconds = time() - sim_start_time))
+    print('TOTAL ELAPSED CO-SIMULATION TIME ({} REPLICAS):'.format(args.replicas), sim_elapsed_time)
@@ -0,0 +1,26 @@
+# Copyright (c) 2021 by ERIGrid 2.0. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be found in the LICENSE file.
+'''
+Histogram bins of the benchmark results, shared by the KPI collector of the simulation script
+(benchmark_multi_energy_sim.py) and the analysis script (benchmark_multi_energy_analysis.py).
+'''
+
+BINS_BUS_VOLTAGE = [
+    round(0.75 + i*.01, 2) for i in range(46)
+]
+
+BINS_LINE_LOADING = [
+    round(i*5, 2) for i in range(30)
+]
+
+BINS_TANK_TEMPERATURE_AVG = [
+    round(50 + i*.25, 2) for i in range(40)
+]
+
+BINS_TANK_TEMPERATURE_MAX = [
+    round(64 + i*.25, 2) for i in range(40)
+]
+
+BINS_HP_POWER_CONSUMPTION = [
+    round(i*5, 2) for i in range(22)
+]
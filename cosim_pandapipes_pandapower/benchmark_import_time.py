@@ -0,0 +1,86 @@
+# Copyright (c) 2021 by ERIGrid 2.0. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be found in the LICENSE file.
+'''
+Import time report for the simulators of this package.
+
+Every simulator is imported in a fresh Python process (as a MOSAIK worker would do), once alone via the lazy
+registry (see simulators/__init__.py) and once together with all other simulators (i.e., the cost of importing
+the package eagerly). The report lists the median import time over several runs and which of the heavy
+dependencies have been imported.
+'''
+
+import json
+import pathlib
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+
+import simulators
+
+N_RUNS = 5
+
+HEAVY_MODULES = ['pandas', 'pandapower', 'pandapipes', 'simple_pid', 'numba', 'matplotlib', 'scipy']
+
+IMPORT_SCRIPT = '''
+import json, sys, time
+start_time = time.perf_counter()
+import simulators
+for name in {names!r}:
+    simulators.load_simulator(name)
+elapsed = time.perf_counter() - start_time
+print(json.dumps({{'elapsed': elapsed, 'modules': [m for m in {heavy!r} if m in sys.modules]}}))
+'''
+
+
+def time_import(names, n_runs = N_RUNS):
+    '''
+    Import the given simulators in fresh Python processes.
+    :return: tuple (median import time in seconds, list of imported heavy modules)
+    '''
+    script = IMPORT_SCRIPT.format(names = list(names), heavy = HEAVY_MODULES)
+    cwd = pathlib.Path(__file__).resolve().parent
+
+    elapsed = []
+    for _ in range(n_runs):
+        output = subprocess.run(
+            [sys.executable, '-c', script], cwd = str(cwd), check = True, stdout = subprocess.PIPE,
+            universal_newlines = True
+        ).stdout
+        result = json.loads(output.splitlines()[-1])
+        elapsed.append(result['elapsed'])
+
+    return float(np.median(elapsed)), result['modules']
+
+
+if __name__ == '__main__':
+    import argparse
+
+    # Parse command line options.
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--simulators', nargs = '+', default = list(simulators.SIMULATORS),
+        choices = list(simulators.SIMULATORS), metavar = 'NAME', help = 'simulator class names')
+    parser.add_argument('--runs', type = int, default = N_RUNS, help = 'number of runs per simulator')
+    parser.add_argument('--report-file', default = 'import_time_report.csv', help = 'report file name')
+    args = parser.parse_args()
+
+    elapsed_all, modules_all = time_import(simulators.SIMULATORS, args.runs)
+
+    rows = []
+    for name in args.simulators:
+        elapsed, modules = time_import([name], args.runs)
+        rows.append({
+            'simulator': name,
+            'lazy import [s]': elapsed,
+            'all simulators [s]': elapsed_all,
+            'speed-up': elapsed_all / elapsed,
+            'heavy modules': ' '.join(modules),
+        })
+
+    report = pd.DataFrame(rows).set_index('simulator')
+    report.to_csv(args.report_file)
+
+    print('all simulators: {0:.3g} s ({1})'.format(elapsed_all, ' '.join(modules_all)))
+    print(report.to_string(float_format = '{:.3g}'.format))
+    print('Saved report to file: {}'.format(args.report_file))
@@ -5,6 +5,12 @@ results with voltage control enabled and disabled.
 
 import matplotlib.pyplot as plt
 import pandas as pd
+from collections.abc import Mapping
+
+from benchmark_histogram_bins import (
+    BINS_BUS_VOLTAGE, BINS_LINE_LOADING, BINS_TANK_TEMPERATURE_AVG, BINS_TANK_TEMPERATURE_MAX,
+    BINS_HP_POWER_CONSUMPTION
+)
 
 START_TIME = '2019-02-01 00:00:00'
 
@@ -86,26 +92,6 @@ PLOT_DICT = {
     ],
 }
 
-BINS_BUS_VOLTAGE = [
-    round(0.75 + i*.01, 2) for i in range(46)
-]
-
-BINS_LINE_LOADING = [
-    round(i*5, 2) for i in range(30)
-]
-
-BINS_TANK_TEMPERATURE_AVG = [
-    round(50 + i*.25, 2) for i in range(40)
-]
-
-BINS_TANK_TEMPERATURE_MAX = [
-    round(64 + i*.25, 2) for i in range(40)
-]
-
-BINS_HP_POWER_CONSUMPTION = [
-    round(i*5, 2) for i in range(22)
-]
-
 SHOW_PLOTS = False
 
 FIG_TYPE = 'png' # 'pdf'
@@ -120,30 +106,122 @@ def get_sim_node_name(
     return sim_node
 
 
-def retrieve_results(
-    store_name,
-    start_time,
-    drop_first_day_data = True
+def get_result_name(
+    column
 ):
-    results_dict = {}
-    results_store = pd.HDFStore(store_name)
+    if isinstance(column, tuple):
+        # Fixed format: column is a tuple (<sim_name>.<sim_node>, <attribute>).
+        (simulator, attribute) = column
+        return '.'.join([get_sim_node_name(simulator), attribute])
+    else:
+        # Table format: column name is <sim_name>.<sim_node>.<attribute>.
+        (sim_name, res_name) = column.split('.', 1)
+        return res_name
+
+
+class ResultStore(Mapping):
+    '''
+    Lazy, read-only access to the results saved by the data collector.
+
+    Results are accessed by their short name (e.g., 'Bus_1_0.vm_pu') and are only read from
+    the store when requested. The time index of each frame is read and converted only once.
+    For results saved in table format, only the requested columns are read from disk (starting
+    after the first day, if it is dropped), non-numeric columns are read together with all other
+    non-numeric columns of the frame. Results saved in fixed format are read completely on first
+    access.
+    '''
+
+    def __init__(
+        self, store_name, start_time,
+        drop_first_day_data = True
+    ):
+        self.start_time = pd.Timestamp(start_time)
+        self.first_day_end = self.start_time + pd.Timedelta(days = 1) if drop_first_day_data else None
+
+        self._store = pd.HDFStore(store_name, mode = 'r')
+        self._columns = {}
+        self._data_columns = {}
+        self._index = {}
+        self._frames = {}
+        self._cache = {}
+
+        for key in self._store.keys():
+            storer = self._store.get_storer(key)
+
+            if storer.is_table:
+                columns = storer.non_index_axes[0][1]
+                self._data_columns[key] = set(storer.data_columns)
+            else:
+                columns = self._read_frame(key).columns
+
+            for column in columns:
+                self._columns[get_result_name(column)] = (key, column)
 
-    for collector in results_store:
-        for (simulator, attribute), data in results_store[collector].items():
-            # Retrieve short name of data.
-            sim_node_name = get_sim_node_name(simulator)
-            res_name = '.'.join([sim_node_name, attribute])
+    def __enter__(self):
+        return self
 
-            # Convert index to time format.
-            data.index = pd.to_datetime(data.index, unit = 's', origin = start_time)
+    def __exit__(self, *args):
+        self.close()
 
-            if drop_first_day_data:
-                first_day_data = data.first('1D')
-                results_dict[res_name] = data.drop(first_day_data.index)
+    def __getitem__(self, res_name):
+        if res_name not in self._cache:
+            (key, column) = self._columns[res_name]
+
+            if key in self._frames:
+                data = self._frames[key][column].rename(res_name)
+            elif column not in self._data_columns[key]:
+                (start, index) = self._read_index(key)
+                values = self._store.select(key, columns = [column], start = start)[column]
+                data = pd.Series(values.values, index = index, name = res_name)
             else:
-                results_dict[res_name] = data
+                (start, index) = self._read_index(key)
+                values = self._store.select_column(key, column, start = start)
+                data = pd.Series(values.values, index = index, name = res_name)
+
+            self._cache[res_name] = data
+
+        return self._cache[res_name]
+
+    def __iter__(self):
+        return iter(self._columns)
+
+    def __len__(self):
+        return len(self._columns)
+
+    def close(self):
+        self._store.close()
+
+    def _convert_index(self, index):
+        # Convert index to time format and find first entry to be used.
+        index = pd.to_datetime(index, unit = 's', origin = self.start_time)
+        start = 0 if self.first_day_end is None else index.searchsorted(self.first_day_end)
+        return (start, index[start:])
+
+    def _read_index(self, key):
+        if key not in self._index:
+            self._index[key] = self._convert_index(self._store.select_column(key, 'index').values)
+        return self._index[key]
+
+    def _read_frame(self, key):
+        frame = self._store[key]
+        (start, index) = self._convert_index(frame.index.values)
+        frame = frame.iloc[start:]
+        frame.index = index
+        self._frames[key] = frame
+        return frame
+
+
+def retrieve_results(
+    store_name,
+    start_time,
+    drop_first_day_data = True,
+    res_names = None
+):
+    with ResultStore(store_name, start_time, drop_first_day_data) as results_store:
+        if res_names is None:
+            res_names = list(results_store)
+        results_dict = {res_name: results_store[res_name] for res_name in res_names}
 
-    results_store.close()
     return results_dict
 
 
@@ -216,14 +294,14 @@ def plot_results_compare(
 
 
 if __name__ == '__main__':
-    # Retrieve results for simulation with voltage control enabled.
-    dict_results_ctrl_enabled = retrieve_results(
+    # Open results for simulation with voltage control enabled (data is read on demand).
+    dict_results_ctrl_enabled = ResultStore(
         'benchmark_results_ctrl_enabled.h5',
         START_TIME, DROP_FIRST_DAY_DATA
         )
 
-    # Retrieve results for simulation with voltage control disabled.
-    dict_results_ctrl_disabled = retrieve_results(
+    # Open results for simulation with voltage control disabled (data is read on demand).
+    dict_results_ctrl_disabled = ResultStore(
         'benchmark_results_ctrl_disabled.h5',
         START_TIME, DROP_FIRST_DAY_DATA
         )
@@ -300,3 +378,6 @@ if __name__ == '__main__':
     print('heat pump P_effective:')
     print('\tSUM ctrl disabled: {:.2f}'.format(hp_sum_p_kw_ctrl_disabled))
     print('\tSUM ctrl enabled: {:.2f}'.format(hp_sum_p_kw_ctrl_enabled))
+
+    dict_results_ctrl_enabled.close()
+    dict_results_ctrl_disabled.close()
@@ -4,7 +4,15 @@
 This MOSAIK co-simulation setup implements the ERIGrid 2.0 multi-energy benchmark.
 '''
 
+from benchmark_histogram_bins import (
+    BINS_BUS_VOLTAGE, BINS_LINE_LOADING, BINS_TANK_TEMPERATURE_AVG, BINS_TANK_TEMPERATURE_MAX,
+    BINS_HP_POWER_CONSUMPTION
+)
+
 # Define default for simulation start time, step size and end (1 MOSAIK time-step = 1 second).
+# The step size applies to the physical models (heat exchangers, storage tank, heat pump). By default,
+# controllers and network models (DH network pipeflow, electrical network power flow) use the same step size.
+# For multi-rate simulations, they can be stepped at a coarser rate, with MOSAIK holding their last outputs.
 START_TIME = '2019-02-01 00:00:00'
 STEP_SIZE = 60 * 1
 END = 7 * 24 * 60 * 60
@@ -43,8 +51,15 @@ SIM_CONFIG = {
     'CollectorSim': {
         'python': 'simulators:Collector'
     },
+    'KPICollectorSim': {
+        'python': 'simulators:KPICollector'
+    },
 }
 
+# Simulators that are started in separate processes by default with option --remote-sims (the network models
+# dominate the computation time and can step concurrently on different cores).
+REMOTE_SIMULATORS = ['DHNetworkSim', 'ElNetworkSim']
+
 # Simulation parameters.
 HP_TEMP_COND_OUT_TARGET = 75
 EXT_SOURCE_SUPPLY_TEMP = 75  # Supply temperature of external DH network.
@@ -53,6 +68,31 @@ INIT_HEX_SUPPLY_TEMP = 75  # Return temperature of heat exchanger.
 INIT_HEX_RETURN_TEMP = 45  # Return temperature of heat exchanger.
 INIT_STORAGE_TANK_TEMP = 70  # Storage tank initial temperature.
 
+# Warm start: the first simulated day is affected by initialization artifacts and is not taken into account
+# in the analysis. Instead of simulating it for every run, the state at the end of this spin-up period is stored
+# in a library of initial states (one snapshot per configuration) and subsequent runs start from this snapshot.
+SPIN_UP_PERIOD = 24 * 60 * 60
+INITIAL_STATE_LIBRARY = 'initial_states'
+
+# Simulators with an internal state that is stored in the snapshot.
+WARM_START_SIMULATORS = [
+    'dh_network', 'hex_consumer', 'storage_tank', 'heat_pump', 'flex_heat_ctrl', 'voltage_ctrl'
+]
+
+# KPIs aggregated online by the KPI collector (data from the spin-up period is ignored).
+# Histograms use the same bins as the analysis script (see benchmark_histogram_bins.py).
+KPI_QUANTILES = [0.05, 0.5, 0.95, 0.99]
+KPI_HISTOGRAM_BINS = {
+    'vm_pu': BINS_BUS_VOLTAGE,
+    'loading_percent': BINS_LINE_LOADING,
+    'StratifiedWaterStorageTank_0.T_avg': BINS_TANK_TEMPERATURE_AVG,
+    'StratifiedWaterStorageTank_0.T_hot': BINS_TANK_TEMPERATURE_MAX,
+    'heatpump_0.P_effective': BINS_HP_POWER_CONSUMPTION,
+}
+KPI_LIMITS = {
+    'vm_pu': [0.9, 1.1],  # Voltage band
+}
+
 
 def loadProfiles():
     '''
@@ -83,23 +123,38 @@ def loadProfiles():
     return profiles
 
 
-def initializeSimulators(world, step_size, outfile_name):
+def initializeSimulators(
+        world, step_size, outfile_name, time_offset = 0, kpi_file = None, event_driven = False,
+        control_step_size = None, network_step_size = None, el_solver_params = None
+    ):
     '''
     Initialize and start all simulators.
+    The data collector is only started in case an output file name is given,
+    the KPI collector only in case a KPI file name is given.
+    With event-driven scheduling, time series players and the voltage controller skip steps without changes.
+    Controllers and network models use their own step sizes (if given).
+    The power flow mode of the electrical network and its tolerances are configured with dict el_solver_params
+    (see ElectricNetworkSimulator).
     '''   
     simulators = {}
 
+    control_step_size = control_step_size or step_size
+    network_step_size = network_step_size or step_size
+
     # Electrical network.
+    el_network_params = dict(mode = 'pf')
+    el_network_params.update(el_solver_params or {})
+
     simulators['el_network'] = world.start(
         'ElNetworkSim',
-        step_size = step_size,
-        mode = 'pf'
+        step_size = network_step_size,
+        **el_network_params
     )
 
     # District heating network.
     simulators['dh_network'] = world.start(
         'DHNetworkSim',
-        step_size = step_size
+        step_size = network_step_size
     )
 
     # Heat consumer (heat exchanger).
@@ -108,18 +163,28 @@ def initializeSimulators(world, step_size, outfile_name):
         step_size = step_size
     )
 
-    # Time series player for electrical load profiles and PV generation profiles.
-    simulators['load_gen_profiles'] = world.start(
+    # Time series player for electrical load profiles.
+    simulators['load_profiles'] = world.start(
         'TimeSeriesSim',
         eid_prefix = 'power_demand',
-        step_size = step_size
+        step_size = step_size,
+        event_driven = event_driven
+    )
+
+    # Time series player for PV generation profiles (separate simulator, because the profiles are constant at night).
+    simulators['pv_profiles'] = world.start(
+        'TimeSeriesSim',
+        eid_prefix = 'pv_generation',
+        step_size = step_size,
+        event_driven = event_driven
     )
 
     # Time series player for the consumer heat demand.
     simulators['heat_profiles'] = world.start(
         'TimeSeriesSim',
         eid_prefix = 'heat_demand',
-        step_size = step_size
+        step_size = step_size,
+        event_driven = event_driven
     )
 
     # Stratified water storage tank.
@@ -138,34 +203,63 @@ def initializeSimulators(world, step_size, outfile_name):
     # Flex heat controller.
     simulators['flex_heat_ctrl'] = world.start(
         'FlexHeatCtrlSim',
-        step_size = step_size
+        step_size = control_step_size
     )
 
     # Voltage controller.
     simulators['voltage_ctrl'] = world.start(
         'VoltageCtrlSim',
-        step_size = step_size
+        step_size = control_step_size,
+        event_driven = event_driven
     )
 
     # Data collector.
-    simulators['collector'] = world.start(
-        'CollectorSim',
-        step_size = step_size,
-        print_results = False,
-        save_h5 = True,
-        h5_store_name = outfile_name,
-        h5_frame_name = 'results'
-    )
+    if outfile_name is not None:
+        simulators['collector'] = world.start(
+            'CollectorSim',
+            step_size = step_size,
+            print_results = False,
+            save_h5 = True,
+            h5_store_name = outfile_name,
+            h5_frame_name = 'results',
+            h5_format = 'table',
+            time_offset = time_offset
+        )
+
+    # KPI collector.
+    if kpi_file is not None:
+        simulators['kpi_collector'] = world.start(
+            'KPICollectorSim',
+            step_size = step_size,
+            kpi_file = kpi_file,
+            kpi_start_time = SPIN_UP_PERIOD,
+            time_offset = time_offset,
+            quantiles = KPI_QUANTILES,
+            histogram_bins = KPI_HISTOGRAM_BINS,
+            limits = KPI_LIMITS
+        )
 
     return simulators
 
 
-def instantiateEntities(simulators, profiles, voltage_control_enabled = True):
+def instantiateEntities(
+        simulators, profiles, voltage_control_enabled = True, time_offset = 0,
+        step_size = STEP_SIZE, control_step_size = None, dh_surrogate_file = None, dh_solver_params = None
+    ):
     '''
     Create instances of simulators.
+    In case a surrogate file is given, the DH network is simulated with the surrogate model.
+    Caching and reuse of DH network pipeflow results are configured with dict dh_solver_params (see DHNetwork).
     '''
+    import pandas as pd
+
     entities = {}
 
+    control_step_size = control_step_size or step_size
+
+    # Start time of the time series players (shifted in case the simulation starts from a snapshot).
+    t_start = pd.Timestamp(START_TIME) + pd.Timedelta(seconds = time_offset)
+
     # Electrical network.
     entities['el_network'] = simulators['el_network'].Grid(
         gridfile = 'resources/power/power_grid_model.json',
@@ -179,51 +273,107 @@ def instantiateEntities(simulators, profiles, voltage_control_enabled = True):
     entities.update( {element.eid: element for element in grid if element.type in 'Line'} )
 
     # Time series player for the power consumption profile of load 1.
-    entities['consumer_load1'] = simulators['load_gen_profiles'].TimeSeriesPlayer(
-        t_start = START_TIME,
+    entities['consumer_load1'] = simulators['load_profiles'].TimeSeriesPlayer(
+        t_start = t_start,
         series = profiles['power_demand'].copy(),
         fieldname = 'Load_1',
         interp_method = 'pchip',
     )
 
     # Time series player for the power consumption profile of load 2.
-    entities['consumer_load2'] = simulators['load_gen_profiles'].TimeSeriesPlayer(
-        t_start = START_TIME,
+    entities['consumer_load2'] = simulators['load_profiles'].TimeSeriesPlayer(
+        t_start = t_start,
         series = profiles['power_demand'].copy(),
         fieldname = 'Load_2',
         interp_method = 'pchip',
     )
 
     # Time series player for generation profile of PV 1.
-    entities['gen_pv1'] = simulators['load_gen_profiles'].TimeSeriesPlayer(
-        t_start = START_TIME,
+    entities['gen_pv1'] = simulators['pv_profiles'].TimeSeriesPlayer(
+        t_start = t_start,
         series = profiles['pv_generation'].copy(),
         fieldname = 'PV_1',
         interp_method = 'pchip',
     )
 
     # Time series player for generation profile of PV 2.
-    entities['gen_pv2'] = simulators['load_gen_profiles'].TimeSeriesPlayer(
-        t_start = START_TIME,
+    entities['gen_pv2'] = simulators['pv_profiles'].TimeSeriesPlayer(
+        t_start = t_start,
         series = profiles['pv_generation'].copy(),
         fieldname = 'PV_2',
         interp_method = 'pchip',
     )
 
+    # Thermal subsystem (DH network, consumers, storage tank, heat pump, flex heat controller).
+    entities.update(instantiateThermalEntities(
+        simulators, profiles, t_start, voltage_control_enabled, step_size, dh_surrogate_file, dh_solver_params
+    ))
+
+    # Voltage controller.
+    entities['voltage_ctrl'] = simulators['voltage_ctrl'].VoltageController(
+        delta_vm_upper_pu = 0.1,
+        delta_vm_lower_pu_hp_on = -0.1,
+        delta_vm_lower_pu_hp_off = -0.08,
+        delta_vm_deadband = 0.03,
+        hp_p_el_mw_rated = 0.1,
+        hp_p_el_mw_min = 0.4 * 0.1,
+        hp_operation_steps_min = 30 * 60 / control_step_size,
+        k_p = 0.15
+    )
+
+    # Data collector.
+    if 'collector' in simulators:
+        entities['sc_monitor'] = simulators['collector'].Collector()
+
+    # KPI collector.
+    if 'kpi_collector' in simulators:
+        entities['kpi_monitor'] = simulators['kpi_collector'].KPICollector()
+
+    return entities
+
+
+def instantiateThermalEntities(
+        simulators, profiles, t_start, voltage_control_enabled = True, step_size = STEP_SIZE,
+        dh_surrogate_file = None, dh_solver_params = None, replicas = 1, replica_params = None
+    ):
+    '''
+    Create instances of the simulators of the thermal subsystem (DH network, consumers, storage tank, heat pump
+    and flex heat controller).
+    With more than one replica, every entity is an ensemble of replicas advanced in lock-step (see
+    simulators.util.ensemble). Dict replica_params maps entity names to dicts of parameters with one value per
+    replica (e.g., distorted heat demand profiles or perturbed model parameters).
+    '''
+    entities = {}
+
+    replica_params = replica_params or {}
+
+    def ensemble(entity):
+        if replicas == 1 and entity not in replica_params:
+            return {}
+        return dict(replicas = replicas, replica_params = replica_params.get(entity, {}))
+
     # District heating network.
-    entities['dh_network'] = simulators['dh_network'].DHNetwork(
+    dh_network_params = dict(
         T_supply_grid = 75,
         P_grid_bar = 6,
         T_amb = 8,
         dynamic_temp_flow_enabled = False,
+        **(dh_solver_params or {})
     )
 
+    if dh_surrogate_file is None:
+        entities['dh_network'] = simulators['dh_network'].DHNetwork(**dh_network_params, **ensemble('dh_network'))
+    else:
+        entities['dh_network'] = simulators['dh_network'].DHNetworkSurrogate(
+            surrogate_file = dh_surrogate_file, **dh_network_params, **ensemble('dh_network'))
+
     # Heat exchanger 1.
     entities['hex_consumer1'] = simulators['hex_consumer'].HEXConsumer(
         T_return_target = 40,
         P_heat = 500,
         mdot_hex_in = 3.5,
         mdot_hex_out = -3.5,
+        **ensemble('hex_consumer1')
     )
 
     # Heat exchanger 2.
@@ -232,21 +382,23 @@ def instantiateEntities(simulators, profiles, voltage_control_enabled = True):
         P_heat = 500,
         mdot_hex_in = 3.5,
         mdot_hex_out = -3.5,
+        **ensemble('hex_consumer2')
     )
 
     # Time series player for heat demand of consumer 1.
     entities['heat_profiles1'] = simulators['heat_profiles'].TimeSeriesPlayer(
-        t_start = START_TIME,
+        t_start = t_start,
         series = profiles['heat_demand'].copy(),
         fieldname = 'consumer1',
+        **ensemble('heat_profiles1')
     )
 
-
     # Time series player for heat demand of consumer 2.
     entities['heat_profiles2'] = simulators['heat_profiles'].TimeSeriesPlayer(
-        t_start = START_TIME,
+        t_start = t_start,
         series = profiles['heat_demand'].copy(),
         fieldname = 'consumer2',
+        **ensemble('heat_profiles2')
     )
 
     # Stratified water storage tank.
@@ -257,7 +409,8 @@ def instantiateEntities(simulators, profiles, voltage_control_enabled = True):
         STEEL_THICKNESS = 0.02,
         NB_LAYERS = 10,
         T_volume_initial = 60,  # degC
-        dt = STEP_SIZE
+        dt = step_size,
+        **ensemble('storage_tank')
     )
 
     # Heat pump.
@@ -268,39 +421,35 @@ def instantiateEntities(simulators, profiles, voltage_control_enabled = True):
         eta_sys = 0.5,
         eta_comp = 0.7,
         T_evap_out_min = 20,
-        dt = STEP_SIZE,
+        dt = step_size,
         T_cond_out_target = HP_TEMP_COND_OUT_TARGET,  # degC
         opmode = 'constant_T_out',  # Constant output power at condenser
+        **ensemble('heat_pump')
     )
 
     # Flex heat controller.
     entities['flex_heat_ctrl'] = simulators['flex_heat_ctrl'].SimpleFlexHeatController(
-        voltage_control_enabled = voltage_control_enabled
+        voltage_control_enabled = voltage_control_enabled,
+        **ensemble('flex_heat_ctrl')
     )
 
-    # Voltage controller.
-    entities['voltage_ctrl'] = simulators['voltage_ctrl'].VoltageController(
-        delta_vm_upper_pu = 0.1,
-        delta_vm_lower_pu_hp_on = -0.1,
-        delta_vm_lower_pu_hp_off = -0.08,
-        delta_vm_deadband = 0.03,
-        hp_p_el_mw_rated = 0.1,
-        hp_p_el_mw_min = 0.4 * 0.1,
-        hp_operation_steps_min = 30 * 60 / STEP_SIZE,
-        k_p = 0.15
-    )
-
-    # Data collector.
-    entities['sc_monitor'] = simulators['collector'].Collector()
-
     return entities
 
 
-def connectEntities(world, entities):
+def connectEntities(world, entities, snapshot = None):
     '''
     Add connections between the simulator entities.
+    In case a snapshot is given, the initial data of time-shifted connections is taken from it.
     '''
     from simulators.el_network.simulator import make_eid as grid_id
+
+    snapshot_outputs = {}
+    if snapshot is not None:
+        for state in snapshot.values():
+            snapshot_outputs.update(state['outputs'])
+
+    def initial_data(entity, attr, default):
+        return {attr: snapshot_outputs.get(entities[entity].eid, {}).get(attr, default)}
     
     # Connect electrical consumption profiles to electrical loads.
     world.connect(entities['consumer_load1'], entities[grid_id('Load_1',0)], ('out', 'p_mw'))
@@ -314,8 +463,20 @@ def connectEntities(world, entities):
     world.connect(entities[grid_id('Bus_1',0)], entities['voltage_ctrl'], ('vm_pu', 'vmeas_pu'))
     world.connect(entities['voltage_ctrl'], entities['flex_heat_ctrl'], ('hp_p_el_kw_setpoint', 'P_hp_el_setpoint'))
     world.connect(entities['heat_pump'], entities['flex_heat_ctrl'], ('P_effective', 'P_hp_effective'),
-        time_shifted=True, initial_data={'P_effective': 0})
+        time_shifted=True, initial_data=initial_data('heat_pump', 'P_effective', 0))
+
+    # Heat pump (electrical consumption).
+    world.connect(entities['heat_pump'], entities[grid_id('Heat Pump',0)], ('P_effective_mw', 'p_mw'),
+        time_shifted=True, initial_data=initial_data('heat_pump', 'P_effective_mw', 0.))
+
+    connectThermalEntities(world, entities, initial_data)
 
+
+def connectThermalEntities(world, entities, initial_data):
+    '''
+    Add connections between the entities of the thermal subsystem.
+    Function initial_data(entity, attr, default) provides the initial data of time-shifted connections.
+    '''
     # District heating network.
     world.connect(entities['flex_heat_ctrl'], entities['dh_network'], ('mdot_1_supply', 'mdot_grid_set'))
     world.connect(entities['flex_heat_ctrl'], entities['dh_network'], ('mdot_3_supply', 'mdot_tank_in_set'))
@@ -327,52 +488,50 @@ def connectEntities(world, entities):
     world.connect(entities['heat_profiles1'], entities['hex_consumer1'], ('out', 'P_heat'))
     world.connect(entities['hex_consumer1'], entities['flex_heat_ctrl'], ('mdot_hex_out', 'mdot_HEX1'))
     world.connect(entities['dh_network'], entities['hex_consumer1'], ('T_supply_cons1', 'T_supply'),
-        time_shifted=True, initial_data={'T_supply_cons1': 70})
+        time_shifted=True, initial_data=initial_data('dh_network', 'T_supply_cons1', 70))
 
     # Heat demand consumer 1.
     world.connect(entities['heat_profiles2'], entities['dh_network'], ('out', 'Qdot_cons2'))
     world.connect(entities['heat_profiles2'], entities['hex_consumer2'], ('out', 'P_heat'))
     world.connect(entities['hex_consumer2'], entities['flex_heat_ctrl'], ('mdot_hex_out', 'mdot_HEX2'))
     world.connect(entities['dh_network'], entities['hex_consumer2'], ('T_supply_cons2', 'T_supply'),
-        time_shifted=True, initial_data={'T_supply_cons2': 70})
+        time_shifted=True, initial_data=initial_data('dh_network', 'T_supply_cons2', 70))
 
     # Heat pump.
     world.connect(entities['flex_heat_ctrl'], entities['heat_pump'], ('mdot_2_return', 'mdot_evap_in'))
     world.connect(entities['dh_network'], entities['heat_pump'], ('T_evap_in', 'T_evap_in'),
-        time_shifted=True, initial_data={'T_evap_in': 40})
+        time_shifted=True, initial_data=initial_data('dh_network', 'T_evap_in', 40))
     world.connect(entities['flex_heat_ctrl'], entities['heat_pump'], ('Q_HP_set', 'Q_set'))
     world.connect(entities['heat_pump'], entities['dh_network'], ('Qdot_evap', 'Qdot_evap'))
     world.connect(entities['storage_tank'], entities['heat_pump'], ('T_cold', 'T_cond_in'),
-        time_shifted=True, initial_data={'T_cold': INIT_STORAGE_TANK_TEMP})
-    world.connect(entities['heat_pump'], entities[grid_id('Heat Pump',0)], ('P_effective_mw', 'p_mw'),
-        time_shifted=True, initial_data={'P_effective_mw': 0.})
+        time_shifted=True, initial_data=initial_data('storage_tank', 'T_cold', INIT_STORAGE_TANK_TEMP))
 
     # Flex heat control.
     world.connect(entities['flex_heat_ctrl'], entities['heat_pump'], ('mdot_HP_out', 'mdot_cond_in'))
     world.connect(entities['heat_pump'], entities['flex_heat_ctrl'], ('T_cond_out_target', 'T_hp_cond_out'),
-        time_shifted=True, initial_data={'T_cond_out_target': HP_TEMP_COND_OUT_TARGET})
+        time_shifted=True, initial_data=initial_data('heat_pump', 'T_cond_out_target', HP_TEMP_COND_OUT_TARGET))
     world.connect(entities['heat_pump'], entities['flex_heat_ctrl'], ('T_cond_in', 'T_hp_cond_in'),
-        time_shifted=True, initial_data={'T_cond_in': INIT_STORAGE_TANK_TEMP})
+        time_shifted=True, initial_data=initial_data('heat_pump', 'T_cond_in', INIT_STORAGE_TANK_TEMP))
     world.connect(entities['heat_pump'], entities['flex_heat_ctrl'], ('T_evap_in', 'T_hp_evap_in'),
-        time_shifted=True, initial_data={'T_evap_in': INIT_HEX_RETURN_TEMP})
+        time_shifted=True, initial_data=initial_data('heat_pump', 'T_evap_in', INIT_HEX_RETURN_TEMP))
 
     # Storage tank inlet.
     world.connect(entities['heat_pump'], entities['storage_tank'], ('mdot_cond_out', 'mdot_ch_in'))
     world.connect(entities['heat_pump'], entities['storage_tank'], ('T_cond_out', 'T_ch_in'))
     world.connect(entities['flex_heat_ctrl'], entities['storage_tank'], ('mdot_3_supply', 'mdot_dis_out'),
-        time_shifted=True, initial_data={'mdot_3_supply': 0})
+        time_shifted=True, initial_data=initial_data('flex_heat_ctrl', 'mdot_3_supply', 0))
     world.connect(entities['dh_network'], entities['storage_tank'], ('T_return_tank', 'T_dis_in'))
 
     # Storage tank outlet.
     world.connect(entities['storage_tank'], entities['dh_network'], ('T_hot', 'T_tank_forward'),
-        time_shifted=True, initial_data={'T_hot': INIT_STORAGE_TANK_TEMP})
+        time_shifted=True, initial_data=initial_data('storage_tank', 'T_hot', INIT_STORAGE_TANK_TEMP))
     world.connect(entities['storage_tank'], entities['flex_heat_ctrl'], ('T_hot', 'T_tank_hot'),
-        time_shifted=True, initial_data={'T_hot': INIT_STORAGE_TANK_TEMP})
+        time_shifted=True, initial_data=initial_data('storage_tank', 'T_hot', INIT_STORAGE_TANK_TEMP))
 
 
-def connectDataCollector(world, entities):
+def connectDataCollector(world, entities, monitor = 'sc_monitor'):
     '''
-    Configure and connect the data collector.
+    Configure and connect the data collector (or the KPI collector).
     '''
     collector_connections = {}
 
@@ -425,7 +584,116 @@ def connectDataCollector(world, entities):
 
     for ent, outputnames in collector_connections.items():
         for outputname in outputnames:
-            world.connect(entities[ent], entities['sc_monitor'], outputname)
+            world.connect(entities[ent], entities[monitor], outputname)
+
+
+def remoteSimConfig(remote_sims):
+    '''
+    MOSAIK simulator configuration with the given simulators started in separate processes.
+    The remote simulators connect to MOSAIK via its socket protocol (see simulators/remote_sim.py).
+    '''
+    import pathlib
+    import sys
+
+    here = pathlib.Path(__file__).resolve().parent
+    sim_config = dict(SIM_CONFIG)
+
+    for name in remote_sims:
+        _, simulator = SIM_CONFIG[name]['python'].split(':')
+        sim_config[name] = {
+            'cmd': '"{}" -m simulators.remote_sim {} %(addr)s'.format(sys.executable, simulator),
+            'cwd': str(here),
+        }
+
+    return sim_config
+
+
+def takeSnapshot(simulators):
+    '''
+    Retrieve the internal state of all simulators with an internal state.
+    '''
+    return {name: simulators[name].get_state() for name in WARM_START_SIMULATORS}
+
+
+def restoreSnapshot(simulators, snapshot, time_offset):
+    '''
+    Restore the internal state of all simulators from a snapshot.
+    '''
+    for name, state in snapshot.items():
+        simulators[name].set_state(state, time_offset)
+
+
+def runSpinUp(
+        step_size, profiles, voltage_control_enabled = True,
+        control_step_size = None, network_step_size = None, dh_surrogate_file = None, dh_solver_params = None
+    ):
+    '''
+    Simulate the spin-up period (without data collection) and return the final state of all simulators.
+    '''
+    import mosaik
+
+    world = mosaik.World(SIM_CONFIG)
+    simulators = initializeSimulators(
+        world, step_size, None,
+        control_step_size = control_step_size, network_step_size = network_step_size
+    )
+    entities = instantiateEntities(
+        simulators, profiles, voltage_control_enabled,
+        step_size = step_size, control_step_size = control_step_size,
+        dh_surrogate_file = dh_surrogate_file, dh_solver_params = dh_solver_params
+    )
+    connectEntities(world, entities)
+
+    world.run(until = SPIN_UP_PERIOD)
+
+    # All simulators run in-process, hence their state is still accessible after the simulation has finished.
+    return takeSnapshot(simulators)
+
+
+def loadInitialState(
+        step_size, profiles, voltage_control_enabled = True, library_path = INITIAL_STATE_LIBRARY,
+        control_step_size = None, network_step_size = None, dh_surrogate_file = None, dh_solver_params = None
+    ):
+    '''
+    Load the state at the end of the spin-up period from the library of initial states.
+    The spin-up is only simulated in case no snapshot is available for the current configuration.
+    '''
+    import pathlib
+    from initial_state_library import InitialStateLibrary
+
+    here = pathlib.Path(__file__).resolve().parent
+    library = InitialStateLibrary(pathlib.Path(here, library_path))
+
+    config = {
+        'start_time': START_TIME,
+        'step_size': step_size,
+        'control_step_size': control_step_size or step_size,
+        'network_step_size': network_step_size or step_size,
+        'dh_surrogate': dh_surrogate_file is not None,
+        'dh_solver': dh_solver_params,
+        'spin_up_period': SPIN_UP_PERIOD,
+        'voltage_control_enabled': voltage_control_enabled,
+    }
+    files = [
+        pathlib.Path(here, HEAT_DEMAND_LOAD_PROFILES),
+        pathlib.Path(here, POWER_DEMAND_LOAD_PROFILES),
+        pathlib.Path(here, PV_GENERATION_PROFILES),
+        pathlib.Path(here, 'resources/power/power_grid_model.json'),
+        pathlib.Path(__file__).resolve(),
+    ]
+    if dh_surrogate_file is not None:
+        files.append(pathlib.Path(dh_surrogate_file))
+    key = library.config_hash(config, files, [pathlib.Path(here, 'simulators')])
+
+    if key not in library:
+        print('NO INITIAL STATE AVAILABLE, SIMULATING SPIN-UP PERIOD ({} s)'.format(SPIN_UP_PERIOD))
+        library.save(key, runSpinUp(
+            step_size, profiles, voltage_control_enabled,
+            control_step_size, network_step_size, dh_surrogate_file, dh_solver_params
+        ))
+
+    print('INITIAL STATE:', key)
+    return library.load(key)
 
 
 if __name__ == '__main__':
@@ -439,37 +707,131 @@ if __name__ == '__main__':
     parser.add_argument('--outfile', default = 'benchmark_results.h5', help = 'results file name')
     parser.add_argument('--voltage-control-disabled', action = 'store_true', help = 'disable voltage control')
     parser.add_argument('--step-size', type = int, default = STEP_SIZE, help = 'simulation step size in seconds')
+    parser.add_argument('--control-step-size', type = int, default = None, help = 'step size of controllers in seconds (default: same as step size)')
+    parser.add_argument('--network-step-size', type = int, default = None, help = 'step size of DH and electrical network models in seconds (default: same as step size)')
     parser.add_argument('--end', type = int, default = END, help = 'simulation period in seconds')
+    parser.add_argument('--warm-start', action = 'store_true', help = 'start from the state at the end of the first simulated day (simulated once per configuration)')
+    parser.add_argument('--state-library', default = INITIAL_STATE_LIBRARY, help = 'directory of the library of initial states')
+    parser.add_argument('--dh-surrogate', default = None, help = 'simulate the DH network with the surrogate model from this file')
+    parser.add_argument('--dh-cache-size', type = int, default = 0, help = 'number of cached DH network pipeflow results (default: caching disabled)')
+    parser.add_argument('--dh-cache-tol', type = float, nargs = 3, default = [0.01, 1, 0.1], metavar = ('MDOT', 'QDOT', 'T'),
+        help = 'quantization of DH network inputs for cache lookup: mass flows [kg/s], heat consumption [kW], temperature [degC]')
+    parser.add_argument('--dh-hydraulic-reuse-tol', type = float, default = 0,
+        help = 'max. change of DH mass flow setpoints [kg/s] for reusing the hydraulic results of the previous step (default: only unchanged setpoints)')
+    parser.add_argument('--el-sensitivity', action = 'store_true',
+        help = 'estimate the electrical network results from power flow sensitivities, full power flow only for larger changes')
+    parser.add_argument('--el-sensitivity-tol', type = float, nargs = 2, default = [0.01, 1e-3], metavar = ('INJECTION', 'VM'),
+        help = 'max. change of injections [MW, MVAr] and max. predicted voltage error [p.u.] before a full power flow')
+    parser.add_argument('--event-driven', action = 'store_true', help = 'skip steps of time series players and voltage controller without changes')
+    parser.add_argument('--kpi-file', default = None, help = 'aggregate KPIs online and save them to this JSON file')
+    parser.add_argument('--kpi-only', action = 'store_true', help = 'only save KPIs, not the full results (requires --kpi-file)')
+    parser.add_argument('--remote-sims', nargs = '*', default = None, choices = sorted(SIM_CONFIG), metavar = 'SIM',
+        help = 'run these simulators in separate processes (default without names: {})'.format(', '.join(REMOTE_SIMULATORS)))
     args = parser.parse_args()
 
+    if args.warm_start and args.end <= SPIN_UP_PERIOD:
+        parser.error('simulation period must be longer than the spin-up period ({} s) for a warm start'.format(SPIN_UP_PERIOD))
+
+    for rate_step_size in (args.control_step_size, args.network_step_size):
+        if rate_step_size is not None and rate_step_size % args.step_size != 0:
+            parser.error('control and network step sizes must be multiples of the step size')
+
+        if args.warm_start and rate_step_size is not None and SPIN_UP_PERIOD % rate_step_size != 0:
+            parser.error('spin-up period ({} s) must be a multiple of all step sizes for a warm start'.format(SPIN_UP_PERIOD))
+
+    if args.dh_cache_size < 0 or min(args.dh_cache_tol) < 0 or args.dh_hydraulic_reuse_tol < 0:
+        parser.error('DH network cache size and tolerances must not be negative')
+
+    if min(args.el_sensitivity_tol) <= 0:
+        parser.error('tolerances of the sensitivity-based power flow must be positive')
+
+    if args.kpi_only and args.kpi_file is None:
+        parser.error('option --kpi-only requires option --kpi-file')
+
     voltage_control_enabled = not args.voltage_control_disabled
-    outfile_name = args.outfile
+    outfile_name = None if args.kpi_only else args.outfile
+    kpi_file = args.kpi_file
+    event_driven = args.event_driven
     step_size = args.step_size
+    control_step_size = args.control_step_size
+    network_step_size = args.network_step_size
     end = args.end
+
+    if args.remote_sims is None:
+        sim_config = SIM_CONFIG
+    else:
+        sim_config = remoteSimConfig(args.remote_sims or REMOTE_SIMULATORS)
+
+    dh_solver_params = dict(
+        hydraulic_reuse_tol = args.dh_hydraulic_reuse_tol,
+    )
+
+    if args.dh_cache_size > 0:
+        dh_solver_params.update(
+            cache_enabled = True,
+            cache_size = args.dh_cache_size,
+            cache_tol_mdot = args.dh_cache_tol[0],
+            cache_tol_Qdot = args.dh_cache_tol[1],
+            cache_tol_T = args.dh_cache_tol[2],
+        )
     
+    el_solver_params = None
+    if args.el_sensitivity:
+        el_solver_params = dict(
+            mode = 'pf_sensitivity',
+            sensitivity_injection_tol = args.el_sensitivity_tol[0],
+            sensitivity_error_tol = args.el_sensitivity_tol[1],
+        )
+
     sim_start_time = time()
     print("CO-SIMULATION STARTED AT:", ctime(sim_start_time))
 
-    # Start MOSAIK orchestrator.
-    world = mosaik.World(SIM_CONFIG)
-
-    # Initialize and start all simulators.
-    simulators = initializeSimulators(world, step_size, outfile_name)
-
     # Load profiles for demand (heat, power) and PV generation.
     profiles = loadProfiles()
 
+    # Retrieve the initial state for a warm start.
+    if args.warm_start:
+        snapshot = loadInitialState(
+            step_size, profiles, voltage_control_enabled, args.state_library,
+            control_step_size, network_step_size, args.dh_surrogate, dh_solver_params
+        )
+        time_offset = SPIN_UP_PERIOD
+    else:
+        snapshot = None
+        time_offset = 0
+
+    # Start MOSAIK orchestrator (the spin-up for a warm start always runs in-process).
+    world = mosaik.World(sim_config)
+
+    # Initialize and start all simulators.
+    simulators = initializeSimulators(
+        world, step_size, outfile_name, time_offset, kpi_file, event_driven,
+        control_step_size, network_step_size, el_solver_params
+    )
+
     # Create instances of simulators.
-    entities = instantiateEntities(simulators, profiles, voltage_control_enabled)
+    entities = instantiateEntities(
+        simulators, profiles, voltage_control_enabled, time_offset,
+        step_size, control_step_size, args.dh_surrogate, dh_solver_params
+    )
+
+    # Restore the internal state of the simulators.
+    if snapshot is not None:
+        restoreSnapshot(simulators, snapshot, time_offset)
 
     # Add connections between the simulator entities.
-    connectEntities(world, entities)
+    connectEntities(world, entities, snapshot)
 
     # Configure and connect the data collector.
-    connectDataCollector(world, entities)
+    if 'sc_monitor' in entities:
+        connectDataCollector(world, entities)
+
+    # Configure and connect the KPI collector.
+    if 'kpi_monitor' in entities:
+        connectDataCollector(world, entities, 'kpi_monitor')
 
     # Run the simulation.
-    world.run(until = end)
+    world.run(until = end - time_offset)
 
     sim_elapsed_time = str(timedelta(seconds = time() - sim_start_time))
     print('TOTAL ELAPSED CO-SIMULATION TIME:', sim_elapsed_time)
@@ -0,0 +1,106 @@
+# Copyright (c) 2021 by ERIGrid 2.0. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be found in the LICENSE file.
+'''
+Accuracy/speed report for multi-rate simulations of the ERIGrid 2.0 multi-energy benchmark.
+
+The benchmark is simulated once with a single step size (reference) and once with coarser step sizes
+for the controllers and the network models (DH network pipeflow, electrical network power flow).
+The report compares the elapsed times and the deviations of the results from the reference.
+'''
+
+import pathlib
+import subprocess
+import sys
+from time import time
+
+import pandas as pd
+
+from benchmark_multi_energy_analysis import ResultStore, PLOT_DICT, START_TIME, DROP_FIRST_DAY_DATA
+
+# Default step sizes of the multi-rate simulation (in seconds).
+STEP_SIZE = 60
+CONTROL_STEP_SIZE = 60
+NETWORK_STEP_SIZE = 5 * 60
+
+# Results compared in the report (all plotted results and the heat pump power consumption).
+REPORT_VARIABLES = sorted(
+    {v for (ylabel, variables) in PLOT_DICT.values() for v in variables} |
+    {'heatpump_0.P_effective', 'DHNetwork_0.T_supply_cons1', 'DHNetwork_0.T_supply_cons2'}
+)
+
+
+def run_benchmark(
+    outfile, options
+):
+    here = pathlib.Path(__file__).resolve().parent
+    cmd = [sys.executable, 'benchmark_multi_energy_sim.py', '--outfile', outfile] + options
+
+    start_time = time()
+    subprocess.run(cmd, cwd = here, check = True)
+    return time() - start_time
+
+
+def compare_results(
+    reference_file, multi_rate_file, variables
+):
+    report = {}
+
+    with ResultStore(reference_file, START_TIME, DROP_FIRST_DAY_DATA) as reference, \
+            ResultStore(multi_rate_file, START_TIME, DROP_FIRST_DAY_DATA) as multi_rate:
+        for v in variables:
+            if v not in reference or v not in multi_rate:
+                continue
+
+            (data_reference, data_multi_rate) = reference[v].astype(float).align(
+                multi_rate[v].astype(float), join = 'inner')
+            error = data_multi_rate - data_reference
+
+            report[v] = {
+                'rmse': (error**2).mean()**.5,
+                'max abs error': error.abs().max(),
+                'mean reference': data_reference.mean(),
+            }
+
+    return pd.DataFrame.from_dict(report, orient = 'index')
+
+
+if __name__ == '__main__':
+    import argparse
+
+    # Parse command line options.
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--step-size', type = int, default = STEP_SIZE, help = 'step size of physical models in seconds')
+    parser.add_argument('--control-step-size', type = int, default = CONTROL_STEP_SIZE, help = 'step size of controllers in seconds')
+    parser.add_argument('--network-step-size', type = int, default = NETWORK_STEP_SIZE, help = 'step size of DH and electrical network models in seconds')
+    parser.add_argument('--end', type = int, default = None, help = 'simulation period in seconds')
+    parser.add_argument('--warm-start', action = 'store_true', help = 'start from the state at the end of the first simulated day')
+    parser.add_argument('--report-file', default = 'multi_rate_report.csv', help = 'report file name')
+    args = parser.parse_args()
+
+    common_options = ['--step-size', str(args.step_size)]
+    if args.end is not None:
+        common_options += ['--end', str(args.end)]
+    if args.warm_start:
+        common_options += ['--warm-start']
+
+    multi_rate_options = common_options + [
+        '--control-step-size', str(args.control_step_size),
+        '--network-step-size', str(args.network_step_size)
+    ]
+
+    # Run single-rate (reference) and multi-rate simulations.
+    elapsed_single_rate = run_benchmark('benchmark_results_single_rate.h5', common_options)
+    elapsed_multi_rate = run_benchmark('benchmark_results_multi_rate.h5', multi_rate_options)
+
+    # Compare results.
+    report = compare_results(
+        'benchmark_results_single_rate.h5', 'benchmark_results_multi_rate.h5', REPORT_VARIABLES)
+    report.to_csv(args.report_file)
+
+    print('step sizes (physical / control / network): {} s / {} s / {} s'.format(
+        args.step_size, args.control_step_size, args.network_step_size))
+    print('elapsed time single-rate: {:.1f} s'.format(elapsed_single_rate))
+    print('elapsed time multi-rate: {:.1f} s (speed-up: {:.2f})'.format(
+        elapsed_multi_rate, elapsed_single_rate / elapsed_multi_rate))
+    print(report.to_string(float_format = '{:.4f}'.format))
+    print('Saved report to file: {}'.format(args.report_file))
@@ -0,0 +1,134 @@
+# Copyright (c) 2021 by ERIGrid 2.0. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be found in the LICENSE file.
+'''
+Speed report for the numba-compiled kernels of the component models.
+
+Every model is stepped with random inputs, once with its kernel run as plain Python function (use_numba disabled)
+and once with its compiled kernel (after a first call for the compilation). The report lists the time per step of
+both, the speed-up and the maximum deviation of the outputs. In case numba is not installed, the kernel is run as
+plain Python function in both cases.
+'''
+
+import math
+import random
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+from simulators.util import NUMBA_AVAILABLE, select_kernel
+from simulators.heat_consumer.simulator import HEXConsumer
+from simulators.heat_pump.simulator import ConstantTcondHP
+from simulators.water_storage_tank.simulator import WaterStorageTank
+from simulators.voltage_control.simulator import VoltageController
+from simulators.dh_network.simulator import pipe_outlet_temperature_kernel, mixing_temperature_kernel
+
+N_STEPS = 100000
+
+
+def random_inputs(n_steps, seed = 0):
+    '''
+    Random inputs of all models (within their operating range).
+    '''
+    rng = random.Random(seed)
+    return [dict(
+        hex_consumer = dict(P_heat = rng.uniform(0, 600), T_supply = rng.uniform(60, 80)),
+        heat_pump = dict(
+            T_evap_in = rng.uniform(30, 50), T_cond_in = rng.uniform(40, 60),
+            mdot_cond_in = rng.uniform(0, 3), mdot_evap_in = rng.uniform(1, 3)
+        ),
+        storage_tank = dict(
+            mdot_ch_in = rng.choice([0, rng.uniform(0, 2)]), mdot_dis_out = rng.choice([0, -rng.uniform(0, 2)]),
+            T_ch_in = rng.uniform(60, 80), T_dis_in = rng.uniform(30, 50)
+        ),
+        voltage_ctrl = dict(vmeas_pu = rng.uniform(0.85, 1.15)),
+        dh_pipe = dict(T_in = rng.uniform(330, 350), mdot = rng.uniform(0.5, 8)),
+    ) for _ in range(n_steps)]
+
+
+def time_model(model, name, inputs, outputs, implementation, with_time = False):
+    '''
+    Step a model with the given inputs.
+    :param implementation: 'python' (kernel as plain Python function) or 'numba' (compiled kernel)
+    :param with_time: pass the step number as time to the step function
+    :return: tuple (elapsed time per step in microseconds, array of outputs)
+    '''
+    model.use_numba = (implementation == 'numba')
+    step = model.step_single
+    results = np.empty((len(inputs), len(outputs)))
+
+    start_time = perf_counter()
+    for i, step_inputs in enumerate(inputs):
+        for attr, value in step_inputs[name].items():
+            setattr(model, attr, value)
+        if with_time:
+            step(i)
+        else:
+            step()
+        results[i] = [getattr(model, attr) for attr in outputs]
+
+    return 1e6 * (perf_counter() - start_time) / len(inputs), results
+
+
+class DHPipeKernels:
+    '''
+    Temperature drop along a pipe and mixing at the junction of two pipes (kernels of the DH network model).
+    '''
+
+    def __init__(self):
+        self.T_in = 340.
+        self.mdot = 4.
+        self.T_out = 340.
+        self.T_mix = 340.
+        self.use_numba = True
+
+    def step_single(self):
+        self.T_out = select_kernel(pipe_outlet_temperature_kernel, self.use_numba)(
+            self.T_in, 281.15, 0.4 * math.pi * 0.1, 500., 4186., self.mdot)
+        self.T_mix = select_kernel(mixing_temperature_kernel, self.use_numba)(
+            np.array([self.mdot, 1.]), np.array([self.T_out, 320.]))
+
+
+# Models with their outputs and whether their step requires the time.
+MODELS = {
+    'hex_consumer': (HEXConsumer, ['mdot_hex_in', 'T_return'], False),
+    'heat_pump': (ConstantTcondHP, ['P_effective', 'T_cond_out', 'T_evap_out'], False),
+    'storage_tank': (WaterStorageTank, ['T_hot', 'T_cold', 'T_out'], False),
+    'voltage_ctrl': (VoltageController, ['hp_p_el_mw_setpoint'], True),
+    'dh_pipe': (DHPipeKernels, ['T_out', 'T_mix'], False),
+}
+
+
+if __name__ == '__main__':
+    import argparse
+
+    # Parse command line options.
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--steps', type = int, default = N_STEPS, help = 'number of steps per model')
+    parser.add_argument('--report-file', default = 'numba_kernels_report.csv', help = 'report file name')
+    args = parser.parse_args()
+
+    inputs = random_inputs(args.steps)
+
+    rows = []
+    for name, (model_class, outputs, with_time) in MODELS.items():
+        elapsed_python, results_python = time_model(model_class(), name, inputs, outputs, 'python', with_time)
+
+        # Compile the kernel (first call), then time it.
+        time_model(model_class(), name, inputs[:1], outputs, 'numba', with_time)
+        elapsed_kernel, results_kernel = time_model(model_class(), name, inputs, outputs, 'numba', with_time)
+
+        rows.append({
+            'model': name,
+            'python [us/step]': elapsed_python,
+            'kernel [us/step]': elapsed_kernel,
+            'speed-up': elapsed_python / elapsed_kernel,
+            'max abs deviation': np.nanmax(np.abs(results_kernel - results_python)),
+        })
+
+    report = pd.DataFrame(rows).set_index('model')
+    report.to_csv(args.report_file)
+
+    print('numba available: {}'.format(NUMBA_AVAILABLE))
+    print(report.to_string(float_format = '{:.4g}'.format))
+    print('Saved report to file: {}'.format(args.report_file))
@@ -0,0 +1,52 @@
+# Copyright (c) 2021 by ERIGrid 2.0. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be found in the LICENSE file.
+'''
+Speed report for running simulators of the ERIGrid 2.0 multi-energy benchmark in separate processes.
+
+The benchmark is simulated once with all simulators in-process (reference) and once with the selected
+simulators (by default the DH and electrical network models) in separate processes, which step concurrently.
+The report compares the elapsed times and checks that the results do not deviate from the reference.
+'''
+
+from benchmark_multi_rate_report import run_benchmark, compare_results, REPORT_VARIABLES
+from benchmark_multi_energy_sim import REMOTE_SIMULATORS, SIM_CONFIG
+
+STEP_SIZE = 60
+
+
+if __name__ == '__main__':
+    import argparse
+
+    # Parse command line options.
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--remote-sims', nargs = '+', default = REMOTE_SIMULATORS, choices = sorted(SIM_CONFIG), metavar = 'SIM',
+        help = 'simulators running in separate processes (default: {})'.format(', '.join(REMOTE_SIMULATORS)))
+    parser.add_argument('--step-size', type = int, default = STEP_SIZE, help = 'simulation step size in seconds')
+    parser.add_argument('--end', type = int, default = None, help = 'simulation period in seconds')
+    parser.add_argument('--warm-start', action = 'store_true', help = 'start from the state at the end of the first simulated day')
+    parser.add_argument('--report-file', default = 'remote_report.csv', help = 'report file name')
+    args = parser.parse_args()
+
+    common_options = ['--step-size', str(args.step_size)]
+    if args.end is not None:
+        common_options += ['--end', str(args.end)]
+    if args.warm_start:
+        common_options += ['--warm-start']
+
+    remote_options = common_options + ['--remote-sims'] + args.remote_sims
+
+    # Run in-process (reference) and remote simulations.
+    elapsed_in_process = run_benchmark('benchmark_results_in_process.h5', common_options)
+    elapsed_remote = run_benchmark('benchmark_results_remote.h5', remote_options)
+
+    # Compare results.
+    report = compare_results(
+        'benchmark_results_in_process.h5', 'benchmark_results_remote.h5', REPORT_VARIABLES)
+    report.to_csv(args.report_file)
+
+    print('remote simulators: {}'.format(', '.join(args.remote_sims)))
+    print('elapsed time in-process: {:.1f} s'.format(elapsed_in_process))
+    print('elapsed time remote: {:.1f} s (speed-up: {:.2f})'.format(
+        elapsed_remote, elapsed_in_process / elapsed_remote))
+    print(report.to_string(float_format = '{:.4f}'.format))
+    print('Saved report to file: {}'.format(args.report_file))
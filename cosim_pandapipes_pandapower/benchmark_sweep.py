@@ -0,0 +1,230 @@
+# Copyright (c) 2021 by ERIGrid 2.0. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be found in the LICENSE file.
+'''
+Parameter sweep of the ERIGrid 2.0 multi-energy benchmark on a pool of pre-forked worker processes.
+
+Starting a scenario in a fresh process is expensive: the simulators import pandapower and pandapipes, the
+electrical grid model is parsed, the profiles are loaded and the DH network is created. Instead, the parent
+process does all of this once (see preload) before the worker pool is created:
+ * the modules of all simulators (and their dependencies) are imported,
+ * the profiles are loaded,
+ * the electrical grid model is parsed (see simulators.el_network.simulator.load_grid),
+ * the DH network templates of all scenarios are created (see simulators.dh_network.simulator.NET_TEMPLATES).
+With start method 'fork', the workers are forked from the parent and share the preloaded modules and data
+copy-on-write (objects of the parent are moved to the permanent generation of the garbage collector before
+forking, so that they are not touched and copied by collections in the workers). Hence, the startup cost of a
+scenario is reduced to instantiating and connecting the entities. With other start methods (e.g., on Windows),
+every worker runs the preload once at its start.
+
+Scenarios are read from a JSON file with a list of scenarios (see SCENARIO_DEFAULTS for the available keys).
+KPIs of every scenario are stored in '<output dir>/<name>_kpi.json', full results optionally in
+'<output dir>/<name>.h5'. The report lists the startup time (until the simulation starts) and the simulation
+time of every scenario.
+'''
+
+import json
+import multiprocessing
+import os
+from time import perf_counter
+
+import pandas as pd
+
+from benchmark_multi_energy_sim import (
+    STEP_SIZE, END, SIM_CONFIG, loadProfiles,
+    initializeSimulators, instantiateEntities, connectEntities, connectDataCollector
+)
+
+# Electrical grid model (same file as in instantiateEntities).
+GRID_FILE = 'resources/power/power_grid_model.json'
+
+SCENARIO_DEFAULTS = {
+    'name': None,  # Scenario name (default: scenario_<index>)
+    'voltage_control_enabled': True,
+    'step_size': STEP_SIZE,
+    'control_step_size': None,
+    'network_step_size': None,
+    'end': END,
+    'event_driven': False,
+    'dh_solver_params': None,  # Parameters of the DH network model (see DHNetwork)
+    'el_solver_params': None,  # Parameters of the electrical network model (see ElectricNetworkSimulator)
+    'save_results': False,  # Store the full results in addition to the KPIs
+}
+
+DEFAULT_SCENARIOS = [
+    {'name': 'ctrl_enabled', 'voltage_control_enabled': True},
+    {'name': 'ctrl_disabled', 'voltage_control_enabled': False},
+]
+
+# Data loaded by the parent process (shared with the workers).
+PRELOADED = {}
+
+
+def load_scenarios(file_name = None):
+    '''
+    Load scenarios from a JSON file (list of dicts, see SCENARIO_DEFAULTS) and fill in the defaults.
+    '''
+    if file_name is None:
+        scenarios = DEFAULT_SCENARIOS
+    else:
+        with open(file_name) as f:
+            scenarios = json.load(f)
+
+    result = []
+    for i, scenario in enumerate(scenarios):
+        unknown = set(scenario) - set(SCENARIO_DEFAULTS)
+        if unknown:
+            raise ValueError('unknown scenario parameters: {}'.format(', '.join(sorted(unknown))))
+
+        scenario = dict(SCENARIO_DEFAULTS, **scenario)
+        if scenario['name'] is None:
+            scenario['name'] = 'scenario_{}'.format(i)
+        result.append(scenario)
+
+    names = [scenario['name'] for scenario in result]
+    if len(set(names)) != len(names):
+        raise ValueError('scenario names must be unique')
+
+    return result
+
+
+def preload(scenarios):
+    '''
+    Import the simulators, load the profiles, parse the electrical grid model and create the DH network
+    templates of all scenarios.
+    '''
+    import simulators
+    from simulators.el_network.simulator import load_grid
+    from simulators.dh_network.simulator import DHNetwork
+
+    # Import MOSAIK and all simulators (incl. their dependencies).
+    import mosaik
+    for name in simulators.SIMULATORS:
+        simulators.load_simulator(name)
+
+    PRELOADED['profiles'] = loadProfiles()
+
+    load_grid(GRID_FILE)
+
+    for scenario in scenarios:
+        DHNetwork(**(scenario['dh_solver_params'] or {}))
+
+
+def run_scenario(scenario, output_dir):
+    '''
+    Simulate a scenario (in a worker process).
+    :return: dict with scenario name, process ID, startup time and simulation time
+    '''
+    import mosaik
+
+    start_time = perf_counter()
+
+    name = scenario['name']
+    step_size = scenario['step_size']
+    control_step_size = scenario['control_step_size']
+    outfile_name = os.path.join(output_dir, name + '.h5') if scenario['save_results'] else None
+    kpi_file = os.path.join(output_dir, name + '_kpi.json')
+
+    # Concurrent worlds in different workers must not listen on the same port (port 0: chosen by the OS).
+    world = mosaik.World(SIM_CONFIG, mosaik_config = {'addr': ('127.0.0.1', 0)})
+
+    simulators = initializeSimulators(
+        world, step_size, outfile_name, 0, kpi_file, scenario['event_driven'],
+        control_step_size, scenario['network_step_size'], scenario['el_solver_params']
+    )
+    entities = instantiateEntities(
+        simulators, PRELOADED['profiles'], scenario['voltage_control_enabled'], 0,
+        step_size, control_step_size, None, scenario['dh_solver_params']
+    )
+    connectEntities(world, entities)
+
+    if 'sc_monitor' in entities:
+        connectDataCollector(world, entities)
+    connectDataCollector(world, entities, 'kpi_monitor')
+
+    startup_time = perf_counter() - start_time
+    world.run(until = scenario['end'])
+
+    return {
+        'scenario': name,
+        'pid': os.getpid(),
+        'startup [s]': startup_time,
+        'simulation [s]': perf_counter() - start_time - startup_time,
+        'kpi_file': kpi_file,
+    }
+
+
+def _run_scenario(args):
+    return run_scenario(*args)
+
+
+def run_sweep(scenarios, output_dir, workers = None, start_method = None, tasks_per_worker = None):
+    '''
+    Run all scenarios on a pool of worker processes, which are forked from this process after the preload.
+    :param start_method: start method of the workers (default: 'fork' where available)
+    :param tasks_per_worker: number of scenarios after which a worker is replaced by a freshly forked one
+        (default: workers are reused for all scenarios)
+    :return: tuple (preload time in seconds, data frame with one row per scenario)
+    '''
+    import gc
+
+    if start_method is None:
+        start_method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+    context = multiprocessing.get_context(start_method)
+
+    os.makedirs(output_dir, exist_ok = True)
+
+    start_time = perf_counter()
+    preload(scenarios)
+    preload_time = perf_counter() - start_time
+
+    if start_method == 'fork':
+        # Preloaded objects are not visited by the garbage collector (which would copy their memory pages).
+        gc.collect()
+        if hasattr(gc, 'freeze'):
+            gc.freeze()
+        initializer, initargs = None, ()
+    else:
+        initializer, initargs = preload, (scenarios,)
+
+    with context.Pool(workers, initializer, initargs, maxtasksperchild = tasks_per_worker) as pool:
+        rows = list(pool.imap_unordered(_run_scenario, [(scenario, output_dir) for scenario in scenarios]))
+
+    return preload_time, pd.DataFrame(rows).set_index('scenario').loc[[scenario['name'] for scenario in scenarios]]
+
+
+if __name__ == '__main__':
+    import argparse
+    from time import time, ctime
+    from datetime import timedelta
+
+    # Parse command line options.
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scenarios', default = None, help = 'JSON file with a list of scenarios (default: voltage control enabled and disabled)')
+    parser.add_argument('--workers', type = int, default = None, help = 'number of worker processes (default: number of CPUs)')
+    parser.add_argument('--start-method', default = None, choices = multiprocessing.get_all_start_methods(),
+        help = "start method of the worker processes (default: 'fork' where available)")
+    parser.add_argument('--tasks-per-worker', type = int, default = None, help = 'replace workers by freshly forked ones after this number of scenarios')
+    parser.add_argument('--output-dir', default = 'sweep_results', help = 'directory of the KPI and result files')
+    parser.add_argument('--report-file', default = 'sweep_report.csv', help = 'report file name')
+    args = parser.parse_args()
+
+    if args.workers is not None and args.workers < 1:
+        parser.error('number of workers must be positive')
+
+    if args.tasks_per_worker is not None and args.tasks_per_worker < 1:
+        parser.error('number of tasks per worker must be positive')
+
+    scenarios = load_scenarios(args.scenarios)
+
+    sweep_start_time = time()
+    print("SWEEP STARTED AT:", ctime(sweep_start_time))
+
+    preload_time, report = run_sweep(scenarios, args.output_dir, args.workers, args.start_method, args.tasks_per_worker)
+    report.to_csv(args.report_file)
+
+    print('PRELOAD TIME: {:.3g} s'.format(preload_time))
+    print(report.to_string(float_format = '{:.3g}'.format))
+    print('Saved report to file: {}'.format(args.report_file))
+
+    sweep_elapsed_time = str(timedelta(seconds = time() - sweep_start_time))
+    print('TOTAL ELAPSED SWEEP TIME ({} SCENARIOS):'.format(len(scenarios)), sweep_elapsed_time)
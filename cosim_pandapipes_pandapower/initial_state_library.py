@@ -0,0 +1,63 @@
+# Copyright (c) 2021 by ERIGrid 2.0. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be found in the LICENSE file.
+'''
+Library of initial states (snapshots) for warm-starting the multi-energy benchmark.
+
+Each snapshot is stored under a hash of the configuration that produced it (simulation
+parameters, input files and model source code). Hence, a snapshot is only reused in case
+the same spin-up would be simulated again.
+'''
+
+import hashlib
+import json
+import pathlib
+import pickle
+
+from simulators.util import atomic_write
+
+
+class InitialStateLibrary:
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+
+    def __contains__(self, key):
+        return self._file(key).is_file()
+
+    def _file(self, key):
+        return pathlib.Path(self.path, '{}.pickle'.format(key))
+
+    @staticmethod
+    def config_hash(config, files = (), packages = ()):
+        '''
+        Calculate the hash of a configuration.
+        :param config: dict of JSON-serializable simulation parameters
+        :param files: list of input files (e.g., profiles, scenario scripts)
+        :param packages: list of directories containing model source code (all *.py files are included)
+        :return: hex digest
+        '''
+        h = hashlib.sha256()
+        h.update(json.dumps(config, sort_keys = True, default = str).encode())
+
+        paths = [pathlib.Path(f) for f in files]
+        for p in packages:
+            paths.extend(sorted(pathlib.Path(p).rglob('*.py')))
+
+        for p in paths:
+            h.update(p.name.encode())
+            h.update(p.read_bytes())
+
+        return h.hexdigest()
+
+    def save(self, key, snapshot):
+        self.path.mkdir(parents = True, exist_ok = True)
+
+        with atomic_write(self._file(key), 'wb') as f:
+            pickle.dump(snapshot, f, protocol = pickle.HIGHEST_PROTOCOL)
+
+    def load(self, key):
+        if key not in self:
+            raise KeyError('no initial state available for configuration {}'.format(key))
+
+        with open(self._file(key), 'rb') as f:
+            return pickle.load(f)
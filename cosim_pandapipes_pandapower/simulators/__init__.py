@@ -1,22 +1,62 @@
-# District Heating Network
-from .dh_network import DHNetworkSimulator
+'''
+Registry of the MOSAIK simulators.
 
-# Electrical Network
-from .el_network import ElectricNetworkSimulator
+The simulator classes are imported lazily on first access (e.g., when MOSAIK starts a simulator with
+'simulators:<class name>'), hence only the dependencies of the simulators actually in use are imported
+(e.g., a process running only the time series player does not import pandapipes or pandapower).
+'''
 
-# Heat units
-from .water_storage_tank import StratifiedWaterStorageTankSimulator
-from .heat_consumer import HEXConsumerSimulator
+import importlib
+import sys
 
-# Cross-domain units
-from .heat_pump import ConstantTcondHPSimulator
+# Simulator class names and their modules.
+SIMULATORS = {
+    # District Heating Network
+    'DHNetworkSimulator': '.dh_network',
 
-# Time series player
-from .time_series_player import TimeSeriesPlayerSim
+    # Electrical Network
+    'ElectricNetworkSimulator': '.el_network',
 
-# Control units
-from .flex_heat_controller import SimpleFlexHeatControllerSimulator
-from .voltage_control import VoltageControlSimulator
+    # Heat units
+    'StratifiedWaterStorageTankSimulator': '.water_storage_tank',
+    'HEXConsumerSimulator': '.heat_consumer',
 
-# On-line data logging
-from .collector import Collector
+    # Cross-domain units
+    'ConstantTcondHPSimulator': '.heat_pump',
+
+    # Time series player
+    'TimeSeriesPlayerSim': '.time_series_player',
+
+    # Control units
+    'SimpleFlexHeatControllerSimulator': '.flex_heat_controller',
+    'VoltageControlSimulator': '.voltage_control',
+
+    # On-line data logging
+    'Collector': '.collector',
+    'KPICollector': '.kpi_collector',
+}
+
+
+def load_simulator(name):
+    '''
+    Import the module of a simulator and return the simulator class.
+    '''
+    simulator = getattr(importlib.import_module(SIMULATORS[name], __name__), name)
+    globals()[name] = simulator
+    return simulator
+
+
+def __getattr__(name):
+    if name in SIMULATORS:
+        return load_simulator(name)
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(SIMULATORS))
+
+
+if sys.version_info < (3, 7):
+    # Module attribute lookup with __getattr__ requires Python 3.7 (PEP 562), import all simulators.
+    for _name in SIMULATORS:
+        load_simulator(_name)
@@ -5,8 +5,11 @@ A simple data collector that prints all data when the simulator ends.
 '''
 
 import collections
+import warnings
 import mosaik_api
+import numpy as np
 import pandas as pd
+import tables
 
 META = {
         'models': {
@@ -33,6 +36,8 @@ class Collector(mosaik_api.Simulator):
     save_h5 = True
     h5_store_name = ''
     h5_frame_name = ''
+    h5_format = 'fixed'
+    time_offset = 0
 
     def __init__(self):
         super().__init__(META)
@@ -45,12 +50,15 @@ class Collector(mosaik_api.Simulator):
 
     def init(
             self, sid, step_size=10, print_results=True, save_h5=True,
-            h5_store_name='collector_store', h5_frame_name='default_frame'):
+            h5_store_name='collector_store', h5_frame_name='default_frame', h5_format='fixed',
+            time_offset=0):
         self.step_size = step_size
+        self.time_offset = time_offset  # Offset added to the recorded time, e.g., when starting from a snapshot
         self.print_results = print_results
         self.save_h5 = save_h5
         self.h5_store_name = h5_store_name
         self.h5_frame_name = h5_frame_name
+        self.h5_format = h5_format
         return self.meta
 
     def create(self, num, model, **entity_params):
@@ -65,8 +73,13 @@ class Collector(mosaik_api.Simulator):
         data = inputs.get(self.eid,{})
         for attr, values in data.items():
             for src, value in values.items():
-                self.data[src][attr].append(value)
-        self.time_list.append(time)
+                if isinstance(value, (list, np.ndarray)):
+                    # Ensemble of replicas: one column per replica, i.e., '<attr>[<replica>]'
+                    for i, v in enumerate(value):
+                        self.data[src]['{0}[{1}]'.format(attr, i)].append(v)
+                else:
+                    self.data[src][attr].append(value)
+        self.time_list.append(time + self.time_offset)
 
         return time + self.step_size
 
@@ -84,8 +97,19 @@ class Collector(mosaik_api.Simulator):
             store = pd.HDFStore(self.h5_store_name)
             panel = pd.DataFrame({(unit,attribute): pd.Series(data, index=self.time_list) for unit, datadict in self.data.items() for attribute, data in datadict.items()})
             #print(panel)
+            if self.h5_format == 'table':
+                # Store every numeric '<sid>.<eid>.<attr>' as separate data column, which allows to read single columns.
+                # Other columns (e.g., strings) are stored unchanged, but can only be read together.
+                panel.columns = ['.'.join(column) for column in panel.columns]
+                panel = panel.infer_objects()
+                data_columns = [column for column, dtype in panel.dtypes.items() if dtype.kind in 'biuf']
+                with warnings.catch_warnings():
+                    # Column names with dots cannot be used in queries, but can be read with select_column.
+                    warnings.simplefilter('ignore', tables.NaturalNameWarning)
+                    store.put(self.h5_frame_name, panel, format='table', data_columns=data_columns)
+            else:
+                store[self.h5_frame_name] = panel
             print('Saved to store: {0}, dataframe: {1}'.format(self.h5_store_name, self.h5_frame_name))
-            store[self.h5_frame_name] = panel
             store.close()
 
 
@@ -2,7 +2,10 @@
 # Use of this source code is governed by a BSD-style license that can be found in the LICENSE file.
 
 from itertools import count
+import numpy as np
 from .simulator import DHNetwork
+from .surrogate import DHNetworkSurrogate
+from ..util import get_simulator_state, set_simulator_state, create_model, map_replicas
 from mosaik_api import Simulator
 from typing import Dict
 
@@ -16,6 +19,21 @@ META = {
                 'T_supply_grid',
                 'P_grid_bar',
                 'dynamic_temp_flow_enabled',
+                'dynamic_thermal_engine',  # Dynamic temperature flow: 'analytical', 'plug_flow' or 'sparse'
+                'plug_flow_max_plugs',  # Maximum number of plugs per pipe (only for plug flow)
+                'cache_enabled',  # Reuse pipeflow results of previous steps with (nearly) identical inputs
+                'cache_size',  # Maximum number of cached pipeflow results
+                'cache_tol_mdot',  # Quantization of mass flow setpoints for cache lookup
+                'cache_tol_Qdot',  # Quantization of heat consumption for cache lookup
+                'cache_tol_T',  # Quantization of tank supply temperature for cache lookup
+                'decoupled_pipeflow',  # Solve only the temperature flow after the hydraulic control has converged
+                'hydraulic_reuse_tol',  # Max. change of mass flow setpoints for reusing the last hydraulic results
+                'pipe_characteristics',  # File with pipe characteristics overriding the default pipe parameters
+                'net_template_cache',  # Copy the network from a template created once per network structure
+                'constant_fluid',  # Use water with constant properties instead of temperature-dependent properties
+                'T_fluid_ref',  # Reference temperature of the constant-property fluid
+                'replicas',  # Number of replicas (ensemble simulation, see util.ensemble)
+                'replica_params',  # Parameters with one value per replica
                 ],
             'attrs': [
                 # Input
@@ -40,9 +58,29 @@ META = {
                 'mdot_grid',  # Mass flow injected by the grid
                 'mdot_cons1',  # Mass flow at consumer 1
                 'mdot_cons2',  # Mass flow at consumer 2
+                'cache_hits',  # Number of steps reusing cached pipeflow results
+                'cache_misses',  # Number of steps with pipeflow calculation
+                'cache_evictions',  # Number of cached pipeflow results removed from cache
+                'hydraulic_runs',  # Number of steps with hydraulic control
+                'hydraulic_reuses',  # Number of steps reusing the hydraulic results of the previous step
+                'heat_pipeflow_runs',  # Number of temperature flow calculations
+                'full_pipeflow_runs',  # Number of full pipeflow calculations (hydraulics and temperature flow)
                 ],
             },
         },
+    'extra_methods': ['get_state', 'set_state'],
+    }
+
+# Surrogate variant of the DH network model (same attributes, plus surrogate file and counters).
+META['models']['DHNetworkSurrogate'] = {
+    'public': True,
+    'params': META['models']['DHNetwork']['params'] + [
+        'surrogate_file',  # File with trained surrogate
+        ],
+    'attrs': META['models']['DHNetwork']['attrs'] + [
+        'surrogate_hits',  # Number of steps computed with the surrogate
+        'surrogate_fallbacks',  # Number of steps computed with the exact model
+        ],
     }
 
 
@@ -51,6 +89,7 @@ class DHNetworkSimulator(Simulator):
     step_size = 10
     eid_prefix = ''
     last_time = 0
+    time_offset = 0
 
     def __init__(self, META=META):
         super().__init__(META)
@@ -60,7 +99,9 @@ class DHNetworkSimulator(Simulator):
         self.simulators: Dict[DHNetwork] = {}
         self.entityparams = {}
         self.output_vars = {'T_return_tank', 'T_evap_in', 'T_return_grid', 'T_supply_cons1', 'T_supply_cons2', 'T_return_cons1', 'T_return_cons2',
-                            'mdot_tank_in', 'mdot_grid', 'mdot_cons1', 'mdot_cons2'}
+                            'mdot_tank_in', 'mdot_grid', 'mdot_cons1', 'mdot_cons2', 'cache_hits', 'cache_misses', 'cache_evictions',
+                            'hydraulic_runs', 'hydraulic_reuses', 'heat_pipeflow_runs', 'full_pipeflow_runs'}
+        self.surrogate_vars = {'surrogate_hits', 'surrogate_fallbacks'}  # Only available for DHNetworkSurrogate
         self.input_vars = {'mdot_grid_set', 'T_tank_forward', 'mdot_tank_in_set', 'mdot_cons1_set', 'mdot_cons2_set', 'Qdot_evap', 'Qdot_cons1', 'Qdot_cons2'}
 
     def init(self, sid, step_size=10, eid_prefix="DHNetwork"):
@@ -79,7 +120,10 @@ class DHNetworkSimulator(Simulator):
             eid = '%s_%s' % (self.eid_prefix, next(counter))
 
             self.entityparams[eid] = model_params
-            esim = DHNetwork(**model_params)
+            if model == 'DHNetworkSurrogate':
+                esim = create_model(DHNetworkSurrogate, **model_params)
+            else:
+                esim = create_model(DHNetwork, **model_params)
 
             self.simulators[eid] = esim
 
@@ -109,7 +153,7 @@ class DHNetworkSimulator(Simulator):
                 else:
                     raise AttributeError(f"DHNetworkSimulator {eid} has no input attribute {attr}.")
 
-            esim.step_single(time)
+            esim.step_single(time + self.time_offset)
 
         self.last_time = time
         return time + self.step_size
@@ -124,6 +168,8 @@ class DHNetworkSimulator(Simulator):
             for attr in requests:
                 if attr in self.input_vars or attr in self.output_vars:
                     mydata[attr] = getattr(esim, attr)
+                elif attr in self.surrogate_vars and np.all(map_replicas(esim, lambda net: isinstance(net, DHNetworkSurrogate))):
+                    mydata[attr] = getattr(esim, attr)
                 else:
                     raise AttributeError(f"DHNetworkSimulator {eid} has no attribute {attr}.")
 
@@ -131,6 +177,13 @@ class DHNetworkSimulator(Simulator):
 
         return data
 
+    def get_state(self):
+        return get_simulator_state(self)
+
+    def set_state(self, state, time_offset=0):
+        set_simulator_state(self, state, time_offset)
+        self.time_offset = time_offset  # Keep the network time consistent with the snapshot
+
 
 if __name__ == '__main__':
 
@@ -0,0 +1,97 @@
+# Copyright (c) 2021 by ERIGrid 2.0. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be found in the LICENSE file.
+'''
+Lagrangian plug flow model of a pipe (similar to the plug flow pipes used by DisHeatLib, see disheatlib_standalone).
+
+The water inside a pipe is represented by a sequence of plugs, each with its mass, inlet temperature and entry time.
+In every step, the mass entering the pipe is added as a new plug at the inlet and the same mass leaves the pipe at the
+outlet. The outlet temperature is the mass-weighted mean temperature of the leaving plugs, where each plug has cooled
+down exponentially towards the ambient temperature during its residence time. Hence, the transport delay follows from
+the mass flow and pipe volume, while memory is bounded by the maximum number of plugs per pipe.
+'''
+
+from collections import deque
+import math
+
+
+class PlugFlowPipe:
+    '''
+    Plug flow model of a single pipe.
+    :param mass: mass of water in the pipe [kg]
+    :param time_constant: time constant of the heat losses, i.e., rho * A * cp / (alpha * pi * d) [s]
+    :param T_init: initial temperature of the water in the pipe [K]
+    :param T_amb: ambient temperature [K]
+    :param max_plugs: maximum number of plugs (adjacent plugs with the smallest mass are merged)
+    :param time: initial time [s]
+    '''
+
+    def __init__(self, mass, time_constant, T_init, T_amb, max_plugs=100, time=0):
+        if max_plugs < 2:
+            raise ValueError('plug flow model requires at least two plugs')
+
+        self.mass = mass
+        self.time_constant = time_constant
+        self.T_amb = T_amb
+        self.max_plugs = max_plugs
+
+        # Plugs as lists [mass, inlet temperature, entry time], ordered from the 'from' end to the 'to' end of the pipe.
+        self.plugs = deque([[mass, T_init, time]])
+        self.last_time = time
+
+    def temperature(self, plug, time):
+        '''
+        Temperature of a plug at the given time (exponential heat loss since its entry).
+        '''
+        _, T_in, t_entry = plug
+        if self.time_constant <= 0:
+            return T_in
+        return self.T_amb + (T_in - self.T_amb) * math.exp(- (time - t_entry) / self.time_constant)
+
+    def step(self, mdot, T_in, time):
+        '''
+        Advance the plugs with the given mass flow and return the outlet temperature.
+        Only forward flow (from the 'from' to the 'to' end of the pipe) is supported, reverse flow is treated as no flow.
+        :param mdot: mass flow from the 'from' to the 'to' end of the pipe [kg/s]
+        :param T_in: inlet temperature (at the 'from' end) [K]
+        :param time: current time [s]
+        :return: outlet temperature (at the 'to' end) [K]
+        '''
+        dt = max(time - self.last_time, 0)
+        self.last_time = time
+        dm = max(mdot, 0) * dt
+
+        if dm <= 0:
+            # No flow: the water at the outlet keeps cooling down
+            return self.temperature(self.plugs[-1], time)
+
+        self.plugs.appendleft([dm, T_in, time])
+
+        # Remove the same mass at the outlet
+        remaining = dm
+        energy = 0.
+        while remaining > 1e-12 * dm:
+            plug = self.plugs[-1]
+            leaving = min(plug[0], remaining)
+            energy += leaving * self.temperature(plug, time)
+            remaining -= leaving
+
+            if leaving >= plug[0]:
+                self.plugs.pop()
+            else:
+                plug[0] -= leaving
+
+        self._merge_plugs()
+
+        return energy / (dm - remaining)
+
+    def _merge_plugs(self):
+        plugs = self.plugs
+
+        while len(plugs) > self.max_plugs:
+            # Merge the pair of adjacent plugs with the smallest total mass
+            i = min(range(len(plugs) - 1), key=lambda k: plugs[k][0] + plugs[k + 1][0])
+            m1, T1, t1 = plugs[i]
+            m2, T2, t2 = plugs[i + 1]
+            m = m1 + m2
+            plugs[i] = [m, (m1 * T1 + m2 * T2) / m, (m1 * t1 + m2 * t2) / m]
+            del plugs[i + 1]
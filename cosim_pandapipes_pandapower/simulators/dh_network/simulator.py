@@ -1,21 +1,33 @@
 # Copyright (c) 2021 by ERIGrid 2.0. All rights reserved.
 # Use of this source code is governed by a BSD-style license that can be found in the LICENSE file.
 
+import os
 import sys
 import math
+import pickle
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from typing import Dict
 import pandas as pd
 import numpy as np
 import pandapipes as pp
 import pandapipes.control.run_control as run_control
+from pandapipes.idx_branch import VINIT
+from pandapipes.idx_node import PINIT
 from .valve_control import CtrlValve
+from .thermal_engine import ThermalEngine
+from .plug_flow import PlugFlowPipe
+from .topology import benchmark_tables, build_network, read_pipe_characteristics, constant_property_fluid
+from ..util import njit, select_kernel
 # import matplotlib.pyplot as plt
 # import pandapipes.plotting as plot
 
 if not sys.warnoptions:
     import warnings
 
+# Pickled networks incl. controllers, created once per network structure (see DHNetwork._create_network)
+NET_TEMPLATES = {}
+
 # Global
 # OUTPUT_PLOTTING_PERIOD = 60 * 60 * 4 - 60
 
@@ -33,6 +45,20 @@ class DHNetwork:
     P_hp_bar: float = 6  # Pressure of the heat pump + storage unit [bar]
     tank_installed: bool = True  # Enable hp + tank connection point
     dynamic_temp_flow_enabled: bool = True  # Enable external temperature flow sim incl. network inertia
+    dynamic_thermal_engine: str = 'analytical'  # Dynamic temperature flow: 'analytical' (per pipe), 'plug_flow' (per pipe) or 'sparse' (all pipe sections)
+    plug_flow_max_plugs: int = 100  # Maximum number of plugs per pipe (only for plug flow)
+    cache_enabled: bool = False  # Reuse pipeflow results of previous steps with (nearly) identical inputs
+    cache_size: int = 256  # Maximum number of cached pipeflow results (least recently used are evicted)
+    cache_tol_mdot: float = 0.01  # Quantization of mass flow setpoints for cache lookup [kg/s]
+    cache_tol_Qdot: float = 1  # Quantization of heat consumption for cache lookup [kW]
+    cache_tol_T: float = 0.1  # Quantization of tank supply temperature for cache lookup [degC]
+    decoupled_pipeflow: bool = True  # Solve only the temperature flow after the hydraulic control has converged
+    hydraulic_reuse_tol: float = 0  # Max. change of mass flow setpoints for reusing the last hydraulic results [kg/s]
+    use_numba: bool = True  # Use the compiled kernels for temperature drop and mixing (only in case numba is installed)
+    pipe_characteristics: str = None  # File with pipe characteristics overriding the default pipe parameters (see topology.py)
+    net_template_cache: bool = True  # Copy the network from a template created once per network structure
+    constant_fluid: bool = False  # Use water with constant properties (at T_fluid_ref) instead of temperature-dependent properties
+    T_fluid_ref: float = 60  # Reference temperature of the constant-property fluid [degC]
 
     # Magnitudes
     CP_WATER: float = 4186  # Specific heat capacity of water [J/(kgK)]
@@ -71,6 +97,19 @@ class DHNetwork:
     compare_to_static_results: bool = False  # calculates static and dynamic heat flow and compares both results (only when dynamic temp flow enabled
     store: Dict[str, pd.DataFrame] = field(default_factory=dict)
     cur_t: float = 0  # Actual time [s]
+    cache: OrderedDict = field(default_factory=OrderedDict)  # Cached pipeflow results (LRU order)
+    cache_hits: int = 0  # Number of steps reusing cached pipeflow results
+    cache_misses: int = 0  # Number of steps with pipeflow calculation
+    cache_evictions: int = 0  # Number of cached pipeflow results removed from cache
+    pipeflow_path: str = None  # Calculation path of the last step (e.g., 'hydraulics+heat', 'reused+heat' or 'cached')
+    hydraulic_runs: int = 0  # Number of steps with hydraulic control
+    hydraulic_reuses: int = 0  # Number of steps reusing the hydraulic results of the previous step
+    heat_pipeflow_runs: int = 0  # Number of temperature flow calculations (mode 'heat')
+    full_pipeflow_runs: int = 0  # Number of full pipeflow calculations (mode 'all')
+    hydraulic_setpoints: tuple = None  # Mass flow setpoints of the last hydraulic results
+    hydraulic_solution: np.ndarray = None  # Pressures and velocities of the last hydraulic results
+    thermal_model: ThermalEngine = None  # Sparse dynamic temperature flow model (created at the first step)
+    plug_flow_pipes: Dict[str, PlugFlowPipe] = field(default_factory=dict)  # Plug flow models of all pipes (created at the first step)
 
     # Network utils
     net: pp.pandapipesNet = None
@@ -84,6 +123,9 @@ class DHNetwork:
     circ_pump: list = None
 
     def __post_init__(self):
+        if self.dynamic_thermal_engine not in ('analytical', 'plug_flow', 'sparse'):
+            raise ValueError(f"Unknown dynamic thermal engine '{self.dynamic_thermal_engine}'.")
+
         self._create_network()
         self._init_output_store()
         warnings.filterwarnings('ignore', message='Pipeflow converged, however, the results are phyisically incorrect as pressure is negative at nodes*')
@@ -108,12 +150,23 @@ class DHNetwork:
         # update inputs
         self._update()
 
-        # Run hydraulic flow (steady-state)
-        self.run_hydraulic_control()
+        # Reuse results of a previous step with (nearly) identical inputs, if available
+        key = self._cache_key() if self.cache_enabled else None
 
-        if not self.dynamic_temp_flow_enabled:
-            self._run_static_pipeflow()
+        if key is not None and key in self.cache:
+            self._restore_cached_results(key)
+            self.pipeflow_path = 'cached'
         else:
+            # Run hydraulic flow (steady-state), unless the mass flow setpoints have not changed
+            self._run_hydraulics()
+
+            if not self.dynamic_temp_flow_enabled:
+                self._run_static_pipeflow()
+
+            if key is not None:
+                self._cache_results(key)
+
+        if self.dynamic_temp_flow_enabled:
             self._run_dynamic_pipeflow()
 
         # Plot results
@@ -137,6 +190,86 @@ class DHNetwork:
         self.mdot_tank_out = round(self.net.res_valve.at[v.index('tank_v1'), 'mdot_from_kg_per_s'], 2)
         self.mdot_tank_in = - self.mdot_tank_out
 
+    def _run_hydraulics(self):
+        setpoints = (self.mdot_cons1_set, self.mdot_cons2_set, self.mdot_bypass_set, self.mdot_tank_in_set)
+
+        if self.decoupled_pipeflow and self.hydraulic_setpoints is not None and \
+                max(abs(a - b) for a, b in zip(setpoints, self.hydraulic_setpoints)) <= self.hydraulic_reuse_tol:
+            self.hydraulic_reuses += 1
+            self.pipeflow_path = 'reused'
+            return
+
+        self.hydraulic_runs += 1
+        self.pipeflow_path = 'hydraulics'
+
+        if self.run_hydraulic_control():
+            # Keep the converged hydraulic solution (starting values for the temperature flow calculation)
+            pit = self.net['_active_pit']
+            self.hydraulic_setpoints = setpoints
+            self.hydraulic_solution = np.concatenate([pit['node'][:, PINIT], pit['branch'][:, VINIT]])
+        else:
+            self.hydraulic_setpoints = None
+            self.hydraulic_solution = None
+
+    def _cache_key(self):
+        def quantize(value, tol):
+            return int(round(value / tol)) if tol > 0 else value
+
+        key = (
+            quantize(self.mdot_cons1_set, self.cache_tol_mdot),
+            quantize(self.mdot_cons2_set, self.cache_tol_mdot),
+            quantize(self.mdot_bypass_set, self.cache_tol_mdot),
+            quantize(self.mdot_tank_in_set, self.cache_tol_mdot),
+        )
+
+        # The dynamic temperature flow is calculated in every step, hence only the hydraulic results are cached
+        if not self.dynamic_temp_flow_enabled:
+            key += (
+                quantize(self.Qdot_cons1, self.cache_tol_Qdot),
+                quantize(self.Qdot_cons2, self.cache_tol_Qdot),
+                quantize(self.Qdot_evap, self.cache_tol_Qdot),
+                quantize(self.T_tank_forward, self.cache_tol_T),
+            )
+
+        return key
+
+    def _cache_results(self, key):
+        ctrl = self.controller
+
+        self.cache_misses += 1
+        self.cache[key] = {
+            'results': {table: self.net[table].copy() for table in self.net.keys()
+                        if table.startswith('res_') and isinstance(self.net[table], pd.DataFrame)},
+            'valves': self.net.valve[['loss_coefficient', 'opened']].copy(),
+            'controllers': {c: (self.net.controller.at[ctrl.index(c), 'object'].loss_coeff,
+                                self.net.controller.at[ctrl.index(c), 'object'].opened) for c in ctrl},
+        }
+
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+            self.cache_evictions += 1
+
+    def _restore_cached_results(self, key):
+        ctrl = self.controller
+
+        self.cache_hits += 1
+        self.cache.move_to_end(key)
+        cached = self.cache[key]
+
+        # The restored results do not necessarily match the last hydraulic solution
+        self.hydraulic_setpoints = None
+        self.hydraulic_solution = None
+
+        # Copy results, the dynamic temperature flow calculation modifies them
+        for table, df in cached['results'].items():
+            self.net[table] = df.copy()
+
+        # Restore valve positions (also used as starting point of the next controller run)
+        self.net.valve[['loss_coefficient', 'opened']] = cached['valves']
+        for c, (loss_coeff, opened) in cached['controllers'].items():
+            self.net.controller.at[ctrl.index(c), 'object'].loss_coeff = loss_coeff
+            self.net.controller.at[ctrl.index(c), 'object'].opened = opened
+
     def run_hydraulic_control(self):
         # Ignore user warnings of control
         try:
@@ -144,9 +277,26 @@ class DHNetwork:
         except:
             # Throw UserWarning
             warnings.warn('Controller not converged: maximum number of iterations per controller is reached at time t={}.'.format(self.cur_t), UserWarning, stacklevel=2)
+            return False
+
+        return True
 
     def _run_static_pipeflow(self):
+        if self.decoupled_pipeflow and self.hydraulic_solution is not None:
+            try:
+                # Temperature flow only, starting from the converged hydraulic solution
+                pp.pipeflow(self.net, sol_vec=self.hydraulic_solution, transient=False, mode='heat', max_iter=100, heat_transfer=True)
+                self.heat_pipeflow_runs += 1
+                self.pipeflow_path += '+heat'
+                return
+            except ValueError:
+                # Size of the hydraulic solution does not match the network (e.g., after opening or closing a valve)
+                self.hydraulic_setpoints = None
+                self.hydraulic_solution = None
+
         pp.pipeflow(self.net, transient=False, mode='all', max_iter=100, run_control=True, heat_transfer=True)
+        self.full_pipeflow_runs += 1
+        self.pipeflow_path += '+all'
 
         # Store results
         # self._store_output(label='static')
@@ -160,10 +310,21 @@ class DHNetwork:
             self._store_output(label='static')
 
         # Dynamic heat flow distribution
-        self._internal_heatflow_calc()
+        if self.dynamic_thermal_engine == 'sparse':
+            # The state of the sparse model is kept internally, no history of results is required
+            self._sparse_heatflow_calc()
+        else:
+            self._internal_heatflow_calc()
 
-        # Store results
-        self._store_output(label='dynamic')
+            # Store results (history of results is only required for the analytical temperature flow)
+            if self.dynamic_thermal_engine == 'analytical':
+                self._store_output(label='dynamic')
+
+    def _sparse_heatflow_calc(self):
+        if self.thermal_model is None:
+            self.thermal_model = ThermalEngine(self.net, cp=self.CP_WATER)
+
+        self.thermal_model.step(self.net, self.cur_t)
 
     def _internal_heatflow_calc(self):
         self._calc_forward_pipe_tempflow()
@@ -171,7 +332,7 @@ class DHNetwork:
 
     def _calc_forward_pipe_tempflow(self):
         for pipe in self.pipe[0:7]:  # TODO: Make this applicable to any network topology
-            self._internal_tempflow_calc(pipe)
+            self._calc_pipe_tempflow(pipe)
             self._update_temperature_flow(pipe)
 
     def _calc_consumer_return_temperature(self, hex):
@@ -203,9 +364,15 @@ class DHNetwork:
         pipe_seq = self.pipe[7:14]
         pipe_seq.reverse()
         for pipe in pipe_seq:
-            self._internal_tempflow_calc(pipe)
+            self._calc_pipe_tempflow(pipe)
             self._update_temperature_flow(pipe)
 
+    def _calc_pipe_tempflow(self, pipe):
+        if self.dynamic_thermal_engine == 'plug_flow':
+            self._plug_flow_tempflow_calc(pipe)
+        else:
+            self._internal_tempflow_calc(pipe)
+
     def _store_output(self, label='static'):  # TODO: Improve due to low performance
         data = {}
 
@@ -296,12 +463,38 @@ class DHNetwork:
         net.res_pipe.at[p.index(pipe), 't_from_k'] = Tin
 
         # Dynamic temperature drop along a pipe
-        exp = - (loss_coeff * dx) / (Cp_w * mf)
-        Tout = Ta + (Tin - Ta) * math.exp(exp)
+        Tout = select_kernel(pipe_outlet_temperature_kernel, self.use_numba)(Tin, Ta, loss_coeff, dx, Cp_w, mf)
 
         # Set pipe outlet temperature
         net.res_pipe.at[p.index(pipe), 't_to_k'] = Tout
 
+    def _plug_flow_tempflow_calc(self, pipe):
+        # Like the analytical engine, only forward flow (from the from-junction to the to-junction) is supported,
+        # since the pipes are traversed in their design flow direction (see _calc_forward_pipe_tempflow).
+        p = self.pipe
+        net = self.net
+        mf = net.res_pipe.at[p.index(pipe), 'mdot_from_kg_per_s']
+        j_in_id = net.pipe.at[p.index(pipe), 'from_junction']
+        Tin = net.res_junction.at[j_in_id, 't_k']
+
+        if pipe not in self.plug_flow_pipes:
+            dx = net.pipe.at[p.index(pipe), 'length_km'] * 1000
+            dia = net.pipe.at[p.index(pipe), 'diameter_m']
+            alpha = net.pipe.at[p.index(pipe), 'alpha_w_per_m2k']
+            rho = float(net.fluid.get_density(Tin))
+            area = math.pi * dia ** 2 / 4
+            time_constant = rho * area * self.CP_WATER / (alpha * math.pi * dia) if alpha > 0 else 0
+
+            # Initially, the pipe is filled with water at the current inlet temperature
+            self.plug_flow_pipes[pipe] = PlugFlowPipe(
+                mass=rho * area * dx, time_constant=time_constant, T_init=Tin,
+                T_amb=net.pipe.at[p.index(pipe), 'text_k'], max_plugs=self.plug_flow_max_plugs, time=self.cur_t
+            )
+
+        # Set current inlet and outlet temperature of pipe
+        net.res_pipe.at[p.index(pipe), 't_from_k'] = Tin
+        net.res_pipe.at[p.index(pipe), 't_to_k'] = self.plug_flow_pipes[pipe].step(mf, Tin, self.cur_t)
+
     def _update_temperature_flow(self, act_pipe):
         p = self.pipe
         v = self.valve
@@ -343,16 +536,12 @@ class DHNetwork:
                 conn_j_id.append(self.net.valve.at[v.index(valve), 'from_junction'])
         pipes_in = self.net.pipe['name'].loc[self.net.pipe['to_junction'].isin(conn_j_id)].values.tolist()
 
-        mfsum = []
-        mtsum = []
         if pipes_in:
-            for name in pipes_in:
-                # Do temperature mix weighted by share of incoming mass flow
-                mdot = self.net.res_pipe.at[p.index(name), 'mdot_from_kg_per_s']
-                t_in = self.net.res_pipe.at[p.index(name), 't_to_k']
-                mfsum.append(mdot)
-                mtsum.append(mdot * t_in)
-            Tset = (1 / sum(mfsum)) * sum(mtsum)
+            # Do temperature mix weighted by share of incoming mass flow
+            idx = [p.index(name) for name in pipes_in]
+            Tset = select_kernel(mixing_temperature_kernel, self.use_numba)(
+                self.net.res_pipe.loc[idx, 'mdot_from_kg_per_s'].values.astype(float),
+                self.net.res_pipe.loc[idx, 't_to_k'].values.astype(float))
         else:
             raise AttributeError(f"Junction '{junction}' not connected to a network pipe.")
 
@@ -389,181 +578,75 @@ class DHNetwork:
         self.net.heat_exchanger.at[hex.index('hp_evap'), 'qext_w'] = self.Qdot_evap * 1000
 
     def _create_network(self):
-        # create empty network
-        self.net = pp.create_empty_network('net', add_stdtypes=False)
+        key = self._net_template_key()
+        template = NET_TEMPLATES.get(key) if self.net_template_cache else None
 
-        # create fluid
-        pp.create_fluid_from_lib(self.net, 'water', overwrite=True)
+        if template is None:
+            self._build_network()
+            if self.net_template_cache:
+                NET_TEMPLATES[key] = pickle.dumps((self.net, self.controller), protocol=pickle.HIGHEST_PROTOCOL)
+        else:
+            # copy the network from the template and set the parameter-dependent values
+            self.net, self.controller = pickle.loads(template)
+            self._set_network_params()
 
         # create utils
-        self._create_junctions()
-        self._create_external_grid()
-        self._create_pipes()
-        self._create_substations()
-        if self.tank_installed:
-            self._create_heatpump()
-        self._create_bypass()
-        self._create_flow_control()
-        # self._plot()
-
-    def _create_junctions(self):
-        # create nodes (with initial pressure and temperature)
         net = self.net
-        pn_init = self.P_grid_bar
-        tfluid_init = 273.15 + self.T_supply_grid
-        pp.create_junction(net, pn_bar=pn_init, tfluid_k=tfluid_init, name='n1s', geodata=(0, 1))
-        pp.create_junction(net, pn_bar=pn_init, tfluid_k=tfluid_init, name='n1r', geodata=(0, -2.1))
-        pp.create_junction(net, pn_bar=pn_init, tfluid_k=tfluid_init, name='n2s', geodata=(3, 1))
-        pp.create_junction(net, pn_bar=pn_init, tfluid_k=tfluid_init, name='n2r', geodata=(3, -2.1))
-        pp.create_junction(net, pn_bar=pn_init, tfluid_k=tfluid_init, name='n3s', geodata=(6, 1))
-        pp.create_junction(net, pn_bar=pn_init, tfluid_k=tfluid_init, name='n3s_tank', geodata=(6, 3))  # create hp+tank injection point
-        pp.create_junction(net, pn_bar=pn_init, tfluid_k=tfluid_init, name='n3sv', geodata=(6, 1.4))  # create tank valve
-        pp.create_junction(net, pn_bar=pn_init, tfluid_k=tfluid_init, name='n3r', geodata=(6, -2.1))
-        pp.create_junction(net, pn_bar=pn_init, tfluid_k=tfluid_init, name='n3r_tank', geodata=(6, -4.1))
-        pp.create_junction(net, pn_bar=pn_init, tfluid_k=tfluid_init, name='n4s', geodata=(10, 1))
-        pp.create_junction(net, pn_bar=pn_init, tfluid_k=tfluid_init, name='n4r', geodata=(11, -2.1))
-        pp.create_junction(net, pn_bar=pn_init, tfluid_k=tfluid_init, name='n5sv', geodata=(10, 1.5))
-        pp.create_junction(net, pn_bar=pn_init, tfluid_k=tfluid_init, name='n5s', geodata=(10, 4))
-        pp.create_junction(net, pn_bar=pn_init, tfluid_k=tfluid_init, name='n5r', geodata=(11, 4))
-        pp.create_junction(net, pn_bar=pn_init, tfluid_k=tfluid_init, name='n6s', geodata=(15, 1))
-        pp.create_junction(net, pn_bar=pn_init, tfluid_k=tfluid_init, name='n6r', geodata=(16, -2.1))
-        pp.create_junction(net, pn_bar=pn_init, tfluid_k=tfluid_init, name='n7sv', geodata=(15, 1.5))
-        pp.create_junction(net, pn_bar=pn_init, tfluid_k=tfluid_init, name='n7s', geodata=(15, 4))
-        pp.create_junction(net, pn_bar=pn_init, tfluid_k=tfluid_init, name='n7r', geodata=(16, 4))
-        pp.create_junction(net, pn_bar=pn_init, tfluid_k=tfluid_init, name='n8s', geodata=(19, 1))
-        pp.create_junction(net, pn_bar=pn_init, tfluid_k=tfluid_init, name='n8r', geodata=(19, -2.1))
-
         self.junction = net.junction['name'].tolist()
-
-    def _create_external_grid(self):
-        net = self.net
-        j = self.junction
-        t_supply_grid_k = 273.15 + self.T_supply_grid
-        mdot_init = self.mdot_grid
-
-        # create external grid
-        pp.create_ext_grid(net, junction=j.index('n1s'), p_bar=self.P_grid_bar, t_k=t_supply_grid_k, name='ext_grid', type='pt')
-
-        # create sink and source
-        pp.create_sink(net, junction=j.index('n1r'), mdot_kg_per_s=mdot_init, name='sink_grid')
-        pp.create_source(net, junction=j.index('n1r'), mdot_kg_per_s=0, name='source_grid')
-
-        self.sink = net.sink['name'].tolist()
-        self.source = net.ext_grid['name'].tolist()
-
-    def _create_pipes(self):
-        net = self.net
-        j = self.junction
-
-        l01 = 0.5
-
-        # supply pipes
-        pp.create_pipe_from_parameters(net, from_junction=j.index('n1s'), to_junction=j.index('n2s'), length_km=l01,
-                                       diameter_m=0.1, k_mm=0.01, sections=5, alpha_w_per_m2k=1.5,
-                                       text_k=273.15+8, name='l1s')
-        pp.create_pipe_from_parameters(net, from_junction=j.index('n3sv'), to_junction=j.index('n3s'), length_km=0.01,
-                                       diameter_m=0.1, k_mm=0.01, sections=1, alpha_w_per_m2k=1.5,
-                                       text_k=273.15 + 8, name='l1s_tank')         # create tank pipe connection
-        pp.create_pipe_from_parameters(net, from_junction=j.index('n3s'), to_junction=j.index('n4s'), length_km=0.5,
-                                       diameter_m=0.1, k_mm=0.01, sections=5, alpha_w_per_m2k=1.5,
-                                       text_k=273.15 + 8, name='l2s')
-        pp.create_pipe_from_parameters(net, from_junction=j.index('n4s'), to_junction=j.index('n5sv'), length_km=0.01,
-                                       diameter_m=0.1, k_mm=0.01, sections=1, alpha_w_per_m2k=1.5,
-                                       text_k=273.15 + 8, name='l3s')
-        pp.create_pipe_from_parameters(net, from_junction=j.index('n4s'), to_junction=j.index('n6s'), length_km=0.5,
-                                       diameter_m=0.1, k_mm=0.01, sections=5, alpha_w_per_m2k=1.5,
-                                       text_k=273.15 + 8, name='l4s')
-        pp.create_pipe_from_parameters(net, from_junction=j.index('n6s'), to_junction=j.index('n7sv'), length_km=0.01,
-                                       diameter_m=0.1, k_mm=0.01, sections=1, alpha_w_per_m2k=1.5,
-                                       text_k=273.15 + 8, name='l5s')
-        pp.create_pipe_from_parameters(net, from_junction=j.index('n6s'), to_junction=j.index('n8s'), length_km=0.01,
-                                       diameter_m=0.1, k_mm=0.01, sections=1, alpha_w_per_m2k=1.5,
-                                       text_k=273.15 + 8, name='l6s')
-
-        # return pipes
-        pp.create_pipe_from_parameters(net, from_junction=j.index('n2r'), to_junction=j.index('n1r'), length_km=l01,
-                                       diameter_m=0.1, k_mm=0.01, sections=5, alpha_w_per_m2k=1.5,
-                                       text_k=273.15+8, name='l1r')
-        pp.create_pipe_from_parameters(net, from_junction=j.index('n3r'), to_junction=j.index('n3r_tank'), length_km=0.01,
-                                       diameter_m=0.1, k_mm=0.01, sections=1, alpha_w_per_m2k=1.5,
-                                       text_k=273.15 + 8, name='l1r_tank')         # create tank pipe connection
-        pp.create_pipe_from_parameters(net, from_junction=j.index('n4r'), to_junction=j.index('n3r'), length_km=0.5,
-                                       diameter_m=0.1, k_mm=0.01, sections=5, alpha_w_per_m2k=1.5,
-                                       text_k=273.15 + 8, name='l2r')
-        pp.create_pipe_from_parameters(net, from_junction=j.index('n5r'), to_junction=j.index('n4r'), length_km=0.01,
-                                       diameter_m=0.1, k_mm=0.01, sections=1, alpha_w_per_m2k=1.5,
-                                       text_k=273.15 + 8, name='l3r')
-        pp.create_pipe_from_parameters(net, from_junction=j.index('n6r'), to_junction=j.index('n4r'), length_km=0.5,
-                                       diameter_m=0.1, k_mm=0.01, sections=5, alpha_w_per_m2k=1.5,
-                                       text_k=273.15 + 8, name='l4r')
-        pp.create_pipe_from_parameters(net, from_junction=j.index('n7r'), to_junction=j.index('n6r'), length_km=0.01,
-                                       diameter_m=0.1, k_mm=0.01, sections=1, alpha_w_per_m2k=1.5,
-                                       text_k=273.15 + 8, name='l5r')
-        pp.create_pipe_from_parameters(net, from_junction=j.index('n8r'), to_junction=j.index('n6r'), length_km=0.01,
-                                       diameter_m=0.1, k_mm=0.01, sections=1, alpha_w_per_m2k=1.5,
-                                       text_k=273.15 + 8, name='l6r')
-
-        # create grid connector valves
-        pp.create_valve(net, j.index('n2s'), j.index('n3s'), diameter_m=0.1, loss_coefficient=1000, opened=True, name='grid_v1')
-        if not self.tank_installed:
-            pp.create_valve(net, j.index('n3r'), j.index('n2r'), diameter_m=0.1, loss_coefficient=0, opened=True, name='grid_v2')
-
         self.pipe = net.pipe['name'].tolist()
         self.valve = net.valve['name'].tolist()
-
-    def _create_substations(self):
-        net = self.net
-        j = self.junction
-        q_hex1 = self.Qdot_cons1 * 1000
-        q_hex2 = self.Qdot_cons2 * 1000
-
-        # create control valves
-        pp.create_valve(net, j.index('n5sv'), j.index('n5s'), diameter_m=0.1, opened=True, loss_coefficient=1000, name='sub_v1')
-        pp.create_valve(net, j.index('n7sv'), j.index('n7s'), diameter_m=0.1, opened=True, loss_coefficient=1000, name='sub_v2')
-
-        # create heat exchanger
-        pp.create_heat_exchanger(net, from_junction=j.index('n5s'), to_junction=j.index('n5r'), diameter_m=0.1,
-                                 qext_w=q_hex1, name='hex1')
-        pp.create_heat_exchanger(net, from_junction=j.index('n7s'), to_junction=j.index('n7r'), diameter_m=0.1,
-                                 qext_w=q_hex2, name='hex2')
-
         self.heat_exchanger = net.heat_exchanger['name'].tolist()
-        self.valve = net.valve['name'].tolist()
-
-    def _create_heatpump(self):
-        net = self.net
-        j = self.junction
-        mdot_tank_init = self.mdot_tank_out
-        t_supply_tank_k = self.T_tank_forward + 273.15
-        p_bar_set = self.P_hp_bar
-        q_hp_evap = self.Qdot_evap * 1000
+        self.sink = net.sink['name'].tolist()
+        self.source = net.ext_grid['name'].tolist()
 
-        # create hp evaporator
-        pp.create_heat_exchanger(net, from_junction=j.index('n3r'), to_junction=j.index('n2r'), diameter_m=0.1,
-                                 qext_w=q_hp_evap, name='hp_evap')
+    def _net_template_key(self):
+        # parameters defining the network structure (all other parameters are set with _set_network_params)
+        mtime = None if self.pipe_characteristics is None else os.path.getmtime(self.pipe_characteristics)
+        return self.tank_installed, self.pipe_characteristics, mtime, self.constant_fluid, self.T_fluid_ref
+
+    def _build_network(self):
+        pipe_characteristics = None
+        if self.pipe_characteristics is not None:
+            pipe_characteristics = read_pipe_characteristics(self.pipe_characteristics)
+
+        # create network from element tables (junctions, pipes, valves, heat exchangers, grids, sinks, sources)
+        tables = benchmark_tables(
+            T_supply_grid=self.T_supply_grid, P_grid_bar=self.P_grid_bar, P_hp_bar=self.P_hp_bar,
+            T_tank_forward=self.T_tank_forward, mdot_grid=self.mdot_grid, mdot_tank_out=self.mdot_tank_out,
+            Qdot_cons1=self.Qdot_cons1, Qdot_cons2=self.Qdot_cons2, Qdot_evap=self.Qdot_evap,
+            tank_installed=self.tank_installed, pipe_characteristics=pipe_characteristics
+        )
+        fluid = constant_property_fluid('water', 273.15 + self.T_fluid_ref) if self.constant_fluid else 'water'
+        self.net = build_network(tables, fluid=fluid)
+        self.valve = self.net.valve['name'].tolist()
 
-        # create tank supply
-        pp.create_ext_grid(net, junction=j.index('n3s_tank'), p_bar=p_bar_set, t_k=t_supply_tank_k, name='supply_tank', type='pt')
+        self._create_flow_control()
+        # self._plot()
 
-        # create tank mass flow sink
-        pp.create_sink(net, junction=j.index('n3r_tank'), mdot_kg_per_s=mdot_tank_init, name='sink_tank')
+    def _set_network_params(self):
+        # same values as in topology.benchmark_tables
+        net = self.net
+        t_supply_grid_k = 273.15 + self.T_supply_grid
 
-        # create valves
-        pp.create_valve(net, j.index('n3s_tank'), j.index('n3sv'), diameter_m=0.1, opened=True, loss_coefficient=1000, name='tank_v1')
+        net.junction['pn_bar'] = self.P_grid_bar
+        net.junction['tfluid_k'] = t_supply_grid_k
 
-        self.heat_exchanger = net.heat_exchanger['name'].tolist()
-        self.valve = net.valve['name'].tolist()
-        self.sink = net.sink['name'].tolist()
-        self.source = net.ext_grid['name'].tolist()
+        ext_grid = net.ext_grid['name'].tolist()
+        net.ext_grid.at[ext_grid.index('ext_grid'), 'p_bar'] = self.P_grid_bar
+        net.ext_grid.at[ext_grid.index('ext_grid'), 't_k'] = t_supply_grid_k
 
-    def _create_bypass(self):
-        net = self.net
-        j = self.junction
+        sink = net.sink['name'].tolist()
+        net.sink.at[sink.index('sink_grid'), 'mdot_kg_per_s'] = self.mdot_grid
 
-        # create bypass valve
-        pp.create_valve(net, j.index('n8s'), j.index('n8r'), diameter_m=0.1, opened=True, loss_coefficient=1000, name='bypass')
+        hex = net.heat_exchanger['name'].tolist()
+        net.heat_exchanger.at[hex.index('hex1'), 'qext_w'] = self.Qdot_cons1 * 1000
+        net.heat_exchanger.at[hex.index('hex2'), 'qext_w'] = self.Qdot_cons2 * 1000
 
-        self.valve = net.valve['name'].tolist()
+        if self.tank_installed:
+            net.ext_grid.at[ext_grid.index('supply_tank'), 'p_bar'] = self.P_hp_bar
+            net.ext_grid.at[ext_grid.index('supply_tank'), 't_k'] = self.T_tank_forward + 273.15
+            net.sink.at[sink.index('sink_tank'), 'mdot_kg_per_s'] = self.mdot_tank_out
+            net.heat_exchanger.at[hex.index('hp_evap'), 'qext_w'] = self.Qdot_evap * 1000
 
     def _create_flow_control(self):
         net = self.net
@@ -594,3 +677,27 @@ class DHNetwork:
 
     # def _plot(self):
         # plot.simple_plot(self.net, plot_sinks=True, plot_sources=True, sink_size=4.0, source_size=4.0)
+
+
+@njit(cache=True)
+def pipe_outlet_temperature_kernel(T_in, T_amb, loss_coeff, length, cp, mdot):
+    '''
+    Outlet temperature of a pipe with exponential temperature drop towards the ambient temperature.
+    :param loss_coeff: heat loss coefficient [W/mK]
+    :param length: pipe length [m]
+    '''
+    exp = - (loss_coeff * length) / (cp * mdot)
+    return T_amb + (T_in - T_amb) * math.exp(exp)
+
+
+@njit(cache=True)
+def mixing_temperature_kernel(mdot, T):
+    '''
+    Temperature of mixed flows (weighted by mass flow).
+    '''
+    mfsum = 0.
+    mtsum = 0.
+    for i in range(len(mdot)):
+        mfsum += mdot[i]
+        mtsum += mdot[i] * T[i]
+    return (1 / mfsum) * mtsum
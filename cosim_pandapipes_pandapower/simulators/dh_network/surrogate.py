@@ -0,0 +1,216 @@
+# Copyright (c) 2021 by ERIGrid 2.0. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be found in the LICENSE file.
+'''
+Surrogate (reduced-order) variant of the district heating network model.
+
+The surrogate is a polynomial regression of the static network outputs, trained offline on samples
+computed with the exact pandapipes model. During the simulation, inputs outside of the trained envelope
+are computed with the exact model.
+
+Train a surrogate (from directory cosim_pandapipes_pandapower):
+    python -m simulators.dh_network.surrogate --samples 2000 --outfile dh_network_surrogate.npz
+'''
+
+from dataclasses import dataclass
+from itertools import combinations_with_replacement
+import json
+import warnings
+import numpy as np
+from .simulator import DHNetwork
+
+# Inputs of the surrogate model and default sampling range (benchmark operating range).
+SURROGATE_INPUTS = {
+    'mdot_cons1_set': (0.1, 6.0),  # [kg/s]
+    'mdot_cons2_set': (0.1, 6.0),  # [kg/s]
+    'mdot_tank_in_set': (-6.0, 0.0),  # [kg/s]
+    'Qdot_cons1': (0.0, 600.0),  # [kW]
+    'Qdot_cons2': (0.0, 600.0),  # [kW]
+    'Qdot_evap': (0.0, 150.0),  # [kW]
+    'T_tank_forward': (50.0, 85.0),  # [degC]
+}
+
+# Outputs of the surrogate model (mdot_tank_in is derived from mdot_tank_out).
+SURROGATE_OUTPUTS = [
+    'T_return_tank', 'T_evap_in', 'T_return_grid',
+    'T_supply_cons1', 'T_supply_cons2', 'T_return_cons1', 'T_return_cons2',
+    'mdot_cons1', 'mdot_cons2', 'mdot_bypass', 'mdot_grid', 'mdot_tank_out',
+]
+
+# Parameters of the exact model that have to match the ones used for training.
+SURROGATE_MODEL_PARAMS = ['T_amb', 'T_supply_grid', 'P_grid_bar', 'P_hp_bar', 'tank_installed', 'pipe_characteristics',
+                          'constant_fluid', 'T_fluid_ref']
+
+
+class PolynomialSurrogate:
+    '''
+    Multivariate polynomial least-squares fit, with inputs scaled to [-1, 1] within the trained envelope.
+    '''
+
+    def __init__(self, lower, upper, degree, coefficients=None, model_params=None):
+        self.lower = np.asarray(lower, dtype=float)
+        self.upper = np.asarray(upper, dtype=float)
+        self.degree = int(degree)
+        self.coefficients = coefficients
+        self.model_params = model_params or {}
+        self.terms = [
+            term for k in range(1, self.degree + 1)
+            for term in combinations_with_replacement(range(len(self.lower)), k)
+        ]
+
+    def _features(self, x):
+        span = np.where(self.upper > self.lower, self.upper - self.lower, 1.)
+        xs = 2. * (np.atleast_2d(x) - self.lower) / span - 1.
+
+        features = np.ones((xs.shape[0], len(self.terms) + 1))
+        for i, term in enumerate(self.terms, 1):
+            features[:, i] = np.prod(xs[:, term], axis=1)
+        return features
+
+    def fit(self, x, y):
+        self.coefficients, *_ = np.linalg.lstsq(self._features(x), np.atleast_2d(y), rcond=None)
+        return self
+
+    def predict(self, x):
+        return self._features(x) @ self.coefficients
+
+    def is_valid(self, x, tol=1e-9):
+        x = np.asarray(x, dtype=float)
+        return bool(np.all(x >= self.lower - tol) and np.all(x <= self.upper + tol))
+
+    def save(self, file_name):
+        np.savez(
+            file_name, lower=self.lower, upper=self.upper, degree=self.degree,
+            coefficients=self.coefficients, model_params=json.dumps(self.model_params)
+        )
+
+    @classmethod
+    def load(cls, file_name):
+        with np.load(file_name) as data:
+            return cls(
+                data['lower'], data['upper'], data['degree'], data['coefficients'],
+                json.loads(str(data['model_params']))
+            )
+
+
+def sample_training_data(n_samples, bounds=SURROGATE_INPUTS, seed=0, **model_params):
+    '''
+    Sample the input space uniformly and compute the outputs with the exact (static) model.
+    Samples for which the valve controllers do not converge (i.e., infeasible combinations of setpoints) are dropped.
+    :param n_samples: number of samples
+    :param bounds: dict of sampling ranges of all surrogate inputs
+    :param seed: seed of the random number generator
+    :param model_params: parameters of the exact model
+    :return: tuple (inputs, outputs) of arrays of the kept samples
+    '''
+    rng = np.random.default_rng(seed)
+    lower, upper = np.array([bounds[name] for name in SURROGATE_INPUTS]).T
+    x = rng.uniform(lower, upper, size=(n_samples, len(SURROGATE_INPUTS)))
+
+    # Cached results do not tell whether the controllers have converged
+    model = DHNetwork(**dict(model_params, dynamic_temp_flow_enabled=False, cache_enabled=False))
+    y = np.empty((n_samples, len(SURROGATE_OUTPUTS)))
+    converged = np.zeros(n_samples, dtype=bool)
+
+    with warnings.catch_warnings():
+        # Non-converged controllers are reported below
+        warnings.simplefilter('ignore', UserWarning)
+
+        for i, sample in enumerate(x):
+            for name, value in zip(SURROGATE_INPUTS, sample):
+                setattr(model, name, value)
+            model.step_single(i)
+            converged[i] = model.hydraulic_solution is not None
+            y[i] = [getattr(model, name) for name in SURROGATE_OUTPUTS]
+
+    n_dropped = n_samples - np.count_nonzero(converged)
+    if n_dropped == n_samples:
+        raise RuntimeError('Controllers not converged for any of the {} samples.'.format(n_samples))
+    if n_dropped > 0:
+        print('Dropped {} of {} samples (controllers not converged).'.format(n_dropped, n_samples))
+
+    return x[converged], y[converged]
+
+
+def train_surrogate(n_samples, degree=2, bounds=SURROGATE_INPUTS, seed=0, **model_params):
+    '''
+    Train a polynomial surrogate of the static DH network model.
+    '''
+    x, y = sample_training_data(n_samples, bounds, seed, **model_params)
+
+    # The valid envelope of the surrogate is the range of the kept training samples.
+    defaults = DHNetwork.__dataclass_fields__
+    params = {name: model_params.get(name, defaults[name].default) for name in SURROGATE_MODEL_PARAMS}
+    surrogate = PolynomialSurrogate(x.min(axis=0), x.max(axis=0), degree, model_params=params)
+
+    return surrogate.fit(x, y)
+
+
+@dataclass
+class DHNetworkSurrogate(DHNetwork):
+    '''
+    District heating network model using a trained surrogate (static temperature flow only).
+    Inputs outside the trained envelope are computed with the exact pandapipes model.
+    '''
+
+    # Parameters
+    surrogate_file: str = None  # File with trained surrogate (see train_surrogate)
+    dynamic_temp_flow_enabled: bool = False
+
+    # Internal variables
+    surrogate: PolynomialSurrogate = None
+    surrogate_hits: int = 0  # Number of steps computed with the surrogate
+    surrogate_fallbacks: int = 0  # Number of steps computed with the exact model
+
+    def __post_init__(self):
+        if self.dynamic_temp_flow_enabled:
+            raise ValueError('DHNetworkSurrogate does not support dynamic temperature flow')
+
+        super().__post_init__()
+
+        if self.surrogate is None:
+            self.surrogate = PolynomialSurrogate.load(self.surrogate_file)
+
+        for name, value in self.surrogate.model_params.items():
+            if getattr(self, name) != value:
+                raise ValueError(f"Parameter '{name}' ({getattr(self, name)}) does not match the value used to train the surrogate ({value}).")
+
+    def step_single(self, time):
+        x = [getattr(self, name) for name in SURROGATE_INPUTS]
+
+        if not self.surrogate.is_valid(x):
+            self.surrogate_fallbacks += 1
+            super().step_single(time)
+            return
+
+        self.surrogate_hits += 1
+        self.cur_t = time
+
+        # Derived inputs (as in the exact model)
+        self.mdot_tank_out_set = - self.mdot_tank_in_set
+        self.mdot_grid_set = self.mdot_cons1_set + self.mdot_cons2_set + self.mdot_bypass_set - self.mdot_tank_out_set
+
+        # Set output variables
+        for name, value in zip(SURROGATE_OUTPUTS, self.surrogate.predict(x)[0]):
+            setattr(self, name, round(float(value), 2))
+        self.mdot_tank_in = - self.mdot_tank_out
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Train a surrogate of the DH network model.')
+    parser.add_argument('--samples', type=int, default=2000, help='number of training samples')
+    parser.add_argument('--degree', type=int, default=2, help='polynomial degree')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the random number generator')
+    parser.add_argument('--outfile', default='dh_network_surrogate.npz', help='surrogate file name')
+    args = parser.parse_args()
+
+    surrogate = train_surrogate(args.samples, args.degree, seed=args.seed, enable_logging=False)
+    surrogate.save(args.outfile)
+
+    # Validate with independent samples.
+    x, y = sample_training_data(max(args.samples // 5, 1), seed=args.seed + 1, enable_logging=False)
+    error = surrogate.predict(x) - y
+    for name, rmse, max_error in zip(SURROGATE_OUTPUTS, np.sqrt((error**2).mean(axis=0)), np.abs(error).max(axis=0)):
+        print('{:>15}: RMSE {:.4f}, max. error {:.4f}'.format(name, rmse, max_error))
+    print('Saved surrogate to file: {}'.format(args.outfile))
@@ -0,0 +1,212 @@
+# Copyright (c) 2021 by ERIGrid 2.0. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be found in the LICENSE file.
+'''
+Vectorized dynamic temperature flow calculation for pandapipes networks.
+
+Every pipe is discretized into its sections (pandapipes parameter 'sections'). Advection and heat losses to the
+ambient are represented by an implicit first-order upwind scheme, which is assembled into a single sparse system
+together with the (static) mixing of flows at the junctions. Hence, the temperatures of all sections and junctions
+are advanced with one sparse solve per step, independent of the network size.
+
+The mass flows are taken from the hydraulic results of the network (res_pipe, res_valve, res_heat_exchanger).
+'''
+
+import numpy as np
+import scipy.sparse as sparse
+from scipy.sparse.linalg import spsolve
+
+# Branch components supported by the thermal engine (other branch components must not be present).
+SUPPORTED_BRANCHES = ['pipe', 'valve', 'heat_exchanger']
+UNSUPPORTED_BRANCHES = ['pump', 'circ_pump_pressure', 'circ_pump_mass']
+
+MDOT_EPS = 1e-9  # Mass flows below this value are treated as zero flow [kg/s]
+
+
+class ThermalEngine:
+    '''
+    Sparse implicit upwind model of the temperature flow in a pandapipes network.
+    :param net: pandapipes network (topology and pipe parameters are read once)
+    :param cp: specific heat capacity of the fluid [J/(kgK)]
+    :param rho: density of the fluid [kg/m^3] (default: density of the network fluid at the initial temperature)
+    '''
+
+    def __init__(self, net, cp=4186, rho=None):
+        for table in UNSUPPORTED_BRANCHES:
+            if table in net and len(net[table]) > 0:
+                raise NotImplementedError(f"Thermal engine does not support component '{table}'.")
+
+        self.cp = cp
+
+        # Junctions
+        self.junction_index = {j: i for i, j in enumerate(net.junction.index)}
+        self.n_junctions = len(net.junction)
+        t_init = net.junction['tfluid_k'].values.astype(float)
+
+        if rho is None:
+            rho = float(np.mean(net.fluid.get_density(t_init)))
+        self.rho = rho
+
+        # Pipes and sections
+        pipe = net.pipe
+        self.pipe_from = self._junctions(pipe['from_junction'])
+        self.pipe_to = self._junctions(pipe['to_junction'])
+        n_sec = pipe['sections'].values.astype(int)
+        self.first_section = np.concatenate([[0], np.cumsum(n_sec)[:-1]]).astype(int)
+        self.last_section = self.first_section + n_sec - 1
+        self.n_sections = int(n_sec.sum())
+
+        sec_pipe = np.repeat(np.arange(len(pipe)), n_sec)
+        self.section_pipe = sec_pipe
+        self.section_pos = np.arange(self.n_sections) - self.first_section[sec_pipe]
+
+        dx = pipe['length_km'].values * 1000 / n_sec
+        area = np.pi * pipe['diameter_m'].values ** 2 / 4
+        self.section_capacity = (rho * area * dx * cp)[sec_pipe]  # Heat capacity of sections [J/K]
+        self.section_loss = (pipe['alpha_w_per_m2k'].values * np.pi * pipe['diameter_m'].values * dx)[sec_pipe]  # [W/K]
+        self.section_t_amb = pipe['text_k'].values[sec_pipe]
+
+        # Junctions with fixed temperature (external grids of type 'pt' or 't')
+        ext_grid = net.ext_grid[net.ext_grid['type'].str.contains('t')]
+        self.fixed_junctions = self._junctions(ext_grid['junction'])
+        self.fixed_ext_grids = ext_grid.index
+
+        # State: temperatures of sections and junctions
+        self.t_junction = t_init
+        self.t_section = t_init[self.pipe_from][sec_pipe]
+        self.last_time = None
+
+    def _junctions(self, junctions):
+        return np.array([self.junction_index[j] for j in junctions], dtype=int)
+
+    def step(self, net, time):
+        '''
+        Advance the temperatures to the given time and write them to the results of the network.
+        The first step calculates the steady state.
+        :param net: pandapipes network with hydraulic results
+        :param time: current time [s]
+        '''
+        dt = None if self.last_time is None or time <= self.last_time else time - self.last_time
+        self.last_time = time
+
+        n_s = self.n_sections
+        n = n_s + self.n_junctions
+        cp = self.cp
+        rows, cols, vals = [], [], []
+        b = np.zeros(n)
+
+        # Sections: C (T - T_old) / dt = mdot cp (T_up - T) - k (T - T_amb)
+        mdot_pipe = net.res_pipe['mdot_from_kg_per_s'].reindex(net.pipe.index).fillna(0).values
+        mdot_sec = mdot_pipe[self.section_pipe]
+        forward = mdot_sec >= 0
+        flowing = np.abs(mdot_sec) > MDOT_EPS
+        storage = self.section_capacity / dt if dt is not None else np.zeros(n_s)
+        advection = np.where(flowing, np.abs(mdot_sec) * cp, 0.)
+
+        diag = storage + advection + self.section_loss
+        b[:n_s] = storage * self.t_section + self.section_loss * self.section_t_amb
+
+        # Without any flow, heat capacity and losses, keep the temperature
+        idle = diag <= 0
+        diag[idle] = 1.
+        b[:n_s][idle] = self.t_section[idle]
+
+        sec = np.arange(n_s)
+        rows.append(sec)
+        cols.append(sec)
+        vals.append(diag)
+
+        pos = self.section_pos
+        last_pos = self.last_section[self.section_pipe] - self.first_section[self.section_pipe]
+        upstream = np.where(
+            forward,
+            np.where(pos > 0, sec - 1, n_s + self.pipe_from[self.section_pipe]),
+            np.where(pos < last_pos, sec + 1, n_s + self.pipe_to[self.section_pipe])
+        )
+        rows.append(sec[flowing])
+        cols.append(upstream[flowing])
+        vals.append(-advection[flowing])
+
+        # Junctions: sum(mdot_in) T_j - sum(mdot_in T_in) = - sum(Q_in) / cp (mixing of incoming flows)
+        inflow = np.zeros(self.n_junctions)
+        src_rows, src_cols, src_vals = [], [], []
+
+        # Pipe outlets
+        pipe_flowing = np.abs(mdot_pipe) > MDOT_EPS
+        pipe_forward = mdot_pipe >= 0
+        outlet_junction = np.where(pipe_forward, self.pipe_to, self.pipe_from)[pipe_flowing]
+        outlet_section = np.where(pipe_forward, self.last_section, self.first_section)[pipe_flowing]
+        np.add.at(inflow, outlet_junction, np.abs(mdot_pipe[pipe_flowing]))
+        src_rows.append(outlet_junction)
+        src_cols.append(outlet_section)
+        src_vals.append(np.abs(mdot_pipe[pipe_flowing]))
+
+        # Valves (without heat capacity) and heat exchangers (with heat extraction)
+        for table in ['valve', 'heat_exchanger']:
+            if table not in net or len(net[table]) == 0:
+                continue
+
+            comp = net[table]
+            mdot = net['res_' + table]['mdot_from_kg_per_s'].reindex(comp.index).fillna(0).values
+            active = np.abs(mdot) > MDOT_EPS
+            if table == 'valve':
+                active &= comp['opened'].values.astype(bool)
+
+            from_j = self._junctions(comp['from_junction'])
+            to_j = self._junctions(comp['to_junction'])
+            inlet = np.where(mdot >= 0, from_j, to_j)[active]
+            outlet = np.where(mdot >= 0, to_j, from_j)[active]
+
+            np.add.at(inflow, outlet, np.abs(mdot[active]))
+            src_rows.append(outlet)
+            src_cols.append(n_s + inlet)
+            src_vals.append(np.abs(mdot[active]))
+
+            if table == 'heat_exchanger':
+                np.add.at(b, n_s + outlet, - comp['qext_w'].values[active] / cp)
+
+        mixing = inflow > MDOT_EPS
+        fixed = np.zeros(self.n_junctions, dtype=bool)
+        fixed[self.fixed_junctions] = True
+        mixing &= ~fixed
+
+        junctions = np.arange(self.n_junctions)
+        rows.append(n_s + junctions)
+        cols.append(n_s + junctions)
+        vals.append(np.where(mixing, inflow, 1.))
+
+        src_rows = np.concatenate(src_rows)
+        src_cols = np.concatenate(src_cols)
+        src_vals = np.concatenate(src_vals)
+        keep = mixing[src_rows]
+        rows.append(n_s + src_rows[keep])
+        cols.append(src_cols[keep])
+        vals.append(-src_vals[keep])
+
+        # Junctions with fixed temperature keep the temperature of the external grid, junctions without inflow
+        # keep their last temperature (this also discards heat extraction added above for these junctions)
+        t_fixed = self.t_junction.copy()
+        t_fixed[self.fixed_junctions] = net.ext_grid.loc[self.fixed_ext_grids, 't_k'].values
+        b[n_s:][~mixing] = t_fixed[~mixing]
+
+        a = sparse.csr_matrix(
+            (np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))), shape=(n, n))
+        x = spsolve(a, b)
+
+        self.t_section = x[:n_s]
+        self.t_junction = x[n_s:]
+
+        self._write_results(net, mdot_pipe)
+
+    def _write_results(self, net, mdot_pipe):
+        net.res_junction.loc[net.junction.index, 't_k'] = self.t_junction
+
+        forward = mdot_pipe >= 0
+        t_first = self.t_section[self.first_section]
+        t_last = self.t_section[self.last_section]
+        net.res_pipe.loc[net.pipe.index, 't_from_k'] = np.where(forward, self.t_junction[self.pipe_from], t_first)
+        net.res_pipe.loc[net.pipe.index, 't_to_k'] = np.where(forward, t_last, self.t_junction[self.pipe_to])
+
+        if 'heat_exchanger' in net and len(net.heat_exchanger) > 0:
+            hex = net.heat_exchanger
+            net.res_heat_exchanger.loc[hex.index, 't_from_k'] = self.t_junction[self._junctions(hex['from_junction'])]
+            net.res_heat_exchanger.loc[hex.index, 't_to_k'] = self.t_junction[self._junctions(hex['to_junction'])]
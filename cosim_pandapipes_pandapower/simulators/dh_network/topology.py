@@ -0,0 +1,258 @@
+# Copyright (c) 2021 by ERIGrid 2.0. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be found in the LICENSE file.
+'''
+Data-driven construction of pandapipes district heating networks.
+
+A network is described by tables (pandas data frames) of junctions, pipes, valves, heat exchangers (consumers and
+heat pump evaporator), external grids, sinks and sources. Elements refer to junctions by name. The tables are
+turned into a network with one bulk creation call per element type (see build_network).
+
+Two topologies are provided:
+ * benchmark_tables: the network of the ERIGrid 2.0 multi-energy benchmark (two consumers, heat pump and storage
+   tank connection, bypass), with pipe parameters optionally read from a pipe characteristics file (same format as
+   pandapipes_standalone/resources/network_characteristics/pipe_characteristics.csv).
+ * feeder_tables: synthetic radial feeders with N substations each (e.g., for scaling tests).
+'''
+
+import pathlib
+
+import numpy as np
+import pandas as pd
+import pandapipes as pp
+from pandapipes.properties.fluids import Fluid, call_lib, create_constant_fluid, _add_fluid_to_net
+
+# Pipe characteristics of the standalone pandapipes model (name, length [km], diameter [m], roughness [mm], alpha [W/(m2K)]).
+PIPE_CHARACTERISTICS_FILE = pathlib.Path(__file__).resolve().parents[3] / 'pandapipes_standalone' / 'resources' / 'network_characteristics' / 'pipe_characteristics.csv'
+
+T_EXT_K = 273.15 + 8  # Temperature outside of the pipes [K]
+SECTION_LENGTH_KM = 0.1  # Length of pipe sections (pipes have at least one section) [km]
+RHO_WATER = 975  # Density of water for sizing pipes [kg/m3]
+
+# Junctions of the benchmark network (name, x, y).
+BENCHMARK_JUNCTIONS = [
+    ('n1s', 0, 1), ('n1r', 0, -2.1), ('n2s', 3, 1), ('n2r', 3, -2.1), ('n3s', 6, 1),
+    ('n3s_tank', 6, 3),  # hp+tank injection point
+    ('n3sv', 6, 1.4),  # tank valve
+    ('n3r', 6, -2.1), ('n3r_tank', 6, -4.1), ('n4s', 10, 1), ('n4r', 11, -2.1),
+    ('n5sv', 10, 1.5), ('n5s', 10, 4), ('n5r', 11, 4), ('n6s', 15, 1), ('n6r', 16, -2.1),
+    ('n7sv', 15, 1.5), ('n7s', 15, 4), ('n7r', 16, 4), ('n8s', 19, 1), ('n8r', 19, -2.1),
+]
+
+# Pipes of the benchmark network (name, from junction, to junction, length [km]).
+BENCHMARK_PIPES = [
+    # supply pipes
+    ('l1s', 'n1s', 'n2s', 0.5),
+    ('l1s_tank', 'n3sv', 'n3s', 0.01),  # tank pipe connection
+    ('l2s', 'n3s', 'n4s', 0.5),
+    ('l3s', 'n4s', 'n5sv', 0.01),
+    ('l4s', 'n4s', 'n6s', 0.5),
+    ('l5s', 'n6s', 'n7sv', 0.01),
+    ('l6s', 'n6s', 'n8s', 0.01),
+    # return pipes
+    ('l1r', 'n2r', 'n1r', 0.5),
+    ('l1r_tank', 'n3r', 'n3r_tank', 0.01),  # tank pipe connection
+    ('l2r', 'n4r', 'n3r', 0.5),
+    ('l3r', 'n5r', 'n4r', 0.01),
+    ('l4r', 'n6r', 'n4r', 0.5),
+    ('l5r', 'n7r', 'n6r', 0.01),
+    ('l6r', 'n8r', 'n6r', 0.01),
+]
+
+def constant_property_fluid(fluid='water', T_ref_k=273.15 + 60):
+    '''
+    Fluid with constant density, viscosity and heat capacity, taken from the library fluid at a reference
+    temperature (instead of interpolating the temperature-dependent properties in every pipeflow iteration).
+    :param fluid: name of the library fluid
+    :param T_ref_k: reference temperature [K]
+    '''
+    lib_fluid = call_lib(fluid)
+    return create_constant_fluid(
+        '%s_constant' % fluid, lib_fluid.fluid_type,
+        density=float(lib_fluid.get_density(T_ref_k)),
+        viscosity=float(lib_fluid.get_viscosity(T_ref_k)),
+        heat_capacity=float(lib_fluid.get_heat_capacity(T_ref_k))
+    )
+
+
+TABLES = ['junction', 'pipe', 'valve', 'heat_exchanger', 'ext_grid', 'sink', 'source']
+
+
+def read_pipe_characteristics(file_name=PIPE_CHARACTERISTICS_FILE):
+    '''
+    Read pipe characteristics (columns name, length [km], diameter [m], roughness [mm], alpha [W/(m2K)]).
+    :return: data frame indexed by pipe name with columns length_km, diameter_m, k_mm, alpha_w_per_m2k
+    '''
+    df = pd.read_csv(file_name, index_col=0)
+    df = df.rename(columns={'length': 'length_km', 'diameter': 'diameter_m', 'roughness': 'k_mm', 'alpha': 'alpha_w_per_m2k'})
+    return df.set_index('name')[['length_km', 'diameter_m', 'k_mm', 'alpha_w_per_m2k']]
+
+
+def pipe_table(pipes, diameter_m=0.1, k_mm=0.01, alpha_w_per_m2k=1.5, text_k=T_EXT_K, pipe_characteristics=None):
+    '''
+    Table of pipes with the given default parameters, overridden by pipe characteristics (matched by name).
+    Every pipe is divided into sections of SECTION_LENGTH_KM.
+    :param pipes: list of tuples (name, from junction, to junction, length [km])
+    '''
+    df = pd.DataFrame(pipes, columns=['name', 'from_junction', 'to_junction', 'length_km'])
+    df['diameter_m'] = diameter_m
+    df['k_mm'] = k_mm
+    df['alpha_w_per_m2k'] = alpha_w_per_m2k
+
+    if pipe_characteristics is not None:
+        df = df.set_index('name')
+        df.update(pipe_characteristics)
+        df = df.reset_index()
+
+    df['sections'] = np.maximum(1, np.round(df['length_km'] / SECTION_LENGTH_KM)).astype(int)
+    df['text_k'] = text_k
+    return df
+
+
+def benchmark_tables(
+        T_supply_grid=75, P_grid_bar=6, P_hp_bar=6, T_tank_forward=70, mdot_grid=7.5, mdot_tank_out=0,
+        Qdot_cons1=500, Qdot_cons2=500, Qdot_evap=0, tank_installed=True, pipe_characteristics=None):
+    '''
+    Tables of the benchmark network (temperatures in degC, heat in kW, see DHNetwork).
+    :param pipe_characteristics: data frame of pipe characteristics (see read_pipe_characteristics), which
+        override the default pipe parameters
+    '''
+    t_supply_grid_k = 273.15 + T_supply_grid
+
+    junction = pd.DataFrame(BENCHMARK_JUNCTIONS, columns=['name', 'x', 'y'])
+    junction['pn_bar'] = P_grid_bar
+    junction['tfluid_k'] = t_supply_grid_k
+
+    valve = [('grid_v1', 'n2s', 'n3s', 1000)]  # grid connector valves
+    if not tank_installed:
+        valve.append(('grid_v2', 'n3r', 'n2r', 0))
+    valve += [('sub_v1', 'n5sv', 'n5s', 1000), ('sub_v2', 'n7sv', 'n7s', 1000)]  # substation control valves
+    if tank_installed:
+        valve.append(('tank_v1', 'n3s_tank', 'n3sv', 1000))
+    valve.append(('bypass', 'n8s', 'n8r', 1000))
+
+    heat_exchanger = [('hex1', 'n5s', 'n5r', Qdot_cons1 * 1000), ('hex2', 'n7s', 'n7r', Qdot_cons2 * 1000)]
+    ext_grid = [('ext_grid', 'n1s', P_grid_bar, t_supply_grid_k)]
+    sink = [('sink_grid', 'n1r', mdot_grid)]
+    source = [('source_grid', 'n1r', 0)]
+
+    if tank_installed:
+        heat_exchanger.append(('hp_evap', 'n3r', 'n2r', Qdot_evap * 1000))
+        ext_grid.append(('supply_tank', 'n3s_tank', P_hp_bar, T_tank_forward + 273.15))
+        sink.append(('sink_tank', 'n3r_tank', mdot_tank_out))
+
+    return _tables(junction, pipe_table(BENCHMARK_PIPES, pipe_characteristics=pipe_characteristics),
+                   valve, heat_exchanger, ext_grid, sink, source)
+
+
+def feeder_tables(
+        n_consumers, n_feeders=1, T_supply_grid=75, P_grid_bar=6, Qdot_cons=100, mdot_cons=1, mdot_bypass=0.5,
+        length_km=0.1, diameter_m=None, velocity_m_per_s=1.5, k_mm=0.01, alpha_w_per_m2k=1.5):
+    '''
+    Tables of a network with radial feeders (supply and return lines) from a common external grid.
+    Every feeder connects n_consumers substations (control valve and heat exchanger) and ends in a bypass valve.
+    The sink at the return of the external grid draws the mass flow of all consumers and bypasses.
+    :param Qdot_cons: heat consumption per consumer [kW]
+    :param mdot_cons: mass flow per consumer [kg/s]
+    :param length_km: length of the pipe segments between substations [km]
+    :param diameter_m: diameter of all pipes [m], by default every pipe segment is sized for the mass flow of the
+        downstream substations at the given flow velocity
+    '''
+    t_supply_grid_k = 273.15 + T_supply_grid
+
+    junction = [('n0s', 0, 1), ('n0r', 0, -1)]
+    pipes, valve, heat_exchanger, mdot = [], [], [], []
+
+    for f in range(n_feeders):
+        prev_s, prev_r = 'n0s', 'n0r'
+        for i in range(1, n_consumers + 1):
+            s, r, sv = 'f%d_n%ds' % (f, i), 'f%d_n%dr' % (f, i), 'f%d_n%dsv' % (f, i)
+            junction += [(s, i, 1 + 3 * f), (r, i, -1 - 3 * f), (sv, i, 2 + 3 * f)]
+
+            pipes += [('f%d_l%ds' % (f, i), prev_s, s, length_km), ('f%d_l%dr' % (f, i), r, prev_r, length_km)]
+            mdot += 2 * [(n_consumers - i + 1) * mdot_cons + mdot_bypass]
+            valve.append(('f%d_sub_v%d' % (f, i), s, sv, 1000))
+            heat_exchanger.append(('f%d_hex%d' % (f, i), sv, r, Qdot_cons * 1000))
+            prev_s, prev_r = s, r
+
+        valve.append(('f%d_bypass' % f, prev_s, prev_r, 1000))
+
+    junction = pd.DataFrame(junction, columns=['name', 'x', 'y'])
+    junction['pn_bar'] = P_grid_bar
+    junction['tfluid_k'] = t_supply_grid_k
+
+    pipe = pipe_table(pipes, 0.1 if diameter_m is None else diameter_m, k_mm, alpha_w_per_m2k)
+    if diameter_m is None:
+        pipe['diameter_m'] = np.sqrt(4 * np.array(mdot) / (RHO_WATER * np.pi * velocity_m_per_s))
+
+    mdot_grid = n_feeders * (n_consumers * mdot_cons + mdot_bypass)
+    return _tables(
+        junction, pipe,
+        valve, heat_exchanger,
+        [('ext_grid', 'n0s', P_grid_bar, t_supply_grid_k)], [('sink_grid', 'n0r', mdot_grid)], []
+    )
+
+
+def _tables(junction, pipe, valve, heat_exchanger, ext_grid, sink, source):
+    return {
+        'junction': junction,
+        'pipe': pipe,
+        'valve': pd.DataFrame(valve, columns=['name', 'from_junction', 'to_junction', 'loss_coefficient']),
+        'heat_exchanger': pd.DataFrame(heat_exchanger, columns=['name', 'from_junction', 'to_junction', 'qext_w']),
+        'ext_grid': pd.DataFrame(ext_grid, columns=['name', 'junction', 'p_bar', 't_k']),
+        'sink': pd.DataFrame(sink, columns=['name', 'junction', 'mdot_kg_per_s']),
+        'source': pd.DataFrame(source, columns=['name', 'junction', 'mdot_kg_per_s']),
+    }
+
+
+def build_network(tables, diameter_m=0.1, fluid='water'):
+    '''
+    Create a pandapipes network from tables (see benchmark_tables).
+    Junctions, pipes, valves, sinks and sources are created with one bulk call each. Heat exchangers and
+    external grids are created one by one (pandapipes 0.4 has no bulk functions for them).
+    :param diameter_m: diameter of valves and heat exchangers [m]
+    :param fluid: name of a library fluid or fluid instance (e.g., see constant_property_fluid)
+    '''
+    net = pp.create_empty_network('net', add_stdtypes=False)
+    if isinstance(fluid, Fluid):
+        _add_fluid_to_net(net, fluid, overwrite=True)
+    else:
+        pp.create_fluid_from_lib(net, fluid, overwrite=True)
+
+    junction = tables['junction']
+    index = pp.create_junctions(
+        net, len(junction), pn_bar=junction['pn_bar'].values, tfluid_k=junction['tfluid_k'].values,
+        name=junction['name'].values, geodata=list(zip(junction['x'], junction['y'])))
+    junctions = pd.Series(index, index=junction['name'].values)
+    if not junctions.index.is_unique:
+        raise ValueError('duplicate junction names')
+
+    pipe = tables['pipe']
+    if len(pipe):
+        pp.create_pipes_from_parameters(
+            net, junctions[pipe['from_junction']].values, junctions[pipe['to_junction']].values,
+            length_km=pipe['length_km'].values, diameter_m=pipe['diameter_m'].values, k_mm=pipe['k_mm'].values,
+            sections=pipe['sections'].values, alpha_w_per_m2k=pipe['alpha_w_per_m2k'].values,
+            text_k=pipe['text_k'].values, name=pipe['name'].values)
+
+    valve = tables['valve']
+    if len(valve):
+        pp.create_valves(
+            net, junctions[valve['from_junction']].values, junctions[valve['to_junction']].values,
+            diameter_m=diameter_m, opened=True, loss_coefficient=valve['loss_coefficient'].values,
+            name=valve['name'].values)
+
+    for hx in tables['heat_exchanger'].itertuples():
+        pp.create_heat_exchanger(net, from_junction=junctions[hx.from_junction], to_junction=junctions[hx.to_junction],
+                                 diameter_m=diameter_m, qext_w=hx.qext_w, name=hx.name)
+
+    for ext_grid in tables['ext_grid'].itertuples():
+        pp.create_ext_grid(net, junction=junctions[ext_grid.junction], p_bar=ext_grid.p_bar, t_k=ext_grid.t_k,
+                           name=ext_grid.name, type='pt')
+
+    for table, create in (('sink', pp.create_sinks), ('source', pp.create_sources)):
+        df = tables[table]
+        if len(df):
+            create(net, junctions[df['junction']].values, mdot_kg_per_s=df['mdot_kg_per_s'].values,
+                   name=df['name'].values)
+
+    return net
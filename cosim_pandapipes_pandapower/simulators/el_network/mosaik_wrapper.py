@@ -129,7 +129,7 @@ class ElectricNetworkSimulator(mosaik_api.Simulator):
         self._ppcs = []  # The pandapower cases
         self._cache = {}  # Cache for load flow outputs
 
-    def init(self, sid, step_size, mode, pos_loads=True):
+    def init(self, sid, step_size, mode, pos_loads=True, sensitivity_injection_tol=0.01, sensitivity_error_tol=1e-3):
         #TODO: check if we need to change signs or we leave it
         logger.debug('Power flow will be computed every %d seconds.' %
                      step_size)
@@ -140,6 +140,10 @@ class ElectricNetworkSimulator(mosaik_api.Simulator):
         self.step_size = step_size
         self.mode = mode
 
+        # Sensitivity-based estimation of the power flow results (full power flow only for larger changes).
+        if mode == 'pf_sensitivity':
+            self.simulator.init_sensitivity(sensitivity_injection_tol, sensitivity_error_tol)
+
         return self.meta
 
     def create(self, num, modelname, gridfile, sheetnames=None):
@@ -198,6 +202,8 @@ class ElectricNetworkSimulator(mosaik_api.Simulator):
             self.simulator.powerflow_timeseries(self.time_step_index)
         elif self.mode == 'pf':
             self.simulator.powerflow()
+        elif self.mode == 'pf_sensitivity':
+            self.simulator.powerflow_sensitivity()
 
         self._cache = self.simulator.get_cache_entries()
 
@@ -218,5 +224,13 @@ class ElectricNetworkSimulator(mosaik_api.Simulator):
 
         return data
 
+    def finalize(self):
+        if self.mode == 'pf_sensitivity':
+            report = self.simulator.get_sensitivity_report()
+            print('Sensitivity-based power flow: {0} full solves, {1} estimations, {2} linearizations'.format(
+                report['full_solves'], report['estimations'], report['linearizations']))
+            print('Voltage estimation error (checked in {0} steps): max {1:.2e} p.u., mean {2:.2e} p.u.'.format(
+                report['checked_estimations'], report['max_error_vm_pu'], report['mean_error_vm_pu']))
+
 def main():
     mosaik_api.start_simulation(ElectricNetworkSimulator(), 'The mosaik pandapower adapter')
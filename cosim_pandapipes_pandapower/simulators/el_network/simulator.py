@@ -6,7 +6,9 @@ This is a modified version of the Mosaik Pandapower module.
 
 import json
 import os.path
+import pickle
 
+import numpy as np
 import pandas as pd
 import pandapower as pp
 from pandapower.timeseries import DFData
@@ -14,10 +16,18 @@ from pandapower.timeseries import OutputWriter
 from pandapower.control import ConstControl
 from pandapower.timeseries.run_time_series import run_time_step, init_time_series
 
+# Inputs and results of the sensitivity-based estimation (tables and columns of the pandapower network).
+SENSITIVITY_INJECTIONS = [('load', 'p_mw'), ('load', 'q_mvar'), ('sgen', 'p_mw'), ('sgen', 'q_mvar')]
+SENSITIVITY_RESULTS = [('res_bus', 'vm_pu'), ('res_line', 'loading_percent'), ('res_line', 'i_ka')]
+
+# Pickled networks, parsed once per grid file (see load_grid).
+GRID_TEMPLATES = {}
+
 class Pandapower(object):
 
     def __init__(self):
         self.entity_map={}
+        self.sensitivity = None
 
 
     def load_case(self,path,grid_idx):
@@ -25,22 +35,7 @@ class Pandapower(object):
         Loads a pandapower network, the network should be ready in a separate json or excel file
         TODO: pypower converter and network building with only parameter as input
         '''
-        loaders = {
-          '.json': 1,
-          '.xlsx': 2,
-          # '': 3
-          }
-
-        try:
-           ext = os.path.splitext(path)[-1]
-           loader = loaders[ext]
-        except KeyError:
-            raise ValueError('Don\'t know how to open "{}"'.format(path))
-
-        if loader == 1:
-            self.net = pp.from_json(path)
-        elif loader == 2:
-            self.net = pp.from_excel(path)
+        self.net = load_grid(path)
 
         self.bus_id = self.net.bus.name.to_dict()
 
@@ -314,6 +309,154 @@ class Pandapower(object):
         run_time_step(self.net, time_step, self.ts_variables, _ppc=True, is_elements=True)
 
 
+    def init_sensitivity(self, injection_tol=0.01, error_tol=1e-3, delta=1e-3):
+        '''
+        Enable the sensitivity-based estimation of the power flow results (see powerflow_sensitivity).
+        :param injection_tol: max. change of any injection (active and reactive power of loads and static
+            generators) since the last full power flow before a new full power flow is triggered [MW, MVAr]
+        :param error_tol: max. predicted (or observed) error of the estimated bus voltages [p.u.]
+        :param delta: perturbation of the injections for computing the sensitivities [MW, MVAr]
+        '''
+        self.sensitivity = {
+            'injection_tol': injection_tol,
+            'error_tol': error_tol,
+            'delta': delta,
+            'matrix': None,  # Sensitivities of the results with respect to the injections
+            'injections_ref': None,  # Injections at the operating point (last full power flow)
+            'results_ref': None,  # Results at the operating point
+            'in_service_ref': None,
+            'curvature': 0.,  # Ratio of observed estimation error and squared injection change
+        }
+        self.sensitivity_stats = {
+            'full_solves': 0,  # Full power flow calculations (Newton-Raphson)
+            'estimations': 0,  # Steps with estimated results
+            'linearizations': 0,  # Computations of the sensitivity matrix
+            'checked_estimations': 0,  # Estimations compared to a subsequent full power flow
+            'max_error_vm_pu': 0.,
+            'sum_error_vm_pu': 0.,
+        }
+
+
+    def powerflow_sensitivity(self):
+        '''
+        Conduct power flow, using the linear sensitivities of the results (bus voltages, line currents and
+        loadings) with respect to the injections at the last operating point where possible.
+        A full power flow is only conducted in case the change of an injection exceeds the injection tolerance,
+        the predicted error bound (curvature times the squared injection change) exceeds the error tolerance
+        or elements are switched. The sensitivities are re-computed in case the error of the estimation compared
+        to the full power flow exceeds the error tolerance.
+        '''
+        sens = self.sensitivity
+        stats = self.sensitivity_stats
+
+        injections = self._get_injections()
+        in_service = self._get_in_service()
+
+        if sens['matrix'] is None or not np.array_equal(in_service, sens['in_service_ref']):
+            self._powerflow_linearize(injections, in_service)
+            return
+
+        delta = injections - sens['injections_ref']
+        norm = np.abs(delta).sum()
+        estimate = sens['results_ref'] + sens['matrix'].dot(delta)
+
+        if np.abs(delta).max() <= sens['injection_tol'] and sens['curvature'] * norm**2 <= sens['error_tol']:
+            self._set_estimated_results(estimate)
+            stats['estimations'] += 1
+            return
+
+        # Full power flow, compare with the estimation.
+        pp.runpp(self.net, init='results')
+        stats['full_solves'] += 1
+
+        n_bus = len(self.net.res_bus)
+        error = np.nanmax(np.abs(estimate[:n_bus] - self._get_results()[:n_bus]))
+        stats['checked_estimations'] += 1
+        stats['max_error_vm_pu'] = max(stats['max_error_vm_pu'], error)
+        stats['sum_error_vm_pu'] += error
+
+        if error > sens['error_tol']:
+            self._powerflow_linearize(injections, in_service, solved=True)
+        else:
+            sens['curvature'] = error / norm**2 if norm > 0 else sens['curvature']
+            sens['injections_ref'] = injections
+            sens['results_ref'] = self._get_results()
+
+
+    def _powerflow_linearize(self, injections, in_service, solved=False):
+        '''
+        Full power flow at the current operating point and sensitivities of the results with respect to the
+        injections (finite differences, each perturbed power flow starts from the results of the operating point).
+        '''
+        sens = self.sensitivity
+        delta = sens['delta']
+
+        if not solved:
+            pp.runpp(self.net)
+            self.sensitivity_stats['full_solves'] += 1
+
+        results = self._get_results()
+
+        columns = []
+        for table, column in SENSITIVITY_INJECTIONS:
+            for idx in self.net[table].index:
+                value = self.net[table].at[idx, column]
+                self.net[table].at[idx, column] = value + delta
+                pp.runpp(self.net, init='results')
+                columns.append((self._get_results() - results) / delta)
+                self.net[table].at[idx, column] = value
+
+        # Restore the results at the operating point.
+        self._set_estimated_results(results)
+
+        sens['matrix'] = np.column_stack(columns) if columns else np.zeros((len(results), 0))
+        sens['injections_ref'] = injections
+        sens['results_ref'] = results
+        sens['in_service_ref'] = in_service
+        self.sensitivity_stats['linearizations'] += 1
+
+
+    def _get_injections(self):
+        return np.concatenate([self.net[table][column].values for table, column in SENSITIVITY_INJECTIONS]).astype(float)
+
+
+    def _get_in_service(self):
+        return np.concatenate([self.net[table]['in_service'].values for table in ('load', 'sgen', 'line', 'trafo')])
+
+
+    def _get_results(self):
+        return np.concatenate([self.net[table][column].values for table, column in SENSITIVITY_RESULTS]).astype(float)
+
+
+    def _set_estimated_results(self, values):
+        '''
+        Write estimated results to the result tables. Results of loads and static generators follow directly
+        from their inputs, all other results keep the values of the last full power flow.
+        '''
+        start = 0
+        for table, column in SENSITIVITY_RESULTS:
+            n = len(self.net[table])
+            self.net[table][column] = values[start:start + n]
+            start += n
+
+        for table in ('load', 'sgen'):
+            element = self.net[table]
+            for column in ('p_mw', 'q_mvar'):
+                self.net['res_' + table][column] = element[column] * element['scaling'] * element['in_service']
+
+
+    def get_sensitivity_report(self):
+        '''
+        Solve counts and errors of the sensitivity-based estimation (errors are only known for estimations that
+        are followed by a full power flow).
+        '''
+        stats = dict(self.sensitivity_stats)
+        checked = stats.pop('checked_estimations')
+        stats['mean_error_vm_pu'] = stats.pop('sum_error_vm_pu') / checked if checked else float('nan')
+        stats['checked_estimations'] = checked
+        return stats
+
+
     def get_cache_entries(self):
         '''cache the results of the power flow to be communicated to other simulators'''
 
@@ -380,6 +523,29 @@ class Pandapower(object):
         return cache
 
 
+def load_grid(path):
+    '''
+    Load a pandapower network from a json or excel file.
+    The file is only parsed once (per modification time), further calls return a copy of the parsed network.
+    '''
+    loaders = {
+        '.json': pp.from_json,
+        '.xlsx': pp.from_excel,
+    }
+
+    try:
+        ext = os.path.splitext(path)[-1]
+        loader = loaders[ext]
+    except KeyError:
+        raise ValueError('Don\'t know how to open "{}"'.format(path))
+
+    key = (os.path.abspath(path), os.path.getmtime(path))
+    if key not in GRID_TEMPLATES:
+        GRID_TEMPLATES[key] = pickle.dumps(loader(path), protocol=pickle.HIGHEST_PROTOCOL)
+
+    return pickle.loads(GRID_TEMPLATES[key])
+
+
 def make_eid(name, grid_idx):
     return '%s_%s' % (name, grid_idx)
 
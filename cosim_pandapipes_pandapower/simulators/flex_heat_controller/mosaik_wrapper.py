@@ -6,6 +6,7 @@ Model of the power-to-heat facility controller.
 
 from itertools import count
 from .simulator import SimpleFlexHeatController
+from ..util import get_simulator_state, set_simulator_state, create_model
 from mosaik_api import Simulator
 from typing import Dict
 
@@ -13,7 +14,7 @@ META = {
     'models': {
         'SimpleFlexHeatController': {
             'public': True,
-            'params': ['voltage_control_enabled'],
+            'params': ['voltage_control_enabled', 'replicas', 'replica_params'],
             'attrs': [
                 # Input
                 'mdot_HEX1', 'mdot_HEX2', 'T_tank_hot', 'T_hp_cond_in', 'T_hp_cond_out', 'T_hp_evap_in', 'T_hp_evap_out',
@@ -26,6 +27,7 @@ META = {
                 ],
             },
         },
+    'extra_methods': ['get_state', 'set_state'],
     }
 
 
@@ -60,7 +62,7 @@ class SimpleFlexHeatControllerSimulator(Simulator):
             eid = '%s_%s' % (self.eid_prefix, next(counter))
 
             self.entityparams[eid] = model_params
-            esim = SimpleFlexHeatController(**model_params)
+            esim = create_model(SimpleFlexHeatController, **model_params)
 
             self.simulators[eid] = esim
 
@@ -112,6 +114,12 @@ class SimpleFlexHeatControllerSimulator(Simulator):
 
         return data
 
+    def get_state(self):
+        return get_simulator_state(self)
+
+    def set_state(self, state, time_offset=0):
+        set_simulator_state(self, state, time_offset)
+
 
 if __name__ == '__main__':
 
@@ -6,6 +6,7 @@ Model of the heat exchanger substation at the consumer side.
 
 from itertools import count
 from .simulator import HEXConsumer
+from ..util import get_simulator_state, set_simulator_state, create_model
 from mosaik_api import Simulator
 from typing import Dict
 
@@ -15,6 +16,8 @@ META = {
             'public': True,
             'params': [
                 'T_return_target', 'P_heat', 'mdot_hex_in', 'mdot_hex_out',
+                # Ensemble of replicas
+                'replicas', 'replica_params',
             ],
             'attrs': [
                 # Input
@@ -24,6 +27,7 @@ META = {
             ],
         },
     },
+    'extra_methods': ['get_state', 'set_state'],
 }
 
 
@@ -59,7 +63,7 @@ class HEXConsumerSimulator(Simulator):
             eid = '%s_%s' % (self.eid_prefix, next(counter))
 
             self.entityparams[eid] = model_params
-            esim = HEXConsumer(**model_params)
+            esim = create_model(HEXConsumer, **model_params)
 
             self.simulators[eid] = esim
 
@@ -104,6 +108,12 @@ class HEXConsumerSimulator(Simulator):
             data[eid] = mydata
         return data
 
+    def get_state(self):
+        return get_simulator_state(self)
+
+    def set_state(self, state, time_offset=0):
+        set_simulator_state(self, state, time_offset)
+
 
 if __name__ == '__main__':
     test = HEXConsumerSimulator()
@@ -2,7 +2,7 @@
 # Use of this source code is governed by a BSD-style license that can be found in the LICENSE file.
 
 from dataclasses import dataclass
-from ..util import clamp, safediv
+from ..util import njit, select_kernel, clamp_kernel, safediv_kernel
 
 @dataclass
 class HEXConsumer:
@@ -17,6 +17,7 @@ class HEXConsumer:
     mdot_max: float = 15  # Maximum mass flow - [kg/s]
     rel_adjust: float = 10  # How quickly the valve adjusts to new settings [s]
     max_change_rate: float = 1  # Valve cannot adjust faster than this rate [kg/s/s]
+    use_numba: bool = True  # Use the compiled kernel (only in case numba is installed)
 
     # Variables
     ## Input
@@ -35,29 +36,47 @@ class HEXConsumer:
         self.step_single()
 
     def step_single(self):
-        # Positive mass flow entering the HEX
-        # Action of return-side valve is:
-        # Increase outgoing mass flow if return temperature is lower than the target
-        # Decrease outgoing mass flow if return temperature is higher than the target
-        target_mdot_for_fixed_temperature = safediv(self.P_heat, self.Cp_water * (self.T_supply - self.T_return_target))
-        self.mdot_hex_in = self.mdot_hex_in + 1/self.rel_adjust * \
-            clamp(
-                -self.max_change_rate,
-                (target_mdot_for_fixed_temperature - self.mdot_hex_in),
-                self.max_change_rate)
-
-        if self.mdot_hex_in < self.mdot_min:
-            print(f"calculated mass flow lower than minimum (reset to min: mdot_hex_in {self.mdot_hex_in:.03f}, mdot_hex_min: {self.mdot_min:.03f} ")
-        self.mdot_hex_in = clamp(self.mdot_min, self.mdot_hex_in, self.mdot_max)
+        kernel = select_kernel(hex_consumer_kernel, self.use_numba)
+        mdot_hex_in, self.mdot_hex_in, self.T_return = kernel(
+            self.P_heat, self.T_supply, self.mdot_hex_in, self.T_return_target, self.T_return_min,
+            self.mdot_min, self.mdot_max, self.rel_adjust, self.max_change_rate, self.Cp_water)
+
+        if mdot_hex_in < self.mdot_min:
+            print(f"calculated mass flow lower than minimum (reset to min: mdot_hex_in {mdot_hex_in:.03f}, mdot_hex_min: {self.mdot_min:.03f} ")
 
         # Negative mass flow leaving the HEX
         self.mdot_hex_out = -self.mdot_hex_in
 
-        # Todo: issue warning if heat demand not met. T_return_min is sign of problems.
-        self.T_return = clamp(
-            self.T_return_min,
-            self.T_supply - (self.P_heat / (self.Cp_water * self.mdot_hex_in)),
-            self.T_supply)
+
+@njit(cache=True)
+def hex_consumer_kernel(
+        P_heat, T_supply, mdot_hex_in, T_return_target, T_return_min,
+        mdot_min, mdot_max, rel_adjust, max_change_rate, Cp_water):
+    '''
+    Step of the heat consumer model (compiled in case numba is installed).
+    :return: tuple (inlet mass flow before limitation, inlet mass flow, return temperature)
+    '''
+    # Positive mass flow entering the HEX
+    # Action of return-side valve is:
+    # Increase outgoing mass flow if return temperature is lower than the target
+    # Decrease outgoing mass flow if return temperature is higher than the target
+    target_mdot_for_fixed_temperature = safediv_kernel(P_heat, Cp_water * (T_supply - T_return_target))
+    mdot_hex_in = mdot_hex_in + 1/rel_adjust * \
+        clamp_kernel(
+            -max_change_rate,
+            (target_mdot_for_fixed_temperature - mdot_hex_in),
+            max_change_rate)
+
+    mdot_hex_in_limited = clamp_kernel(mdot_min, mdot_hex_in, mdot_max)
+
+    # Todo: issue warning if heat demand not met. T_return_min is sign of problems.
+    T_return = clamp_kernel(
+        T_return_min,
+        T_supply - (P_heat / (Cp_water * mdot_hex_in_limited)),
+        T_supply)
+
+    return mdot_hex_in, mdot_hex_in_limited, T_return
+
 
 if __name__ == '__main__':
 
@@ -6,6 +6,7 @@ Models a district-integrated heat pump (one entity = one heat pump)
 
 from itertools import count
 from .simulator import ConstantTcondHP
+from ..util import get_simulator_state, set_simulator_state, create_model
 from mosaik_api import Simulator
 from typing import Dict
 
@@ -14,7 +15,9 @@ META = {
         'ConstantTcondHP': {
             'public': True,
             'params': [
-                'P_rated', 'lambda_comp', 'P_0', 'eta_sys', 'eta_comp', 'dt', 'T_cond_out_target', 'opmode', 'T_evap_out_min'
+                'P_rated', 'lambda_comp', 'P_0', 'eta_sys', 'eta_comp', 'dt', 'T_cond_out_target', 'opmode', 'T_evap_out_min',
+                # Ensemble of replicas
+                'replicas', 'replica_params',
             ],
             'attrs': [
                 # Input
@@ -30,6 +33,7 @@ META = {
             ],
         },
     },
+    'extra_methods': ['get_state', 'set_state'],
 }
 
 
@@ -66,7 +70,7 @@ class ConstantTcondHPSimulator(Simulator):
             eid = '%s_%s' % (self.eid_prefix, next(counter))
 
             self.entityparams[eid] = model_params
-            esim = ConstantTcondHP(**model_params)
+            esim = create_model(ConstantTcondHP, **model_params)
 
             self.simulators[eid] = esim
 
@@ -117,3 +121,9 @@ class ConstantTcondHPSimulator(Simulator):
             data[eid] = mydata
 
         return data
+
+    def get_state(self):
+        return get_simulator_state(self)
+
+    def set_state(self, state, time_offset=0):
+        set_simulator_state(self, state, time_offset)
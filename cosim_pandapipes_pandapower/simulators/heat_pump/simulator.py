@@ -3,7 +3,7 @@
 
 from dataclasses import dataclass, field
 from math import exp
-from ..util import clamp, log_mean, KBASE
+from ..util import KBASE, njit, select_kernel, clamp_kernel, log_mean_kernel
 
 @dataclass
 class ConstantTcondHP:
@@ -26,6 +26,7 @@ class ConstantTcondHP:
 
     # Simulation parameters
     dt: float = 1.0  # [s] Time per step
+    use_numba: bool = True  # Use the compiled kernel (only in case numba is installed)
 
     # Input variables
     Q_set: float = 0  # [kW] - thermal (Requested externally)
@@ -79,64 +80,90 @@ class ConstantTcondHP:
 
 
     def step_single(self):
-        # Logarithmic mean temperatures
-        self.T_cond_L = log_mean(self.T_cond_in + KBASE, self.T_cond_out + KBASE)
-        self.T_evap_L = log_mean(self.T_evap_in + KBASE, self.T_evap_out + KBASE)
-
-        # Efficiencies
-        self.eta_L = 1/(1 - self.T_evap_L / self.T_cond_L)
-        self.eta_hp_work = self.eta_sys * self.eta_L
-
-        # Mechanical work constraints
-        self.W_cond_max = \
-            (self.T_cond_out_max - self.T_cond_in) * \
-            (self.Cp_water * self.mdot_cond_in) / \
-            self.eta_hp_work
-
-        self.W_evap_max = \
-            (self.T_evap_in - self.T_evap_out_min) * \
-            (self.Cp_water * self.mdot_evap_in) / (self.eta_hp_work - 1)
-
-        self.W_max = max(0.0, min(self.W_evap_max, self.W_cond_max, self.W_rated))
-
-        # Mechanical work request/effective calculation
-        Q_set_delta = 0.0
-
-        if self.opmode == 'constant_T_out':
-            self.Q_for_constant_T = (self.T_cond_out_target - self.T_cond_in) * self.Cp_water * self.mdot_cond_in
-            self.W_requested = clamp(0, self.Q_for_constant_T / self.eta_hp_work + Q_set_delta, self.W_max)
-        else:
-            self.W_requested = clamp(0, self.Q_set / self.eta_hp_work, self.W_max)
-
-        expldt = exp(- self.lambda_comp * self.dt)
-        # Pump responds within ~ 1/self.lambda_comp seconds
-        self.W_effective = (1 - expldt) * self.W_requested + expldt * self.W_effective
-
-        # Heat flows
-        self.Qdot_cond = self.eta_hp_work * self.W_effective
-        self.Qdot_evap = self.Qdot_cond - self.W_effective
-
-        # Output temperatures
-        if self.mdot_cond_in == 0:
-            self.T_cond_out = self.T_cond_out_target
-        else:
-            self.T_cond_out = self.T_cond_in + self.Qdot_cond / (self.Cp_water * self.mdot_cond_in)
-
-        self.T_evap_out = self.T_evap_in - self.Qdot_evap / (self.mdot_evap_in * self.Cp_water)
-
-        # Electrical equivalents
-        self.P_cond_max = self.W_cond_max / self.eta_comp
-        self.P_evap_max = self.W_evap_max / self.eta_comp
-        self.P_max = self.W_max / self.eta_comp
-
-        self.P_requested = self.W_requested / self.eta_comp
-        self.P_effective = self.P_0 + self.W_effective / self.eta_comp
-        self.P_effective_mw = 1e-3*self.P_effective
-        self.eta_hp = self.Qdot_cond / self.P_effective
+        kernel = select_kernel(heat_pump_kernel, self.use_numba)
+        (
+            self.T_cond_L, self.T_evap_L, self.eta_L, self.eta_hp_work,
+            self.W_cond_max, self.W_evap_max, self.W_max, self.Q_for_constant_T, self.W_requested, self.W_effective,
+            self.Qdot_cond, self.Qdot_evap, self.T_cond_out, self.T_evap_out,
+            self.P_cond_max, self.P_evap_max, self.P_max, self.P_requested, self.P_effective, self.P_effective_mw,
+            self.eta_hp
+        ) = kernel(
+            self.T_cond_in, self.T_cond_out, self.T_evap_in, self.T_evap_out, self.mdot_cond_in, self.mdot_evap_in,
+            self.Q_set, self.Q_for_constant_T, self.W_effective, self.opmode == 'constant_T_out',
+            self.eta_sys, self.eta_comp, self.lambda_comp, self.W_rated, self.P_0, self.T_evap_out_min,
+            self.T_cond_out_max, self.T_cond_out_target, self.dt, self.Cp_water
+        )
 
         self.mdot_cond_out = -self.mdot_cond_in
         self.mdot_evap_out = -self.mdot_evap_in
 
 
+@njit(cache=True)
+def heat_pump_kernel(
+        T_cond_in, T_cond_out, T_evap_in, T_evap_out, mdot_cond_in, mdot_evap_in,
+        Q_set, Q_for_constant_T, W_effective, constant_T_out,
+        eta_sys, eta_comp, lambda_comp, W_rated, P_0, T_evap_out_min,
+        T_cond_out_max, T_cond_out_target, dt, Cp_water):
+    '''
+    Step of the heat pump model (compiled in case numba is installed).
+    :return: tuple of all updated variables (in the order of the assignments in ConstantTcondHP.step_single)
+    '''
+    # Logarithmic mean temperatures
+    T_cond_L = log_mean_kernel(T_cond_in + KBASE, T_cond_out + KBASE)
+    T_evap_L = log_mean_kernel(T_evap_in + KBASE, T_evap_out + KBASE)
+
+    # Efficiencies
+    eta_L = 1/(1 - T_evap_L / T_cond_L)
+    eta_hp_work = eta_sys * eta_L
+
+    # Mechanical work constraints
+    W_cond_max = (T_cond_out_max - T_cond_in) * (Cp_water * mdot_cond_in) / eta_hp_work
+    W_evap_max = (T_evap_in - T_evap_out_min) * (Cp_water * mdot_evap_in) / (eta_hp_work - 1)
+    W_max = max(0.0, min(W_evap_max, W_cond_max, W_rated))
+
+    # Mechanical work request/effective calculation
+    Q_set_delta = 0.0
+
+    if constant_T_out:
+        Q_for_constant_T = (T_cond_out_target - T_cond_in) * Cp_water * mdot_cond_in
+        W_requested = clamp_kernel(0, Q_for_constant_T / eta_hp_work + Q_set_delta, W_max)
+    else:
+        W_requested = clamp_kernel(0, Q_set / eta_hp_work, W_max)
+
+    expldt = exp(- lambda_comp * dt)
+    # Pump responds within ~ 1/lambda_comp seconds
+    W_effective = (1 - expldt) * W_requested + expldt * W_effective
+
+    # Heat flows
+    Qdot_cond = eta_hp_work * W_effective
+    Qdot_evap = Qdot_cond - W_effective
+
+    # Output temperatures
+    if mdot_cond_in == 0:
+        T_cond_out = T_cond_out_target
+    else:
+        T_cond_out = T_cond_in + Qdot_cond / (Cp_water * mdot_cond_in)
+
+    T_evap_out = T_evap_in - Qdot_evap / (mdot_evap_in * Cp_water)
+
+    # Electrical equivalents
+    P_cond_max = W_cond_max / eta_comp
+    P_evap_max = W_evap_max / eta_comp
+    P_max = W_max / eta_comp
+
+    P_requested = W_requested / eta_comp
+    P_effective = P_0 + W_effective / eta_comp
+    P_effective_mw = 1e-3*P_effective
+    eta_hp = Qdot_cond / P_effective
+
+    return (
+        T_cond_L, T_evap_L, eta_L, eta_hp_work,
+        W_cond_max, W_evap_max, W_max, Q_for_constant_T, W_requested, W_effective,
+        Qdot_cond, Qdot_evap, T_cond_out, T_evap_out,
+        P_cond_max, P_evap_max, P_max, P_requested, P_effective, P_effective_mw,
+        eta_hp
+    )
+
+
 if __name__ == '__main__':
     test = ConstantTcondHP()
@@ -0,0 +1,158 @@
+# Copyright (c) 2021 by ERIGrid 2.0. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be found in the LICENSE file.
+'''
+A data collector that aggregates KPIs online (sums, min/max, histograms, quantiles and time outside
+of limits) instead of storing the raw time series. The KPIs are written to a JSON file when the
+simulator ends.
+'''
+
+import json
+import numpy as np
+import mosaik_api
+from .util import RunningStats, StreamingHistogram, P2Quantile, atomic_write
+
+META = {
+        'models': {
+                'KPICollector': {
+                    'public': True,
+                    'any_inputs': True,
+                    'params': [],
+                    'attrs': [],
+                    },
+            },
+    }
+
+
+class KPI:
+    '''
+    KPIs of a single variable.
+    '''
+
+    def __init__(self, quantiles, bins=None, limits=None):
+        self.stats = RunningStats()
+        self.quantiles = [P2Quantile(p) for p in quantiles]
+        self.histogram = StreamingHistogram(bins) if bins is not None else None
+        self.limits = limits
+        self.time_outside_limits = 0
+
+    def add(self, value, dt):
+        self.stats.add(value)
+
+        for quantile in self.quantiles:
+            quantile.add(value)
+
+        if self.histogram is not None:
+            self.histogram.add(value)
+
+        if self.limits is not None and not self.limits[0] <= value <= self.limits[1]:
+            self.time_outside_limits += dt
+
+    def to_dict(self):
+        kpi = {
+            'count': self.stats.count,
+            'sum': self.stats.sum,
+            'mean': self.stats.mean,
+            'min': self.stats.min,
+            'max': self.stats.max,
+            'quantiles': {str(quantile.p): quantile.value for quantile in self.quantiles},
+        }
+
+        if self.histogram is not None:
+            kpi['histogram'] = {
+                'bins': self.histogram.bins,
+                'counts': self.histogram.counts,
+                'underflow': self.histogram.underflow,
+                'overflow': self.histogram.overflow,
+            }
+
+        if self.limits is not None:
+            kpi['limits'] = list(self.limits)
+            kpi['time_outside_limits'] = self.time_outside_limits
+
+        return kpi
+
+
+class KPICollector(mosaik_api.Simulator):
+
+    kpi_file = ''
+    kpi_start_time = 0
+    time_offset = 0
+
+    def __init__(self):
+        super().__init__(META)
+        self.eid = None
+        self.kpis = {}
+
+        self.step_size = None
+        self.quantiles = []
+        self.histogram_bins = {}
+        self.limits = {}
+
+    def init(
+            self, sid, step_size=10, kpi_file='kpi.json', kpi_start_time=0, time_offset=0,
+            quantiles=(0.05, 0.5, 0.95), histogram_bins=None, limits=None):
+        '''
+        For an ensemble of replicas (list or array of values), KPIs are aggregated per replica under '<name>[<replica>]',
+        histogram bins and limits apply to all replicas.
+        :param kpi_file: name of the JSON output file
+        :param kpi_start_time: values before this time (in seconds, including the time offset) are ignored
+        :param time_offset: offset added to the simulation time, e.g., when starting from a snapshot
+        :param quantiles: probabilities of the estimated quantiles
+        :param histogram_bins: dict of histogram bin edges, keys are either attribute names (e.g., 'vm_pu') or full names (e.g., 'Bus_1_0.vm_pu')
+        :param limits: dict of lower and upper limits, keys as for histogram bins (time outside of limits is counted)
+        '''
+        self.step_size = step_size
+        self.kpi_file = kpi_file
+        self.kpi_start_time = kpi_start_time
+        self.time_offset = time_offset
+        self.quantiles = list(quantiles)
+        self.histogram_bins = histogram_bins or {}
+        self.limits = limits or {}
+        return self.meta
+
+    def create(self, num, model, **entity_params):
+        if num > 1 or self.eid is not None:
+            raise RuntimeError("Can only create one instance of KPICollector per simulator.")
+
+        self.eid = 'KPICollector'
+        return [{'eid': self.eid, 'type': model}]
+
+    def step(self, time, inputs):
+        if time + self.time_offset >= self.kpi_start_time:
+            data = inputs.get(self.eid, {})
+            for attr, values in data.items():
+                for src, value in values.items():
+                    if value is None:
+                        continue
+
+                    name = '.'.join([src.split('.', 1)[1], attr])
+                    if isinstance(value, (list, np.ndarray)):
+                        # Ensemble of replicas: one KPI per replica, i.e., '<attr>[<replica>]'
+                        for i, v in enumerate(value):
+                            self._add('{0}[{1}]'.format(name, i), name, attr, v)
+                    else:
+                        self._add(name, name, attr, value)
+
+        return time + self.step_size
+
+    def _add(self, key, name, attr, value):
+        if key not in self.kpis:
+            self.kpis[key] = KPI(
+                self.quantiles,
+                self.histogram_bins.get(name, self.histogram_bins.get(attr)),
+                self.limits.get(name, self.limits.get(attr))
+            )
+
+        self.kpis[key].add(float(value), self.step_size)
+
+    def get_data(self, outputs):
+        raise NotImplementedError('KPICollector does not allow data to be pulled from it')
+
+    def finalize(self):
+        with atomic_write(self.kpi_file) as f:
+            json.dump({name: kpi.to_dict() for name, kpi in sorted(self.kpis.items())}, f, indent=2)
+        print('Saved KPIs to file: {0}'.format(self.kpi_file))
+
+
+if __name__ == '__main__':
+    mosaik_api.start_simulation(KPICollector())
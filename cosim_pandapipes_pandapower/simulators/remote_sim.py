@@ -0,0 +1,17 @@
+# Copyright (c) 2021 by ERIGrid 2.0. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be found in the LICENSE file.
+'''
+Start a simulator of this package in a separate process, connected to MOSAIK via its socket protocol.
+The simulator is given by its class name (as exported by this package):
+
+    python -m simulators.remote_sim DHNetworkSimulator HOST:PORT
+'''
+
+import sys
+import mosaik_api
+import simulators
+
+if __name__ == '__main__':
+    # All remaining command line arguments are parsed by mosaik_api.
+    simulator = simulators.load_simulator(sys.argv.pop(1))
+    mosaik_api.start_simulation(simulator())
@@ -2,7 +2,9 @@
 # Use of this source code is governed by a BSD-style license that can be found in the LICENSE file.
 
 from itertools import count
+import numpy as np
 from .simulator import TimeSeriesPlayer
+from ..util import create_model
 from mosaik_api import Simulator
 from typing import Dict
 
@@ -11,7 +13,9 @@ META = {
         'TimeSeriesPlayer': {
             'public': True,
             'params': [
-                't_start', 'series', 'fieldname', 'interp_method', 'scale'
+                't_start', 'series', 'fieldname', 'interp_method', 'scale',
+                # Ensemble of replicas
+                'replicas', 'replica_params',
             ],
             'attrs': [
                 # Output
@@ -27,6 +31,7 @@ class TimeSeriesPlayerSim(Simulator):
     step_size = 10
     eid_prefix = ''
     last_time = 0
+    event_driven = False
 
     def __init__(self, META=META):
         super().__init__(META)
@@ -38,10 +43,11 @@ class TimeSeriesPlayerSim(Simulator):
         self.output_vars = {'out'}
         self.input_vars = {}
 
-    def init(self, sid, step_size = 10, eid_prefix = 'TimeSeriesPlayer'):
+    def init(self, sid, step_size = 10, eid_prefix = 'TimeSeriesPlayer', event_driven = False):
 
         self.step_size = step_size
         self.eid_prefix = eid_prefix
+        self.event_driven = event_driven  # Only step when the value of a time series changes
 
         return self.meta
 
@@ -53,7 +59,7 @@ class TimeSeriesPlayerSim(Simulator):
             eid = '%s_%s' % (self.eid_prefix, next(counter))
 
             self.entityparams[eid] = model_params
-            esim = TimeSeriesPlayer(step_size = self.step_size,**model_params)
+            esim = create_model(TimeSeriesPlayer, step_size = self.step_size, **model_params)
 
             self.simulators[eid] = esim
 
@@ -71,6 +77,9 @@ class TimeSeriesPlayerSim(Simulator):
 
         self.last_time = time
 
+        if self.event_driven:
+            return int(min(np.min(esim.next_change(time)) for esim in self.simulators.values()))
+
         return time + self.step_size
 
     def get_data(self, outputs):
@@ -1,10 +1,12 @@
 # Copyright (c) 2021 by ERIGrid 2.0. All rights reserved.
 # Use of this source code is governed by a BSD-style license that can be found in the LICENSE file.
 
+import numpy as np
 import pandas as pd
 from pandas.tseries.offsets import DateOffset
 from dataclasses import dataclass
 import datetime
+import math
 
 @dataclass
 class TimeSeriesPlayer:
@@ -22,6 +24,8 @@ class TimeSeriesPlayer:
     # Variables
     ## Internal
     cur_t: datetime.datetime = None
+    change_times: np.ndarray = None  # Times (in seconds after t_start) at which the time series value changes.
+    end_time: float = None  # Time (in seconds after t_start) of the last time series value.
 
     ## Input
     series: pd.DataFrame() = None
@@ -53,6 +57,12 @@ class TimeSeriesPlayer:
 
         assert self.t_start in self.series.index, "Simulation starting date: \"{0}\", is not in time series input.".format(self.t_start)
 
+        # Retrieve times at which the value changes (the time series is piecewise constant in between).
+        values = self.series[self.fieldname]
+        changed = values.ne(values.shift()).to_numpy()
+        self.change_times = ((values.index[changed] - self.t_start) / pd.Timedelta(seconds=1)).to_numpy()
+        self.end_time = (values.index[-1] - self.t_start) / pd.Timedelta(seconds=1)
+
 
     def step_single(self, t):
             '''
@@ -68,3 +78,14 @@ class TimeSeriesPlayer:
             else:
                 raise RuntimeError('timestamp not available')
 
+    def next_change(self, t):
+        '''
+        Return the next simulation time (on the grid of the step size) at which the output changes.
+        input: simulation time
+        output: simulation time of next change (or of the end of the time series)
+        '''
+        i = np.searchsorted(self.change_times, t, side='right')
+        t_next = self.change_times[i] if i < len(self.change_times) else self.end_time
+        t_next = self.step_size * math.ceil(t_next / self.step_size)
+
+        return max(int(t_next), t + self.step_size)
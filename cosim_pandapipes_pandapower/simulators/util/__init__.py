@@ -1,2 +1,8 @@
 from .functions import *
 from .constants import *
+from .state import get_simulator_state, set_simulator_state
+from .payload import encode_binary, decode_binary
+from .files import atomic_write
+from .streaming_statistics import RunningStats, StreamingHistogram, P2Quantile
+from .kernels import njit, NUMBA_AVAILABLE, select_kernel, clamp_kernel, log_mean_kernel, safediv_kernel
+from .ensemble import Ensemble, create_model, map_replicas
@@ -0,0 +1,86 @@
+# Copyright (c) 2021 by ERIGrid 2.0. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be found in the LICENSE file.
+
+from numbers import Number
+import numpy as np
+
+
+class Ensemble:
+    """
+    Ensemble of replicas of a model, which are advanced in lock-step (e.g., for Monte-Carlo simulations).
+    The ensemble has the same interface as the model, with a leading replica axis for all attributes:
+    reading an attribute returns a numpy array (or a list for non-numeric attributes) with one value per replica,
+    writing an attribute accepts either one value per replica (list, tuple or numpy array) or a single value for
+    all replicas. Calling a method calls it for all replicas and returns the results in the same way.
+    :param models: list of model instances (one per replica)
+    """
+
+    def __init__(self, models):
+        object.__setattr__(self, 'models', list(models))
+
+    @property
+    def replicas(self):
+        return len(self.models)
+
+    def __getattr__(self, name):
+        models = self.__dict__.get('models')
+        if models is None or name.startswith('__'):
+            raise AttributeError(name)
+
+        values = [getattr(model, name) for model in models]
+
+        if callable(values[0]):
+            return lambda *args, **kwargs: _stack([method(*args, **kwargs) for method in values])
+
+        return _stack(values)
+
+    def __setattr__(self, name, value):
+        if isinstance(value, (list, tuple, np.ndarray)):
+            if len(value) != len(self.models):
+                raise ValueError('expected {0} values for attribute {1}, got {2}'.format(len(self.models), name, len(value)))
+            for model, v in zip(self.models, value):
+                setattr(model, name, v.item() if isinstance(v, np.generic) else v)
+        else:
+            for model in self.models:
+                setattr(model, name, value)
+
+
+def _stack(values):
+    if all(isinstance(v, Number) for v in values):
+        return np.array(values)
+    return values
+
+
+def create_model(model_class, replicas=1, replica_params=None, **model_params):
+    """
+    Create a model instance, or an ensemble of replicas of the model (in case more than one replica or
+    per-replica parameters are requested).
+    :param model_class: model class
+    :param replicas: number of replicas
+    :param replica_params: dict of parameters with one value per replica (e.g., perturbed parameters or
+        distorted profiles), which override the common model parameters
+    :param model_params: parameters common to all replicas
+    :return: model instance or Ensemble
+    """
+    if replicas == 1 and not replica_params:
+        return model_class(**model_params)
+
+    replica_params = replica_params or {}
+    for name, values in replica_params.items():
+        if len(values) != replicas:
+            raise ValueError('expected {0} values for parameter {1}, got {2}'.format(replicas, name, len(values)))
+
+    return Ensemble([
+        model_class(**dict(model_params, **{name: values[i] for name, values in replica_params.items()}))
+        for i in range(replicas)
+    ])
+
+
+def map_replicas(esim, func):
+    """
+    Apply a function to a model instance, or to all replicas of an ensemble.
+    :return: result of the function (array or list with one result per replica in case of an ensemble)
+    """
+    if isinstance(esim, Ensemble):
+        return _stack([func(model) for model in esim.models])
+    return func(esim)
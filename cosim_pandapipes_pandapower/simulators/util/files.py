@@ -0,0 +1,24 @@
+# Copyright (c) 2021 by ERIGrid 2.0. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be found in the LICENSE file.
+
+from contextlib import contextmanager
+import os
+
+
+@contextmanager
+def atomic_write(file_name, mode='w'):
+    """
+    Open a file for writing, such that an interrupted write does not leave a corrupt file behind.
+    The data is written to a temporary file, which replaces the target file only after it has been closed.
+    :param file_name: name of the target file
+    :param mode: file mode ('w' or 'wb')
+    :return: context manager yielding the open temporary file
+    """
+    tmp_file = '{}.tmp'.format(file_name)
+    try:
+        with open(tmp_file, mode) as f:
+            yield f
+        os.replace(tmp_file, file_name)
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
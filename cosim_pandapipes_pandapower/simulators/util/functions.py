@@ -1,6 +1,9 @@
 # Copyright (c) 2021 by ERIGrid 2.0. All rights reserved.
 # Use of this source code is governed by a BSD-style license that can be found in the LICENSE file.
 
+from numpy import log as _log
+
+
 def clamp(a, x, b):
     """
     Ensures x lies in the closed interval [a, b]
@@ -50,8 +53,7 @@ def lininterp(Tlo, T, Thi):
 
 def log_mean(T_hi, T_lo, exact=False):
     if exact:
-        from numpy import log
-        return (T_hi-T_lo)/log(T_hi/T_lo)
+        return (T_hi-T_lo)/_log(T_hi/T_lo)
     else:
         d = T_hi - T_lo
         return T_hi - d/2*(1 + d/6/T_hi*(1 + d/2/T_hi))  # third order taylor expansion
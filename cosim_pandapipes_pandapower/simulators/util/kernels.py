@@ -0,0 +1,37 @@
+# Copyright (c) 2021 by ERIGrid 2.0. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be found in the LICENSE file.
+'''
+Optional just-in-time compilation of the per-step kernels of the component models with numba.
+
+The kernels are the only implementation of the per-step calculations of the models. They are compiled only in
+case numba is installed (and parameter use_numba of the model is set), otherwise they are called as plain Python
+functions (see select_kernel). Without numba, decorator njit returns the function unchanged.
+'''
+
+from .functions import clamp, log_mean, safediv
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        # Support both @njit and @njit(...)
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+# Compiled versions of the utility functions (for use in kernels).
+clamp_kernel = njit(cache=True)(clamp)
+log_mean_kernel = njit(cache=True)(log_mean)
+safediv_kernel = njit(cache=True)(safediv)
+
+
+def select_kernel(kernel, use_numba=True):
+    '''
+    Return the compiled kernel, or its plain Python function in case numba is not installed or not to be used.
+    '''
+    if use_numba and NUMBA_AVAILABLE:
+        return kernel
+    return getattr(kernel, 'py_func', kernel)
@@ -0,0 +1,31 @@
+# Copyright (c) 2021 by ERIGrid 2.0. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be found in the LICENSE file.
+
+import base64
+import zlib
+
+BINARY_KEY = '__binary__'
+
+
+def encode_binary(data, level=1):
+    """
+    Encode binary data (e.g., a pickled model) for transport over the JSON protocol of MOSAIK,
+    which is used for simulators running in separate processes. The data is compressed with zlib
+    and encoded as base64 string.
+    :param data: bytes to encode
+    :param level: zlib compression level (default: fast compression)
+    :return: dict with the encoded data
+    """
+    return {BINARY_KEY: base64.b64encode(zlib.compress(data, level)).decode('ascii')}
+
+
+def decode_binary(payload):
+    """
+    Decode binary data encoded with encode_binary. Raw bytes are returned unchanged.
+    :param payload: dict with the encoded data, as returned by encode_binary, or bytes
+    :return: decoded bytes
+    """
+    if isinstance(payload, (bytes, bytearray)):
+        return payload
+
+    return zlib.decompress(base64.b64decode(payload[BINARY_KEY]))
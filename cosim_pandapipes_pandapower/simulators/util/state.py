@@ -0,0 +1,42 @@
+# Copyright (c) 2021 by ERIGrid 2.0. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be found in the LICENSE file.
+
+import pickle
+from .payload import encode_binary, decode_binary
+
+
+def get_simulator_state(sim):
+    """
+    Retrieve a snapshot of the internal state of all entities of a MOSAIK simulator wrapper.
+    The snapshot also contains the current values of all attributes, which can be used as
+    initial data for time-shifted connections when restarting from the snapshot.
+    The entities are pickled and encoded as JSON-compatible payload, hence the snapshot can also be
+    retrieved from simulators running in separate processes.
+    :param sim: MOSAIK simulator wrapper (with attributes simulators, last_time, input_vars and output_vars)
+    :return: dict with snapshot data
+    """
+    attrs = sorted(set(sim.output_vars).union(sim.input_vars))
+
+    return {
+        'last_time': sim.last_time,
+        'simulators': encode_binary(pickle.dumps(sim.simulators)),
+        'outputs': sim.get_data({eid: attrs for eid in sim.simulators}),
+    }
+
+
+def set_simulator_state(sim, state, time_offset=0):
+    """
+    Restore the internal state of all entities of a MOSAIK simulator wrapper from a snapshot.
+    The entities have to be created (with the same eids) before restoring their state.
+    :param sim: MOSAIK simulator wrapper
+    :param state: snapshot data, as returned by get_simulator_state
+    :param time_offset: simulation time (in seconds) at which the snapshot is restored
+    """
+    simulators = pickle.loads(decode_binary(state['simulators']))
+
+    if set(simulators) != set(sim.simulators):
+        raise RuntimeError('snapshot entities {} do not match simulator entities {}'.format(
+            sorted(simulators), sorted(sim.simulators)))
+
+    sim.simulators.update(simulators)
+    sim.last_time = state['last_time'] - time_offset
@@ -0,0 +1,133 @@
+# Copyright (c) 2021 by ERIGrid 2.0. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be found in the LICENSE file.
+
+from bisect import bisect_right
+
+
+class RunningStats:
+    """
+    Count, sum, minimum, maximum and mean of a stream of values (constant memory).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.
+        self.min = None
+        self.max = None
+
+    def add(self, x):
+        self.count += 1
+        self.sum += x
+        self.min = x if self.min is None else min(self.min, x)
+        self.max = x if self.max is None else max(self.max, x)
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+
+class StreamingHistogram:
+    """
+    Histogram with fixed bin edges of a stream of values (constant memory).
+    Bins are half-open intervals [a, b), except for the last bin, which is closed (same as numpy.histogram).
+    Values outside the range of the bin edges are counted separately.
+    :param bins: monotonically increasing bin edges
+    """
+
+    def __init__(self, bins):
+        self.bins = list(bins)
+        self.counts = [0] * (len(self.bins) - 1)
+        self.underflow = 0
+        self.overflow = 0
+
+    def add(self, x):
+        if x < self.bins[0]:
+            self.underflow += 1
+        elif x > self.bins[-1]:
+            self.overflow += 1
+        elif x == self.bins[-1]:
+            self.counts[-1] += 1
+        else:
+            self.counts[bisect_right(self.bins, x) - 1] += 1
+
+
+class P2Quantile:
+    """
+    Streaming estimate of a quantile with the P-square algorithm (R. Jain and I. Chlamtac, 1985).
+    Only five markers are stored, independent of the number of values.
+    :param p: probability of the quantile (between 0 and 1)
+    """
+
+    def __init__(self, p):
+        if not 0. < p < 1.:
+            raise ValueError('quantile probability must be between 0 and 1')
+
+        self.p = p
+        self.q = []  # Marker heights
+        self.n = [0, 1, 2, 3, 4]  # Actual marker positions
+        self.n_desired = [0., 2 * p, 4 * p, 2 + 2 * p, 4.]  # Desired marker positions
+        self.dn = [0., p / 2, p, (1 + p) / 2, 1.]  # Increments of desired marker positions
+
+    def add(self, x):
+        q = self.q
+        n = self.n
+
+        # Initialization with the first five values.
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+
+        # Find cell k with q[k] <= x < q[k+1] and adjust extreme values.
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = bisect_right(q, x) - 1
+
+        # Increment positions of markers k+1 through 4 and update desired positions.
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.n_desired[i] += self.dn[i]
+
+        # Adjust heights of markers 1-3 if necessary.
+        for i in range(1, 4):
+            d = self.n_desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                q_new = self._parabolic(i, d)
+                if not q[i - 1] < q_new < q[i + 1]:
+                    q_new = self._linear(i, d)
+                q[i] = q_new
+                n[i] += d
+
+    def _parabolic(self, i, d):
+        q = self.q
+        n = self.n
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def _linear(self, i, d):
+        q = self.q
+        n = self.n
+        return q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+
+    @property
+    def value(self):
+        if not self.q:
+            return None
+
+        if len(self.q) < 5:
+            # Exact quantile (linear interpolation) for less than five values.
+            pos = self.p * (len(self.q) - 1)
+            lo = int(pos)
+            hi = min(lo + 1, len(self.q) - 1)
+            return self.q[lo] + (pos - lo) * (self.q[hi] - self.q[lo])
+
+        return self.q[2]
@@ -5,7 +5,9 @@ Model of the voltage controller.
 '''
 
 from itertools import count
+import numpy as np
 from .simulator import VoltageController
+from ..util import get_simulator_state, set_simulator_state, create_model
 from mosaik_api import Simulator
 from typing import Dict
 
@@ -23,6 +25,9 @@ META = {
                 'hp_p_el_mw_step',
                 'hp_operation_steps_min',
                 'k_p',
+                # Ensemble of replicas
+                'replicas',
+                'replica_params',
             ],
             'attrs': [
                 # Inputs
@@ -33,6 +38,7 @@ META = {
             ],
         },
     },
+    'extra_methods': ['get_state', 'set_state'],
 }
 
 
@@ -41,6 +47,7 @@ class VoltageControlSimulator(Simulator):
     step_size = 10
     eid_prefix = ''
     last_time = 0
+    event_driven = False
 
     def __init__(self, META=META):
         super().__init__(META)
@@ -52,10 +59,11 @@ class VoltageControlSimulator(Simulator):
         self.output_vars = {'hp_p_el_kw_setpoint','hp_p_el_mw_setpoint'}
         self.input_vars = {'vmeas_pu'}
 
-    def init(self, sid, step_size=10, eid_prefix="VoltageController"):
+    def init(self, sid, step_size=10, eid_prefix="VoltageController", event_driven=False):
 
         self.step_size = step_size
         self.eid_prefix = eid_prefix
+        self.event_driven = event_driven  # Skip steps while the controller is idle
 
         return self.meta
 
@@ -68,7 +76,7 @@ class VoltageControlSimulator(Simulator):
             eid = '%s_%s' % (self.eid_prefix, next(counter))
 
             self.entityparams[eid] = model_params
-            esim = VoltageController(**model_params)
+            esim = create_model(VoltageController, **model_params)
 
             self.simulators[eid] = esim
 
@@ -77,6 +85,9 @@ class VoltageControlSimulator(Simulator):
         return entities
 
     def step(self, time, inputs):
+        # Number of simulation steps since the last call (more than one in case idle steps have been skipped).
+        n_steps = max(1, (time - self.last_time) // self.step_size)
+
         for eid, esim in self.simulators.items():
             data = inputs.get(eid, {})
 
@@ -92,10 +103,13 @@ class VoltageControlSimulator(Simulator):
                 else:
                     raise AttributeError(f"VoltageControlSimulator {eid} has no input attribute {attr}.")
 
-            esim.step_single(time)
+            esim.step_single(time, n_steps)
 
         self.last_time = time
 
+        if self.event_driven:
+            return time + self.step_size * int(min(np.min(esim.next_activity_steps()) for esim in self.simulators.values()))
+
         return time + self.step_size
 
     def get_data(self, outputs):
@@ -113,6 +127,12 @@ class VoltageControlSimulator(Simulator):
             data[eid] = mydata
         return data
 
+    def get_state(self):
+        return get_simulator_state(self)
+
+    def set_state(self, state, time_offset=0):
+        set_simulator_state(self, state, time_offset)
+
 
 if __name__ == '__main__':
     test = VoltageControlSimulator()
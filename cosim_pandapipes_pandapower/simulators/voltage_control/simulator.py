@@ -2,7 +2,8 @@
 # Use of this source code is governed by a BSD-style license that can be found in the LICENSE file.
 
 from dataclasses import dataclass
-from math import fabs
+from math import fabs, ceil
+from ..util import njit, select_kernel
 
 @dataclass
 class VoltageController:
@@ -24,6 +25,8 @@ class VoltageController:
 
     k_p: float = 0.25 # The controller's proportional term.
 
+    use_numba: bool = True # Use the compiled kernel (only in case numba is installed)
+
     ## Internal variables
     hp_operation_steps: int = 0 # Number if simulation steps since last the heat pump has been turned on/off
 
@@ -44,47 +47,72 @@ class VoltageController:
         self.hp_p_el_mw_setpoint = self.hp_p_el_mw_min
         self.hp_p_el_kw_setpoint = 1e3 * self.hp_p_el_mw_setpoint
 
-    def step_single(self, time):
+    def step_single(self, time, n_steps=1):
+        kernel = select_kernel(voltage_controller_kernel, self.use_numba)
+        self.hp_p_el_mw_setpoint, self.hp_operation_steps = kernel(
+            self.vmeas_pu, float(self.hp_p_el_mw_setpoint), self.hp_operation_steps, n_steps,
+            self.delta_vm_upper_pu, self.delta_vm_lower_pu_hp_on, self.delta_vm_lower_pu_hp_off, self.delta_vm_deadband,
+            self.hp_p_el_mw_rated, self.hp_p_el_mw_min, self.hp_p_el_mw_step, self.hp_operation_steps_min, self.k_p
+        )
+        self.hp_p_el_kw_setpoint = 1e3 * self.hp_p_el_mw_setpoint
 
-        # Increment counter.
-        self.hp_operation_steps += 1
+    def next_activity_steps(self):
+        '''
+        Number of simulation steps until the controller may change its output again.
+        While the heat pump is turned off, the controller is idle until the minimum number of steps has passed.
+        '''
+        if self.hp_p_el_mw_setpoint == 0:
+            return max(1, ceil(self.hp_operation_steps_min - self.hp_operation_steps))
+        return 1
+
+
+@njit(cache=True)
+def voltage_controller_kernel(
+        vmeas_pu, hp_p_el_mw_setpoint, hp_operation_steps, n_steps,
+        delta_vm_upper_pu, delta_vm_lower_pu_hp_on, delta_vm_lower_pu_hp_off, delta_vm_deadband,
+        hp_p_el_mw_rated, hp_p_el_mw_min, hp_p_el_mw_step, hp_operation_steps_min, k_p):
+    '''
+    Step of the voltage controller (compiled in case numba is installed).
+    :return: tuple (HP setpoint of el. consumption [MWe], number of steps since the heat pump has been turned on/off)
+    '''
+    # Increment counter (by the number of simulation steps since the last call).
+    hp_operation_steps += n_steps
 
-        hp_off = (self.hp_p_el_mw_setpoint == 0)
+    hp_off = (hp_p_el_mw_setpoint == 0)
 
-        if hp_off and (self.hp_operation_steps < self.hp_operation_steps_min):
-            return
+    if hp_off and (hp_operation_steps < hp_operation_steps_min):
+        return hp_p_el_mw_setpoint, hp_operation_steps
 
-        # Calculate voltage deviation.
-        delta_v_meas_pu = self.vmeas_pu - 1
+    # Calculate voltage deviation.
+    delta_v_meas_pu = vmeas_pu - 1
 
-        delta_vm_lower_pu = self.delta_vm_lower_pu_hp_off if hp_off else self.delta_vm_lower_pu_hp_on
+    delta_vm_lower_pu = delta_vm_lower_pu_hp_off if hp_off else delta_vm_lower_pu_hp_on
 
-        # Check delta_vm_deadband.
-        if delta_vm_lower_pu < delta_v_meas_pu < self.delta_vm_upper_pu:
-            if (self.hp_p_el_mw_setpoint == 0 ) and (self.hp_operation_steps >= self.hp_operation_steps_min):
-                self.hp_p_el_mw_setpoint = self.hp_p_el_mw_min
-                self.hp_p_el_kw_setpoint = 1e3 * self.hp_p_el_mw_setpoint
-                self.hp_operation_steps = 0 # Turn on HP --> reset counter
-            return
+    # Check delta_vm_deadband.
+    if delta_vm_lower_pu < delta_v_meas_pu < delta_vm_upper_pu:
+        if (hp_p_el_mw_setpoint == 0) and (hp_operation_steps >= hp_operation_steps_min):
+            hp_p_el_mw_setpoint = hp_p_el_mw_min
+            hp_operation_steps = 0 # Turn on HP --> reset counter
+        return hp_p_el_mw_setpoint, hp_operation_steps
 
-        # Calculate residual.
-        res = self.k_p * (delta_v_meas_pu - self.delta_vm_deadband) / self.hp_p_el_mw_step
-        step_res = int(res)
+    # Calculate residual.
+    res = k_p * (delta_v_meas_pu - delta_vm_deadband) / hp_p_el_mw_step
+    step_res = int(res)
 
-        # Use step functions to adapt HP setpoint.
-        if fabs(res - step_res) > self.hp_p_el_mw_step:
-            self.hp_p_el_mw_setpoint += self.hp_p_el_mw_step * (step_res + 1)
+    # Use step functions to adapt HP setpoint.
+    if fabs(res - step_res) > hp_p_el_mw_step:
+        hp_p_el_mw_setpoint += hp_p_el_mw_step * (step_res + 1)
 
-        # Check min and max for HP setpoint.
-        if (self.hp_p_el_mw_setpoint > self.hp_p_el_mw_rated):
-            self.hp_p_el_mw_setpoint = self.hp_p_el_mw_rated
-        elif (self.hp_p_el_mw_setpoint < self.hp_p_el_mw_min) and (self.hp_operation_steps >= self.hp_operation_steps_min):
-            self.hp_p_el_mw_setpoint = 0
-            self.hp_operation_steps = 0 # Turn off HP --> reset counter
-        elif (self.hp_p_el_mw_setpoint < self.hp_p_el_mw_min) and (self.hp_operation_steps < self.hp_operation_steps_min):
-            self.hp_p_el_mw_setpoint = self.hp_p_el_mw_min
+    # Check min and max for HP setpoint.
+    if (hp_p_el_mw_setpoint > hp_p_el_mw_rated):
+        hp_p_el_mw_setpoint = hp_p_el_mw_rated
+    elif (hp_p_el_mw_setpoint < hp_p_el_mw_min) and (hp_operation_steps >= hp_operation_steps_min):
+        hp_p_el_mw_setpoint = 0.
+        hp_operation_steps = 0 # Turn off HP --> reset counter
+    elif (hp_p_el_mw_setpoint < hp_p_el_mw_min) and (hp_operation_steps < hp_operation_steps_min):
+        hp_p_el_mw_setpoint = hp_p_el_mw_min
 
-        self.hp_p_el_kw_setpoint = 1e3 * self.hp_p_el_mw_setpoint
+    return hp_p_el_mw_setpoint, hp_operation_steps
 
 
 if __name__ == '__main__':
@@ -3,6 +3,7 @@
 
 from itertools import count
 from .simulator import WaterStorageTank
+from ..util import get_simulator_state, set_simulator_state, create_model, map_replicas
 from mosaik_api import Simulator
 from typing import Dict
 from statistics import mean
@@ -13,7 +14,9 @@ META = {
             'public': True,
             'params': [
                 'INNER_HEIGHT', 'INNER_DIAMETER', 'INSULATION_THICKNESS', 'STEEL_THICKNESS', 'NB_LAYERS',
-                'T_volume_initial','dt'
+                'T_volume_initial','dt',
+                # Ensemble of replicas
+                'replicas', 'replica_params',
                 ],
             'attrs': [
                 # Input
@@ -23,6 +26,7 @@ META = {
                 ],
             },
         },
+    'extra_methods': ['get_state', 'set_state'],
     }
 
 
@@ -64,7 +68,7 @@ class StratifiedWaterStorageTankSimulator(Simulator):
             eid = '%s_%s' % (self.eid_prefix, next(counter))
 
             self.entityparams[eid] = model_params
-            esim = WaterStorageTank(**model_params)
+            esim = create_model(WaterStorageTank, **model_params)
 
             self.simulators[eid] = esim
 
@@ -108,7 +112,7 @@ class StratifiedWaterStorageTankSimulator(Simulator):
             for attr in requests:
                 if attr in self.input_vars or attr in self.output_vars:
                     if attr == 'T_avg':
-                        mydata[attr] = mean(esim.Layers_temperature_dict.values())
+                        mydata[attr] = map_replicas(esim, lambda tank: mean(tank.Layers_temperature_dict.values()))
                     elif 'T' in attr:
                         mydata[attr] = getattr(esim, attr)  # Convert local degK to degC for sending into the co-simulation flow
                     else:
@@ -119,6 +123,12 @@ class StratifiedWaterStorageTankSimulator(Simulator):
 
         return data
 
+    def get_state(self):
+        return get_simulator_state(self)
+
+    def set_state(self, state, time_offset=0):
+        set_simulator_state(self, state, time_offset)
+
 
 if __name__ == '__main__':
 
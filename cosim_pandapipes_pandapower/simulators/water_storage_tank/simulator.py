@@ -3,7 +3,7 @@
 
 from dataclasses import dataclass, field
 import numpy as np
-from ..util import KBASE
+from ..util import KBASE, njit, select_kernel
 
 
 @dataclass
@@ -18,6 +18,7 @@ class WaterStorageTank:
 
     # Simulation parameters
     dt: float = 1.0  # Time per step, integration resolution - [s]
+    use_numba: bool = True  # Use the compiled kernel (only in case numba is installed)
 
     # Unit parameters
     # # Geometry
@@ -145,139 +146,29 @@ class WaterStorageTank:
 
 
     def step_single(self):
-        # Charging mode
         if self.mdot_ch_in > 0:
-
             self.mdot_ch_out = - self.mdot_ch_in
             self.mdot_down = self.mdot_ch_in
             self.mdot_up = 0.0
 
-            for layer in self.Layers_list:
-                # Top of the tank boundary layer
-                if layer == 0:
-                    self.Layers_temperature_dict[layer] = (
-                        (
-                            (self.LAMBDA_WALL + self.DELTA_LAMBDA) * self.CROSS_SECTIONAL_WATER_AREA / self.LAYER_LENGTH * (self.Layers_temperature_dict[layer+1] - self.Layers_temperature_dict[layer]) \
-                            + self.U_WALL * self.LAYER_WALL_AREA * (self.T_environment - self.Layers_temperature_dict[layer])
-                            - self.mdot_down * self.Cp_water * self.Layers_temperature_dict[layer]
-                            + self.mdot_ch_in * self.Cp_water * self.T_ch_in
-                            ) / (self.LAYER_WATER_MASS * self.Cp_water)
-                        ) * self.dt + self.Layers_temperature_dict[layer]
-
-
-                    # Intermediate layers
-                elif (layer != 0 and layer != self.Layers_list[-1:][0]):
-
-                    self.Layers_temperature_dict[layer] = (
-                        (
-                            (self.LAMBDA_WALL + self.DELTA_LAMBDA) * self.CROSS_SECTIONAL_WATER_AREA / self.LAYER_LENGTH * (self.Layers_temperature_dict[layer+1] - self.Layers_temperature_dict[layer]) \
-                            +(self.LAMBDA_WALL + self.DELTA_LAMBDA) * self.CROSS_SECTIONAL_WATER_AREA / self.LAYER_LENGTH * (self.Layers_temperature_dict[layer-1] - self.Layers_temperature_dict[layer]) \
-                            + self.U_WALL * self.LAYER_WALL_AREA * (self.T_environment - self.Layers_temperature_dict[layer])
-                            + self.mdot_down * self.Cp_water * self.Layers_temperature_dict[layer-1]
-                            - self.mdot_down * self.Cp_water * self.Layers_temperature_dict[layer]
-                            ) / (self.LAYER_WATER_MASS * self.Cp_water)
-                        ) * self.dt + self.Layers_temperature_dict[layer]
-
-
-                # Bottom of the tank boundary layer
-                elif layer == self.Layers_list[-1:][0]:
-
-                    self.Layers_temperature_dict[layer] = (
-                        (
-                            (self.LAMBDA_WALL + self.DELTA_LAMBDA) * self.CROSS_SECTIONAL_WATER_AREA / self.LAYER_LENGTH * (self.Layers_temperature_dict[layer-1] - self.Layers_temperature_dict[layer]) \
-                            + self.U_WALL * self.LAYER_WALL_AREA * (self.T_environment - self.Layers_temperature_dict[layer])
-                            + self.mdot_down * self.Cp_water * self.Layers_temperature_dict[layer-1]
-                            + self.mdot_ch_out * self.Cp_water * self.Layers_temperature_dict[layer]
-                            ) / (self.LAYER_WATER_MASS * self.Cp_water)
-                        ) * self.dt + self.Layers_temperature_dict[layer]
-
-                else:
-                    raise ValueError("Layer {0} is unknown".format(layer))
-
-                self.T_out = self.Layers_temperature_dict[self.Layers_list[-1:][0]]
-
-
-        # Discharging mode (can be at the same time)
         if self.mdot_dis_out < 0:
             self.mdot_dis_in = - self.mdot_dis_out
             self.mdot_up = - self.mdot_dis_out
             self.mdot_down = 0.0
 
-            reverse_layers_list = reversed(self.Layers_list)
-
-            for layer in reverse_layers_list:
-                # Bottom of the tank boundary layer
-                if layer == self.Layers_list[-1:][0]:
-
-                    self.Layers_temperature_dict[layer] = (
-                        (
-                            (self.LAMBDA_WALL + self.DELTA_LAMBDA) * self.CROSS_SECTIONAL_WATER_AREA / self.LAYER_LENGTH * (self.Layers_temperature_dict[layer-1] - self.Layers_temperature_dict[layer]) \
-                            + self.U_WALL * self.LAYER_WALL_AREA * (self.T_environment - self.Layers_temperature_dict[layer])
-                            - self.mdot_up * self.Cp_water * self.Layers_temperature_dict[layer]
-                            - self.mdot_dis_out * self.Cp_water * self.T_dis_in
-                            ) / (self.LAYER_WATER_MASS * self.Cp_water)
-                        ) * self.dt + self.Layers_temperature_dict[layer]
-
-                # Intermediate layers
-                elif (layer != 0 and layer != self.Layers_list[-1:][0]):
-                    self.Layers_temperature_dict[layer] =  (
-                        (
-                            (self.LAMBDA_WALL + self.DELTA_LAMBDA) * self.CROSS_SECTIONAL_WATER_AREA / self.LAYER_LENGTH * (self.Layers_temperature_dict[layer+1] - self.Layers_temperature_dict[layer]) \
-                            +(self.LAMBDA_WALL + self.DELTA_LAMBDA) * self.CROSS_SECTIONAL_WATER_AREA / self.LAYER_LENGTH * (self.Layers_temperature_dict[layer-1] - self.Layers_temperature_dict[layer]) \
-                            + self.U_WALL * self.LAYER_WALL_AREA * (self.T_environment - self.Layers_temperature_dict[layer])
-                            + self.mdot_up * self.Cp_water * self.Layers_temperature_dict[layer+1]
-                            - self.mdot_up * self.Cp_water * self.Layers_temperature_dict[layer]
-                            ) / (self.LAYER_WATER_MASS * self.Cp_water)
-                        ) * self.dt + self.Layers_temperature_dict[layer]
-
-                # Top of the tank boundary layer
-                elif layer == 0:
-                    self.Layers_temperature_dict[layer] = (
-                        (
-                            (self.LAMBDA_WALL + self.DELTA_LAMBDA) * self.CROSS_SECTIONAL_WATER_AREA / self.LAYER_LENGTH * (self.Layers_temperature_dict[layer+1] - self.Layers_temperature_dict[layer]) \
-                            + self.U_WALL * self.LAYER_WALL_AREA * (self.T_environment - self.Layers_temperature_dict[layer])
-                            + self.mdot_up * self.Cp_water * self.Layers_temperature_dict[layer+1]
-                            - self.mdot_dis_in * self.Cp_water * self.Layers_temperature_dict[layer]
-                            ) / (self.LAYER_WATER_MASS * self.Cp_water)
-                        ) * self.dt + self.Layers_temperature_dict[layer]
-                else:
-                    raise ValueError("Layer {0} is unknown".format(layer))
-
-                self.T_out = self.Layers_temperature_dict[self.Layers_list[-1:][0]]
-
-
-        # Stand-by mode
-        elif self.mdot_ch_in == 0 and self.mdot_dis_out == 0:
-
-            for layer in self.Layers_list:
-                if layer == 0:
-                    self.Layers_temperature_dict[layer] = (
-                        (
-                            (self.LAMBDA_WALL + self.DELTA_LAMBDA) * self.CROSS_SECTIONAL_WATER_AREA / self.LAYER_LENGTH * (self.Layers_temperature_dict[layer+1] - self.Layers_temperature_dict[layer]) \
-                            + self.U_WALL * self.LAYER_WALL_AREA * (self.T_environment - self.Layers_temperature_dict[layer])
-                            ) / (self.LAYER_WATER_MASS * self.Cp_water)
-                        ) * self.dt + self.Layers_temperature_dict[layer]
-
-                elif (layer != 0 and layer != self.Layers_list[-1:][0]):
-                    self.Layers_temperature_dict[layer] =  (
-                        (
-                            (self.LAMBDA_WALL + self.DELTA_LAMBDA) * self.CROSS_SECTIONAL_WATER_AREA / self.LAYER_LENGTH * (self.Layers_temperature_dict[layer+1] - self.Layers_temperature_dict[layer]) \
-                            +(self.LAMBDA_WALL + self.DELTA_LAMBDA) * self.CROSS_SECTIONAL_WATER_AREA / self.LAYER_LENGTH * (self.Layers_temperature_dict[layer-1] - self.Layers_temperature_dict[layer]) \
-                            + self.U_WALL * self.LAYER_WALL_AREA * (self.T_environment - self.Layers_temperature_dict[layer]) \
-                            ) / (self.LAYER_WATER_MASS * self.Cp_water)
-                        ) * self.dt + self.Layers_temperature_dict[layer]
-
-                elif layer == self.Layers_list[-1:][0]:
-                    self.Layers_temperature_dict[layer] = (
-                        (
-                            (self.LAMBDA_WALL + self.DELTA_LAMBDA) * self.CROSS_SECTIONAL_WATER_AREA / self.LAYER_LENGTH * (self.Layers_temperature_dict[layer-1] - self.Layers_temperature_dict[layer]) \
-                            + self.U_WALL * self.LAYER_WALL_AREA * (self.T_environment - self.Layers_temperature_dict[layer]) \
-                            ) / (self.LAYER_WATER_MASS * self.Cp_water) \
-                        ) * self.dt + self.Layers_temperature_dict[layer]
-                else:
-                    raise ValueError("Layer {0} is unknown".format(layer))
-
-            self.T_out = self.Layers_temperature_dict[self.Layers_list[-1:][0]]
+        T_layers = np.array([self.Layers_temperature_dict[layer] for layer in self.Layers_list], dtype=float)
+
+        kernel = select_kernel(storage_tank_kernel, self.use_numba)
+        kernel(
+            T_layers, self.mdot_ch_in, self.mdot_dis_out, self.T_ch_in, self.T_dis_in, self.T_environment,
+            (self.LAMBDA_WALL + self.DELTA_LAMBDA) * self.CROSS_SECTIONAL_WATER_AREA / self.LAYER_LENGTH,
+            self.U_WALL * self.LAYER_WALL_AREA, self.LAYER_WATER_MASS * self.Cp_water, self.Cp_water, self.dt
+        )
+
+        for layer, T in zip(self.Layers_list, T_layers.tolist()):
+            self.Layers_temperature_dict[layer] = T
+
+        self.T_out = self.Layers_temperature_dict[self.Layers_list[-1:][0]]
 
         if self.mdot_ch_in < 0 or self.mdot_dis_out > 0:
             raise ValueError('Unknown value for incoming mass flow mdot_ch_in: {0} and outgoing mass flow mdot_dis_out: {1}'.format(self.mdot_ch_in, self.mdot_dis_out))
@@ -286,6 +177,127 @@ class WaterStorageTank:
         self.T_cold = self.Layers_temperature_dict[self.Layers_list[-1:][0]]
 
 
+@njit(cache=True)
+def storage_tank_kernel(T, mdot_ch_in, mdot_dis_out, T_ch_in, T_dis_in, T_environment, K_LAYER, UA_LAYER, C_LAYER, Cp_water, dt):
+    '''
+    Step of the stratified water storage tank model (compiled in case numba is installed).
+    The layer temperatures (from top to bottom) are updated in place.
+    :param T: array of layer temperatures
+    :param K_LAYER: thermal conductance between adjacent layers - [W/degK]
+    :param UA_LAYER: thermal conductance between a layer and the surrounding - [W/degK]
+    :param C_LAYER: heat capacity of a layer - [J/degK]
+    '''
+    last = len(T) - 1
+
+    # Charging mode
+    if mdot_ch_in > 0:
+        mdot_ch_out = - mdot_ch_in
+        mdot_down = mdot_ch_in
+
+        for layer in range(last + 1):
+            # Top of the tank boundary layer
+            if layer == 0:
+                T[layer] = (
+                    (
+                        K_LAYER * (T[layer+1] - T[layer])
+                        + UA_LAYER * (T_environment - T[layer])
+                        - mdot_down * Cp_water * T[layer]
+                        + mdot_ch_in * Cp_water * T_ch_in
+                        ) / C_LAYER
+                    ) * dt + T[layer]
+
+            # Intermediate layers
+            elif layer != last:
+                T[layer] = (
+                    (
+                        K_LAYER * (T[layer+1] - T[layer])
+                        + K_LAYER * (T[layer-1] - T[layer])
+                        + UA_LAYER * (T_environment - T[layer])
+                        + mdot_down * Cp_water * T[layer-1]
+                        - mdot_down * Cp_water * T[layer]
+                        ) / C_LAYER
+                    ) * dt + T[layer]
+
+            # Bottom of the tank boundary layer
+            else:
+                T[layer] = (
+                    (
+                        K_LAYER * (T[layer-1] - T[layer])
+                        + UA_LAYER * (T_environment - T[layer])
+                        + mdot_down * Cp_water * T[layer-1]
+                        + mdot_ch_out * Cp_water * T[layer]
+                        ) / C_LAYER
+                    ) * dt + T[layer]
+
+    # Discharging mode (can be at the same time)
+    if mdot_dis_out < 0:
+        mdot_dis_in = - mdot_dis_out
+        mdot_up = - mdot_dis_out
+
+        for layer in range(last, -1, -1):
+            # Bottom of the tank boundary layer
+            if layer == last:
+                T[layer] = (
+                    (
+                        K_LAYER * (T[layer-1] - T[layer])
+                        + UA_LAYER * (T_environment - T[layer])
+                        - mdot_up * Cp_water * T[layer]
+                        - mdot_dis_out * Cp_water * T_dis_in
+                        ) / C_LAYER
+                    ) * dt + T[layer]
+
+            # Intermediate layers
+            elif layer != 0:
+                T[layer] = (
+                    (
+                        K_LAYER * (T[layer+1] - T[layer])
+                        + K_LAYER * (T[layer-1] - T[layer])
+                        + UA_LAYER * (T_environment - T[layer])
+                        + mdot_up * Cp_water * T[layer+1]
+                        - mdot_up * Cp_water * T[layer]
+                        ) / C_LAYER
+                    ) * dt + T[layer]
+
+            # Top of the tank boundary layer
+            else:
+                T[layer] = (
+                    (
+                        K_LAYER * (T[layer+1] - T[layer])
+                        + UA_LAYER * (T_environment - T[layer])
+                        + mdot_up * Cp_water * T[layer+1]
+                        - mdot_dis_in * Cp_water * T[layer]
+                        ) / C_LAYER
+                    ) * dt + T[layer]
+
+    # Stand-by mode
+    elif mdot_ch_in == 0 and mdot_dis_out == 0:
+        for layer in range(last + 1):
+            if layer == 0:
+                T[layer] = (
+                    (
+                        K_LAYER * (T[layer+1] - T[layer])
+                        + UA_LAYER * (T_environment - T[layer])
+                        ) / C_LAYER
+                    ) * dt + T[layer]
+
+            elif layer != last:
+                T[layer] = (
+                    (
+                        K_LAYER * (T[layer+1] - T[layer])
+                        + K_LAYER * (T[layer-1] - T[layer])
+                        + UA_LAYER * (T_environment - T[layer])
+                        ) / C_LAYER
+                    ) * dt + T[layer]
+
+            else:
+                T[layer] = (
+                    (
+                        K_LAYER * (T[layer-1] - T[layer])
+                        + UA_LAYER * (T_environment - T[layer])
+                        ) / C_LAYER
+                    ) * dt + T[layer]
+
+
 if __name__ == '__main__':
 
     import matplotlib.pyplot as plt
@@ -51,10 +51,12 @@ STORAGE_TANK_INIT_TEMP = 70  # Storage tank initial temperature
 
 
 # 1 mosaik time-step = 1 second.
+# Multi-rate: controllers and pipeflow may use coarser step sizes (multiples of the physical step size),
+# mosaik holds their outputs in between.
 STEP_SIZE = 60 * 1
 PHYSICAL_STEP_SIZE = STEP_SIZE  # Physical evolution [s]
 CONTROL_STEP_SIZE = STEP_SIZE  # Flow control [s]
-PIPEFLOW_STEP_SIZE = STEP_SIZE
+PIPEFLOW_STEP_SIZE = STEP_SIZE  # DH network pipeflow [s]
 OPTIMIZER_STEP_SIZE = STEP_SIZE  # Used for MPC controller [s]
 END = 72 * 60 * 60
 
@@ -112,13 +114,13 @@ simulators['hp'] = world.start(
 # # Simple hp controller # #
 simulators['simple_controller'] = world.start(
     'SimpleControllerSim',
-    step_size=PHYSICAL_STEP_SIZE
+    step_size=CONTROL_STEP_SIZE
 )
 
 # # Voltage controller # #
 simulators['voltage_controller'] = world.start(
     'VoltageControlSim',
-    step_size=PHYSICAL_STEP_SIZE
+    step_size=CONTROL_STEP_SIZE
 )
 
 # # Collector # #
@@ -180,7 +182,7 @@ entities['storage_tank'] = simulators['storage_tank'].WaterStorageTank(
     STEEL_THICKNESS=0.02,
     NB_LAYERS=10,
     T_volume_initial=60,  # degC
-    dt=STEP_SIZE
+    dt=PHYSICAL_STEP_SIZE
 )
 
 # # Heat pump
@@ -191,7 +193,7 @@ entities['hp'] = simulators['hp'].ConstantTcondHP(
     eta_sys=0.5,
     eta_comp=0.7,
     T_evap_out_min=20,
-    dt=STEP_SIZE,
+    dt=PHYSICAL_STEP_SIZE,
     T_cond_out_target=HP_TEMP_COND_OUT_TARGET,  # degC
     opmode='constant_T_out',  # Constant output power at condenser
 )
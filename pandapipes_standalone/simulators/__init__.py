@@ -1,23 +1,59 @@
-# External grid
-# from .heat_source import ExternalGridSimulator
+'''
+Registry of the MOSAIK simulators (imported lazily on first access, hence only the dependencies of the
+simulators actually in use are imported).
+'''
 
-# District Heating Network
-from .dh_network import DHNetworkSimulator
+import importlib
+import sys
 
-# Heat units
-from .water_storage_tank_2cycles import StratifiedWaterStorageTankSimulator
-from .HEX_consumer import HEXConsumerSimulator
+# Simulator class names and their modules.
+SIMULATORS = {
+    # External grid
+    # 'ExternalGridSimulator': '.heat_source',
 
-# Cross-domain units
-from .HP import ConstantTcondHPSimulator
+    # District Heating Network
+    'DHNetworkSimulator': '.dh_network',
 
-# Time series player
-from .ts_player import TSSimSimulator
+    # Heat units
+    'StratifiedWaterStorageTankSimulator': '.water_storage_tank_2cycles',
+    'HEXConsumerSimulator': '.HEX_consumer',
 
-# Control units
-from .simple_controller import SimpleFlexHeatControllerSimulator
-from .voltage_control import VoltageControlSimulator
+    # Cross-domain units
+    'ConstantTcondHPSimulator': '.HP',
 
-# On-line data logging
-from .collector import Collector
-from .multicollector import MultiCollector
\ No newline at end of file
+    # Time series player
+    'TSSimSimulator': '.ts_player',
+
+    # Control units
+    'SimpleFlexHeatControllerSimulator': '.simple_controller',
+    'VoltageControlSimulator': '.voltage_control',
+
+    # On-line data logging
+    'Collector': '.collector',
+    'MultiCollector': '.multicollector',
+}
+
+
+def load_simulator(name):
+    '''
+    Import the module of a simulator and return the simulator class.
+    '''
+    simulator = getattr(importlib.import_module(SIMULATORS[name], __name__), name)
+    globals()[name] = simulator
+    return simulator
+
+
+def __getattr__(name):
+    if name in SIMULATORS:
+        return load_simulator(name)
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(SIMULATORS))
+
+
+if sys.version_info < (3, 7):
+    # Module attribute lookup with __getattr__ requires Python 3.7 (PEP 562), import all simulators.
+    for _name in SIMULATORS:
+        load_simulator(_name)
@@ -5,7 +5,6 @@
 	External heating grid model.
 """
 
-import matplotlib.pyplot as plt
 import pandas as pd
 import sys
 from dataclasses import dataclass, field
@@ -18,7 +17,6 @@ import pandapower.control as control
 import pandapipes.control.run_control as run_control
 from pandapower import pandapowerNet
 from .valve_control import CtrlValve
-import pandapipes.plotting as plot
 import logging
 from scipy.interpolate import interp1d
 
@@ -253,6 +251,7 @@ class DHNetwork:
 		self.store[label] = df.to_dict()
 
 	def _plot_outputs(self):
+		import matplotlib.pyplot as plt
 
 		plt_dict = {
 			# 'temp': ['n1s', 'n2s', 'n3s', 'n3s_tank', 'n4s', 'n5s', 'n6s', 'n7s', 'n8s'],
@@ -616,6 +615,8 @@ class DHNetwork:
 		self.controller = ['tank_ctrl1', 'grid_ctrl', 'bypass_ctrl', 'hex1_ctrl', 'hex2_ctrl']
 
 	def _plot(self):
+		import pandapipes.plotting as plot
+
 		# plot network
 		plot.simple_plot(self.net, plot_sinks=True, plot_sources=True, sink_size=4.0, source_size=4.0)
 
@@ -1,5 +1,4 @@
 import numpy as np
-import matplotlib.pyplot as plt
 import pandapower as ppo
 import pandapipes as ppi
 import pandapower.control as control
@@ -64,6 +63,7 @@ class CtrlValve(control.basic_controller.Controller):
 
         # clear plot
         if self.enable_plotting == True:
+            import matplotlib.pyplot as plt
             self.axes = plt.gca()
             self.axes.set_xlim(0, 100)
             self.axes.set_ylim(0, 1)
@@ -169,6 +169,8 @@ class CtrlValve(control.basic_controller.Controller):
             self.mdot_set_kg_per_s = setpoint
 
     def update_plot(self, net):
+        import matplotlib.pyplot as plt
+
         loss_coeff = self.loss_coeff
 
         mdot = net.res_valve.at[self.gid, 'mdot_from_kg_per_s']
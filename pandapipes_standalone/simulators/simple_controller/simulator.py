@@ -3,7 +3,6 @@
 
 """Three way valve model."""
 
-import matplotlib.pyplot as plt
 import pandas as pd
 from dataclasses import dataclass, field
 from typing import List, Dict, Optional, Set, Tuple
@@ -5,7 +5,6 @@
     Time series player/simulator
 """
 
-import matplotlib.pyplot as plt
 import pandas as pd
 from dataclasses import dataclass, field
 import numpy as np
@@ -0,0 +1,142 @@
+# Copyright (c) 2021 by ERIGrid 2.0. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be found in the LICENSE file.
+
+"""
+    Offline generation of distorted load profiles (without mosaik).
+
+    The profile is interpolated linearly to the given step size (as done by the time series player) and multiplied
+    with multifractal factors. All variants are generated in one vectorized pass (see MultiFractalFactors).
+    Generated variants are cached on disk, keyed by source file, field name, number of variants, step size and the
+    parameters of the multifractal (L, L_min, sigma, seed). The resulting CSV files can be used directly as input
+    series of the time series player.
+
+    Example (generate two distorted variants of the consumer heat demand profile):
+        python batch_distorter.py resources/heat_demand_load_profile_feb_to_march_2019.csv \\
+            --fieldname hourly_heat_load_profile_500kW --variants 2 --names consumer1 consumer2 \\
+            --outfile distorted_heat_demand_load_profiles.csv
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .mosaik_modules.multifractaldistorter import MultiFractalFactors
+except ImportError:
+    from mosaik_modules.multifractaldistorter import MultiFractalFactors
+
+MY_DIR = os.path.abspath(os.path.dirname(__file__))
+CACHE_DIR = os.path.join(MY_DIR, 'cache')
+
+BLOCK_INTERVALS = 24  # Number of top-level intervals of the multifractal processed at once
+
+
+def distort_profile(series, n_variants, L=3600, L_min=10, sigma=0.05, seed=0, step_size=10, names=None):
+    """
+        Generate distorted variants of a profile.
+        :param series: profile (pandas series with datetime index)
+        :param n_variants: number of distorted variants
+        :param L: length of top-level interval of the multifractal [s]
+        :param L_min: length of shortest interval of the multifractal [s]
+        :param sigma: splitting factor of the multifractal
+        :param seed: seed of the random number generators (variant i uses the i-th child of the seed sequence,
+            i.e., the same stream as the i-th entity of MultiFractalMultiplier with this seed)
+        :param step_size: time resolution of the distorted profiles [s]
+        :param names: column names of the variants (default: '<series name>_<i>')
+        :return: data frame with one column per variant
+    """
+
+    series = series.dropna().sort_index()
+    t_source = (series.index - series.index[0]).total_seconds().values
+    t = np.arange(0, t_source[-1] + step_size / 2, step_size)
+
+    # Linear interpolation, as done by the time series player
+    values = np.interp(t, t_source, series.values.astype(float))
+
+    seeds = np.random.SeedSequence(seed).spawn(n_variants)
+    multifractal = MultiFractalFactors(L=L, min_L=L_min, sigma=sigma, seeds=seeds)
+
+    # Process blocks of top-level intervals (limits the memory used for splitting factors)
+    factors = np.empty((n_variants, len(t)))
+    block_steps = max(int(BLOCK_INTERVALS * L // step_size), 1)
+    for start in range(0, len(t), block_steps):
+        factors[:, start:start + block_steps] = multifractal.factors(t[start:start + block_steps])
+
+    if names is None:
+        names = ['{0}_{1}'.format(series.name, i) for i in range(n_variants)]
+    elif len(names) != n_variants:
+        raise ValueError('number of names ({0}) does not match number of variants ({1})'.format(len(names), n_variants))
+
+    index = pd.DatetimeIndex(series.index[0] + pd.to_timedelta(t, unit='s'), name='ts')
+    return pd.DataFrame((values * factors).T, index=index, columns=names)
+
+
+def cache_key(source, fieldname, n_variants, L, L_min, sigma, seed, step_size, names=None):
+    """
+        Key of distorted profiles in the cache (includes the content of the source file).
+    """
+
+    h = hashlib.sha256()
+    h.update(Path(source).read_bytes())
+    h.update(json.dumps([fieldname, n_variants, L, L_min, sigma, seed, step_size, names]).encode())
+    return h.hexdigest()
+
+
+def load_distorted_profiles(
+        source, fieldname, n_variants, L=3600, L_min=10, sigma=0.05, seed=0, step_size=10, names=None,
+        cache_dir=CACHE_DIR):
+    """
+        Load distorted variants of a profile from the cache, generate them in case they are not available.
+        :param source: CSV file with profiles (first column: time stamps)
+        :param fieldname: name of the profile in the CSV file
+        :param cache_dir: directory of the cache (None: no caching)
+        :return: tuple (data frame with one column per variant, name of the cache file)
+    """
+
+    key = cache_key(source, fieldname, n_variants, L, L_min, sigma, seed, step_size, names)
+    cache_file = None if cache_dir is None else os.path.join(cache_dir, '{0}.csv'.format(key))
+
+    if cache_file is not None and os.path.isfile(cache_file):
+        return pd.read_csv(cache_file, index_col=0, parse_dates=True), cache_file
+
+    series = pd.read_csv(source, index_col=0, parse_dates=True)[fieldname]
+    profiles = distort_profile(series, n_variants, L, L_min, sigma, seed, step_size, names)
+
+    if cache_file is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+
+        profiles.to_csv(cache_file + '.tmp')
+        os.replace(cache_file + '.tmp', cache_file)
+
+    return profiles, cache_file
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Generate distorted variants of a load profile.')
+    parser.add_argument('source', help='CSV file with profiles (first column: time stamps)')
+    parser.add_argument('--fieldname', default='hourly_heat_load_profile_500kW', help='name of the profile in the CSV file')
+    parser.add_argument('--variants', type=int, default=1, help='number of distorted variants')
+    parser.add_argument('--names', nargs='+', default=None, help='column names of the variants')
+    parser.add_argument('--L', type=float, default=3600, help='length of top-level interval [s]')
+    parser.add_argument('--L-min', type=float, default=10, help='length of shortest interval [s]')
+    parser.add_argument('--sigma', type=float, default=0.05, help='splitting factor')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the random number generators')
+    parser.add_argument('--step-size', type=int, default=10, help='time resolution of the distorted profiles [s]')
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help='directory of the cache')
+    parser.add_argument('--outfile', default=None, help='also save the distorted profiles to this file')
+    args = parser.parse_args()
+
+    profiles, cache_file = load_distorted_profiles(
+        args.source, args.fieldname, args.variants, args.L, args.L_min, args.sigma, args.seed, args.step_size,
+        args.names, args.cache_dir)
+    print('Distorted profiles: {0}'.format(cache_file))
+
+    if args.outfile is not None:
+        profiles.to_csv(args.outfile)
+        print('Saved distorted profiles to file: {0}'.format(args.outfile))
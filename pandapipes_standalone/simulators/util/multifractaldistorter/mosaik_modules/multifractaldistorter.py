@@ -36,12 +36,14 @@ class MyMultiFractal:
     sigma: float                             # splitting factor (relative split is 1+sigma, 1-sigma)
     use_discrete: bool = False               # Use 1 +/- sigma? Otherwise, use normal distribution
     raw_val: float = 0.0                     # Value of data
+    seed: object = None                      # Seed of the random number generator (int or numpy.random.SeedSequence)
 
     N: float = field(init=False)             # Number of levels in stack
     L_0: float = field(init=False)           # Current top-level interval starting point
     r: List[float] = field(init=False)       # splitting factor at each level
     prev_i: List[float] = field(init=False)  # whether we are in the first or second half of the interval in each iteration
     val: float = field(init=False)           # Number of levels in stack
+    rng: np.random.Generator = field(init=False)  # Random number generator of the entity
 
     def __post_init__(self):
         self.L_0 = 0.0
@@ -50,6 +52,7 @@ class MyMultiFractal:
         self.prev_i = [0] * self.N
         self._first_run = True
         self.val = self.raw_val
+        self.rng = np.random.default_rng(self.seed)
 
     def calc_val(self, t):
         """
@@ -111,11 +114,147 @@ class MyMultiFractal:
 
         if self.use_discrete:
 
-            return 2 * np.random.randint(2) - 1
+            return 2 * self.rng.integers(2) - 1
 
         else:
 
-            return min(0.9, max(0.1, np.random.normal(0, 1)))
+            return min(0.9, max(0.1, self.rng.normal(0, 1)))
+
+
+class MultiFractalFactors:
+    """
+        Vectorized multifractal distortion factors for many entities at once.
+
+        Same multifractal as MyMultiFractal: each top-level interval (length L) is split recursively into halves
+        down to length min_L. Each interval on each level draws a random splitting factor r, and the
+        factor of a point in time is the product over all levels of 1 + sigma * r (first half) or 1 - sigma * r
+        (second half).
+        Here, the splitting factors of all intervals of a top-level interval are drawn at once (as array) and the
+        factors of all entities and many points in time are computed with array operations, one level at a time.
+        Each entity has its own seeded random number generator, hence the factors are reproducible.
+        :param L: length of top-level interval
+        :param min_L: length of shortest interval
+        :param sigma: splitting factor
+        :param seeds: list of seeds (int or numpy.random.SeedSequence), one for each entity
+        :param use_discrete: use 1 +/- sigma? Otherwise, use normal distribution
+    """
+
+    def __init__(self, L, min_L, sigma, seeds, use_discrete=False):
+        self.L = L
+        self.min_L = min_L
+        self.sigma = sigma
+        self.use_discrete = use_discrete
+        self.rngs = [np.random.default_rng(seed) for seed in seeds]
+
+        # Number of levels (intervals not shorter than min_L) and number of intervals on all levels
+        self.levels = 0
+        while L / 2 ** self.levels >= min_L:
+            self.levels += 1
+        self.n_intervals = 2 ** self.levels - 1
+
+        # Splitting factors of all intervals of consecutive top-level intervals (entity, top-level interval, interval)
+        self.r = np.empty((len(self.rngs), 0, self.n_intervals))
+        self.first_window = 0
+
+        # Block of precomputed factors
+        self.block_times = None
+        self.block = None
+
+    def _draw_new(self, n_windows):
+        if self.use_discrete:
+            r = [2 * rng.integers(2, size=(n_windows, self.n_intervals)) - 1 for rng in self.rngs]
+        else:
+            r = [np.clip(rng.normal(0, 1, size=(n_windows, self.n_intervals)), 0.1, 0.9) for rng in self.rngs]
+
+        return np.array(r, dtype=float).reshape(len(self.rngs), n_windows, self.n_intervals)
+
+    def _draw_windows(self, windows):
+        """
+            Draw splitting factors up to the last of the given top-level intervals (in order of the top-level
+            intervals, splitting factors of top-level intervals before the first requested one are discarded).
+            Return the indices of the given top-level intervals in the array of splitting factors.
+        """
+
+        first, last = windows.min(), windows.max()
+        if first < self.first_window:
+            raise ValueError('multifractal factors have to be requested in chronological order')
+
+        drop = min(first, self.first_window + self.r.shape[1]) - self.first_window
+        self.r = self.r[:, drop:]
+        self.first_window += drop
+
+        missing = last + 1 - (self.first_window + self.r.shape[1])
+        if missing > 0:
+            self.r = np.concatenate([self.r, self._draw_new(missing)], axis=1)
+
+        return windows - self.first_window
+
+    def factors(self, times):
+        """
+            Factors of all entities at the given points in time (in chronological order).
+            :param times: array of points in time
+            :return: array of factors (entity, time)
+        """
+
+        times = np.asarray(times, dtype=float)
+
+        # Top-level interval (0, L] contains t = 0 as well, as in MyMultiFractal
+        windows = np.maximum(np.ceil(times / self.L) - 1, 0).astype(int)
+        t_rel = times - windows * self.L
+        w = self._draw_windows(windows)
+
+        # Cumulative product of the splitting factors over all levels (entity, time)
+        factors = np.ones((len(self.rngs), len(times)))
+        S = np.zeros(len(times))
+        j = np.zeros(len(times), dtype=int)
+        L = self.L
+
+        for n in range(self.levels):
+            i_n = (t_rel > L / 2 + S).astype(int)
+            interval = 2 ** n - 1 + j
+            factors *= 1 + self.sigma * self.r[:, w, interval] * (1 - 2 * i_n)
+            S = S + i_n * L / 2
+            j = 2 * j + i_n
+            L = L / 2
+
+        return factors
+
+    def get_factor(self, index, t, step_size, horizon):
+        """
+            Factor of a single entity, served from a precomputed block of factors of all entities.
+            :param index: index of the entity
+            :param t: point in time
+            :param step_size: time between consecutive points in time of the block
+            :param horizon: length of the block
+        """
+
+        if self.block_times is None or not self.block_times[0] <= t <= self.block_times[-1]:
+            self.block_times = np.arange(t, t + max(horizon, step_size), step_size)
+            self.block = self.factors(self.block_times)
+
+        k = int(round((t - self.block_times[0]) / step_size))
+        if self.block_times[k] != t:
+            # Point in time not on the grid of the block
+            return self.factors([t])[index, 0]
+
+        return self.block[index, k]
+
+
+@dataclass
+class MultiFractalEntity:
+    factors: MultiFractalFactors              # Vectorized factors of all entities created together
+    index: int                                # Index of entity in vectorized factors
+    step_size: float                          # Time between consecutive steps
+    horizon: float                            # Length of precomputed block of factors
+    raw_val: float = 0.0                      # Value of data
+    val: float = 0.0                          # Distorted value of data
+
+    def calc_val(self, t):
+        """
+        .
+        """
+
+        self.val = self.raw_val * self.factors.get_factor(self.index, t, self.step_size, self.horizon)
 
 
 class MultiFractalMultiplier(mosaik_api.Simulator):
@@ -133,15 +272,24 @@ class MultiFractalMultiplier(mosaik_api.Simulator):
         self.simulator_entities = {}
         self.entityparams = {}
 
-    def init(self, sid, step_size=5, eid_prefix="MMF", verbose=False):
+    def init(self, sid, step_size=5, eid_prefix="MMF", verbose=False, vectorized=False, horizon=None, seed=None):
         """
         Initialize the simulator with the ID 'sid' and apply
         additional parameters (sim_params) sent by mosaik.
         Return the meta data 'meta'.
+        With vectorized=True, the factors of all entities are precomputed for blocks of length 'horizon'
+        (default: top-level interval L). Each entity draws from its own random stream, spawned from the
+        seed sequence of the simulator. With a seed, the factors are reproducible (the n-th entity created
+        always gets the same stream), without a seed the streams are initialized from OS entropy.
         """
 
         self.step_size = step_size
         self.eid_prefix = eid_prefix
+        self.vectorized = vectorized
+        self.horizon = horizon
+        self.seed = seed
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.n_entities = 0
 
         return self.meta
 
@@ -153,12 +301,23 @@ class MultiFractalMultiplier(mosaik_api.Simulator):
         counter = self.eid_counters.setdefault(model, count())
         entities = []
 
-        for _ in range(num):
+        # One independent random stream per entity (spawned from the seed sequence of the simulator)
+        seeds = self.seed_sequence.spawn(num)
+
+        if self.vectorized:
+            factors = MultiFractalFactors(L=L, min_L=L_min, sigma=sigma, seeds=seeds)
+
+        for i in range(num):
 
             eid = '{0}_{1}_{2}'.format(self.eid_prefix, model, next(counter))
 
-            esim = MyMultiFractal(L=L, min_L=L_min, sigma=sigma)
+            if self.vectorized:
+                esim = MultiFractalEntity(
+                    factors=factors, index=i, step_size=self.step_size, horizon=self.horizon or L)
+            else:
+                esim = MyMultiFractal(L=L, min_L=L_min, sigma=sigma, seed=seeds[i])
             self.simulator_entities[eid] = esim
+            self.n_entities += 1
 
             entities.append({'eid': eid, 'type': model, 'sigma':0.3})
 
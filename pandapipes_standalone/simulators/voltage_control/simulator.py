@@ -8,7 +8,6 @@
 from dataclasses import dataclass, field
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 from ..util import clamp, safediv
 
 P_HP_RATED = 100  # Rated heat pump electricity consumption [kWe]
@@ -3,7 +3,6 @@
 
 """Stratified water storage tank model."""
 
-import matplotlib.pyplot as plt
 import pandas as pd
 from dataclasses import dataclass, field
 import numpy as np
@@ -307,6 +306,7 @@ class WaterStorageTank:
         self.T_cold = self.Layers_temperature_dict[self.Layers_list[-1:][0]]
 
 if __name__ == '__main__':
+    import matplotlib.pyplot as plt
 
     Test = WaterStorageTank()
 
@@ -394,6 +394,6 @@ if __name__ == '__main__':
     plt.grid()
     plt.tight_layout()
 
-plt.ion()
-plt.show()
+    plt.ion()
+    plt.show()
 
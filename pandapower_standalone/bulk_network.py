@@ -0,0 +1,182 @@
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+import pandapower as pp
+
+#directory of the cached networks
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "netw_cache")
+
+
+def read_params(params_dir="netw_params"):
+    """
+    Read the network parameters (same files as create_network.py).
+    """
+    def read(filename):
+        return pd.read_csv(os.path.join(params_dir, filename), sep=";", header=0, decimal=".")
+
+    return {
+        "networks": read("netws.csv"),
+        "lines": read("lv_lines.csv"),
+        "loads": read("lv_loads.csv"),
+        "PVs": read("lv_PVs.csv"),
+    }
+
+
+def synthetic_feeder_params(n_bus, vn_kv=0.4, line_length=0.05, std_type="94-AL1/15-ST1A 0.4",
+                            load_s=0.01, load_cosphi=0.97, pv_every=2, pv_p=0.005, seed=0):
+    """
+    Parameters of a synthetic radial LV feeder (same format as read_params) for scaling tests:
+    a chain of n_bus buses with a load at every bus (except the slack bus) and a PV at every pv_every-th bus.
+    Load sizes and line lengths are varied randomly by +/-50%.
+    """
+    rng = np.random.default_rng(seed)
+    buses = ["Bus_%s" % i for i in range(n_bus)]
+    load_buses = buses[1:]
+    pv_buses = buses[1::pv_every] if pv_every else []
+
+    load_s = load_s * rng.uniform(0.5, 1.5, len(load_buses))
+
+    return {
+        "networks": pd.DataFrame({"type": ["lv"], "vn_kv": [vn_kv], "n_bus": [n_bus]}),
+        "lines": pd.DataFrame({
+            "line_name": ["LV_Line_%s-%s" % (i, i + 1) for i in range(n_bus - 1)],
+            "from_bus": buses[:-1],
+            "to_bus": buses[1:],
+            "length": line_length * rng.uniform(0.5, 1.5, n_bus - 1),
+            "std_type": std_type,
+        }),
+        "loads": pd.DataFrame({
+            "load_name": ["Load_%s" % i for i in range(1, n_bus)],
+            "bus": load_buses,
+            "s": load_s,
+            "cosphi": load_cosphi,
+            "controllable": False,
+            "max_p_mw": load_s,
+            "min_p_mw": 0.,
+            "scaling": 1.,
+        }),
+        "PVs": pd.DataFrame({
+            "PV_name": ["PV_%s" % i for i in range(1, len(pv_buses) + 1)],
+            "bus": pv_buses,
+            "p": pv_p,
+            "q": 0.,
+            "type": "PV",
+            "scaling": 1.,
+        }),
+    }
+
+
+def build_network(params):
+    """
+    Build the network with the vectorized create functions of pandapower (one call per element type,
+    bus names are resolved with a precomputed name to index map).
+    """
+    networks, lv_lines, lv_loads, lv_PVs = params["networks"], params["lines"], params["loads"], params["PVs"]
+
+    #create empty network
+    net = pp.create_empty_network()
+
+    #create buses
+    for _, network in networks.iterrows():
+        pp.create_buses(net, network.n_bus, vn_kv=network.vn_kv, type="b",
+                        name=["Bus_%s" % i for i in range(network.n_bus)])
+
+    bus_index = pd.Series(net.bus.index, index=net.bus.name)
+    if not bus_index.index.is_unique:
+        raise ValueError("duplicate bus names")
+
+    #buses of a feeder are placed along a line (same coordinates as in create_network.py)
+    net.bus_geodata = pd.DataFrame({"x": 2.0 * (np.arange(len(net.bus)) + 1), "y": 11}, index=net.bus.index)
+
+    #create external grid
+    pp.create_ext_grid(net, bus_index["Bus_0"], vm_pu=1.02, va_degree=0, name="External Grid")
+
+    #create branch elements (one call per line type)
+    for std_type, lines in lv_lines.groupby("std_type", sort=False):
+        pp.create_lines(net, bus_index[lines.from_bus].values, bus_index[lines.to_bus].values,
+                        length_km=lines.length.values, std_type=std_type, name=lines.line_name.values)
+
+    #create loads (inductive, as pp.create_load_from_cosphi)
+    p_mw = lv_loads.s.values * lv_loads.cosphi.values
+    q_mvar = lv_loads.s.values * np.sqrt(1 - lv_loads.cosphi.values**2)
+    pp.create_loads(net, bus_index[lv_loads.bus].values, p_mw=p_mw, q_mvar=q_mvar, sn_mva=lv_loads.s.values,
+                    name=lv_loads.load_name.values, max_p_mw=lv_loads.max_p_mw.values,
+                    min_p_mw=lv_loads.min_p_mw.values, controllable=lv_loads.controllable.values,
+                    scaling=lv_loads.scaling.values)
+
+    #create PVs
+    if len(lv_PVs):
+        pp.create_sgens(net, bus_index[lv_PVs.bus].values, p_mw=lv_PVs.p.values, q_mvar=lv_PVs.q.values,
+                        type=lv_PVs.type.values, name=lv_PVs.PV_name.values, scaling=lv_PVs.scaling.values)
+
+    #create switches (at the from bus of all lines between LV buses)
+    lv_buses = net.bus[net.bus.vn_kv == networks.vn_kv.iloc[0]].index
+    lv_switches = net.line[(net.line.from_bus.isin(lv_buses)) & (net.line.to_bus.isin(lv_buses))]
+    if len(lv_switches):
+        pp.create_switches(net, lv_switches.from_bus.values, lv_switches.index.values, et="l", closed=True,
+                           type="LBS", name=["Switch_%s-%s" % (net.bus.name.at[bus], name)
+                                             for bus, name in zip(lv_switches.from_bus, lv_switches["name"])])
+
+    return net
+
+
+def params_key(params):
+    """
+    Key of a network in the cache (content of all parameters and version of pandapower).
+    """
+    h = hashlib.sha256(pp.__version__.encode())
+    for name in sorted(params):
+        h.update(name.encode())
+        h.update(params[name].to_csv(index=False).encode())
+    return h.hexdigest()
+
+
+def load_network(params, cache_dir=CACHE_DIR):
+    """
+    Load the network from the cache, build it in case it is not available.
+    :return: tuple (network, name of the cache file)
+    """
+    cache_file = None if cache_dir is None else os.path.join(cache_dir, "%s.p" % params_key(params))
+
+    if cache_file is not None and os.path.isfile(cache_file):
+        return pp.from_pickle(cache_file), cache_file
+
+    net = build_network(params)
+
+    if cache_file is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+
+        pp.to_pickle(net, cache_file + ".tmp")
+        os.replace(cache_file + ".tmp", cache_file)
+
+    return net, cache_file
+
+
+if __name__ == '__main__':
+
+    import argparse
+    from time import time
+
+    parser = argparse.ArgumentParser(description="Build the network from the parameter files or a synthetic LV feeder.")
+    parser.add_argument("--params-dir", default="netw_params", help="directory of the network parameter files")
+    parser.add_argument("--synthetic-buses", type=int, default=None, help="build a synthetic LV feeder with this number of buses")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="directory of the cache")
+    parser.add_argument("--outfile", default=None, help="also save the network to this JSON file")
+    args = parser.parse_args()
+
+    if args.synthetic_buses is None:
+        params = read_params(args.params_dir)
+    else:
+        params = synthetic_feeder_params(args.synthetic_buses)
+
+    start_time = time()
+    net, cache_file = load_network(params, args.cache_dir)
+    print("Network with %s buses, %s lines, %s loads, %s PVs: %s (%.2f s)" % (
+        len(net.bus), len(net.line), len(net.load), len(net.sgen), cache_file, time() - start_time))
+
+    if args.outfile is not None:
+        pp.to_json(net, args.outfile)
+        print("Saved network to file: %s" % args.outfile)
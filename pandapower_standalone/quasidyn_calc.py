@@ -1,5 +1,8 @@
 import tempfile
 import os
+import copy
+import math
+from concurrent.futures import ProcessPoolExecutor
 import matplotlib.pyplot as mpl
 import numpy as np
 
@@ -10,7 +13,20 @@ from pandapower.timeseries.run_time_series import run_timeseries
 from pandapower.control import ConstControl
 
 
-def quasidyn(output_dir, net, n_timesteps, data_subfolder, data_filename):
+#results stored to files (table and variable)
+LOG_VARIABLES = [
+    ('res_load', 'p_mw'),
+    ('res_sgen', 'p_mw'),
+    ('res_bus', 'vm_pu'),
+    ('res_line', 'loading_percent'),
+    ('res_line', 'i_ka'),
+]
+
+#controllers without state between time steps (they only set values from the data source)
+STATELESS_CONTROLLERS = (ConstControl,)
+
+
+def quasidyn(output_dir, net, n_timesteps, data_subfolder, data_filename, n_workers=1, chunk_size=None):
 
     dirname = os.path.dirname(__file__)
     data_file = os.path.join(dirname, data_subfolder, data_filename)
@@ -22,12 +38,85 @@ def quasidyn(output_dir, net, n_timesteps, data_subfolder, data_filename):
     #time steps to be calculated. Could also be a list with non-consecutive time steps
     time_steps = range(0, n_timesteps)
 
+    #without stateful controllers the time steps are independent and can be calculated in parallel
+    if n_workers > 1:
+        if not has_stateful_controller(net):
+            run_timeseries_parallel(net, time_steps, output_dir, n_workers, chunk_size)
+            return
+
+        print("Stateful controller found, running time series sequentially")
+
     #the output writer with the desired results to be stored to files.
     ow = create_output_writer(net, time_steps, output_dir=output_dir)
 
     #the main time series function
     run_timeseries(net, time_steps, run_controller=True)
 
+
+def has_stateful_controller(net):
+    """
+    Check if the net has an active controller that keeps a state between time steps (e.g., DiscreteHPControl,
+    which changes the heat pump consumption based on its value in the previous time step).
+    """
+    if 'controller' not in net or net.controller.empty:
+        return False
+
+    for _, ctrl in net.controller.iterrows():
+        if ctrl['in_service'] and not isinstance(ctrl['object'], STATELESS_CONTROLLERS):
+            return True
+
+    return False
+
+
+def run_timeseries_parallel(net, time_steps, output_dir, n_workers, chunk_size=None):
+    """
+    Run the time series in chunks of consecutive time steps on a pool of processes (each worker with its own
+    copy of the net) and write the results to files in the same format as the output writer.
+    """
+    time_steps = list(time_steps)
+    if chunk_size is None:
+        chunk_size = math.ceil(len(time_steps) / n_workers)
+    chunks = [time_steps[i:i + chunk_size] for i in range(0, len(time_steps), chunk_size)]
+
+    #preallocated results (one row per time step, one column per element)
+    results = {
+        (table, variable): np.full((len(time_steps), len(net[table.replace('res_', '')])), np.nan)
+        for table, variable in LOG_VARIABLES
+    }
+    row = {t: i for i, t in enumerate(time_steps)}
+
+    with ProcessPoolExecutor(n_workers) as pool:
+        for chunk, chunk_results in zip(chunks, pool.map(run_timeseries_chunk, [net] * len(chunks), chunks)):
+            rows = [row[t] for t in chunk]
+            for key, values in chunk_results.items():
+                results[key][rows] = values
+
+    for (table, variable), values in results.items():
+        index = net[table.replace('res_', '')].index
+        df = pd.DataFrame(values, index=time_steps, columns=index)
+
+        os.makedirs(os.path.join(output_dir, table), exist_ok=True)
+        df.to_csv(os.path.join(output_dir, table, variable + '.csv'), sep=';')
+
+
+def run_timeseries_chunk(net, time_steps):
+    """
+    Run the time series for a chunk of time steps (worker of run_timeseries_parallel).
+    """
+    net = copy.deepcopy(net)
+
+    #results are kept in memory (no output path)
+    ow = OutputWriter(net, time_steps, output_path=None, log_variables=list())
+    for table, variable in LOG_VARIABLES:
+        ow.log_variable(table, variable)
+
+    run_timeseries(net, time_steps, run_controller=True, verbose=False)
+
+    return {
+        (table, variable): ow.output['{}.{}'.format(table, variable)].loc[time_steps].values
+        for table, variable in LOG_VARIABLES
+    }
+
 def create_data_source(data_file):
     profiles = pd.read_csv(data_file, header=0, decimal=".", sep=",")
     ds = DFData(profiles)
@@ -48,11 +137,8 @@ def create_controllers(net, ds):
 
 def create_output_writer(net, time_steps, output_dir):
     ow = OutputWriter(net, time_steps, output_path=output_dir, output_file_type=".csv", log_variables=list())
-    ow.log_variable('res_load', 'p_mw')
-    ow.log_variable('res_sgen', 'p_mw')
-    ow.log_variable('res_bus', 'vm_pu')
-    ow.log_variable('res_line', 'loading_percent')
-    ow.log_variable('res_line', 'i_ka')
+    for table, variable in LOG_VARIABLES:
+        ow.log_variable(table, variable)
     return ow
 
 def plot_quasi_res(dirname, subfolder, filename, net, n_timesteps, stepsize):
@@ -85,6 +171,13 @@ def plot_quasi_res(dirname, subfolder, filename, net, n_timesteps, stepsize):
 
 if __name__ == '__main__':
 
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=1, help='number of worker processes (parallel runs require --hp-control-disabled)')
+    parser.add_argument('--chunk-size', type=int, default=None, help='number of time steps per chunk (default: equal split among workers)')
+    parser.add_argument('--hp-control-disabled', action='store_true', help='do not create the (stateful) heat pump controller')
+    args = parser.parse_args()
+
     import pandapower as pp
     net = pp.from_json('power_grid_model.json')
 
@@ -92,11 +185,12 @@ if __name__ == '__main__':
     # plot_network.plot_overview(net)
 
     #create heat pump controller
-    import DiscreteHPControl
-    hp_controller = DiscreteHPControl.DiscreteHPControl(
-        net=net, hid=1, delta_vm_pu=0.1, deadband=0.01,
-        delta_vm_lower_pu=-0.1, delta_vm_upper_pu=0.1
-        )
+    if not args.hp_control_disabled:
+        import DiscreteHPControl
+        hp_controller = DiscreteHPControl.DiscreteHPControl(
+            net=net, hid=1, delta_vm_pu=0.1, deadband=0.01,
+            delta_vm_lower_pu=-0.1, delta_vm_upper_pu=0.1
+            )
 
     dirname = os.path.dirname(__file__)
     output_dir_quasi = os.path.join(dirname, "QuasiDynamic_Results")
@@ -107,7 +201,7 @@ if __name__ == '__main__':
 
     quasidyn(
         output_dir_quasi, net, n_timesteps=96, data_subfolder="netw_params",
-        data_filename="load_gen_profiles_15p.csv"
+        data_filename="load_gen_profiles_15p.csv", n_workers=args.workers, chunk_size=args.chunk_size
         )
 
     plot_quasi_res(